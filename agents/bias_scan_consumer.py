@@ -0,0 +1,187 @@
+# Batched bias scanning
+"""
+Background consumer that runs queued bias scans several candidates at a time
+
+The pipelines do not scan resumes for bias inline; they enqueue a
+``bias_scan`` task (see ``orchestrator.queue_bias_scan`` and
+``pipeline_tasks``). This consumer leases up to ``BIAS_SCAN_BATCH_SIZE``
+of those tasks at once, waiting ``BIAS_SCAN_LINGER_SECONDS`` for a partial
+batch to fill, loads their candidates in one query and scans them with a
+single LLM call (``compliance_agent.scan_for_bias_batch``). Candidates
+whose resume was already scanned on the same content are not sent again.
+
+It runs in the API process, or in worker.py when the task queue is on.
+"""
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from config.settings import settings
+from database.task_queue import task_queue, default_worker_id
+from database.workflow_runs import workflow_runs, resume_fingerprint
+from agents.compliance_agent import compliance_agent
+from tools.database_tool import database_tool
+from utils.ingestion import ingestion_manager
+from utils.logger import log
+
+
+TASK_TYPE = "bias_scan"
+
+
+class BiasScanConsumer:
+    """Leases bias_scan tasks in batches and scans each batch together"""
+
+    def __init__(self):
+        self.batch_size = max(1, settings.BIAS_SCAN_BATCH_SIZE)
+        self.linger = settings.BIAS_SCAN_LINGER_SECONDS
+        self.poll_interval = settings.TASK_POLL_INTERVAL_SECONDS
+        self.worker_id = f"{default_worker_id()}:bias-scan"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "batches": 0,
+            "scanned": 0,
+            "unchanged": 0,
+            "failed": 0,
+            "last_batch_size": 0
+        }
+
+    def start(self):
+        """Start consuming on a background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="bias-scan-consumer", daemon=True)
+        self._thread.start()
+        log.info(f"Bias scan consumer started, batches of up to {self.batch_size}")
+
+    def shutdown(self):
+        """Stop after the batch in progress, leaving queued scans for next time"""
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        log.info("Bias scan consumer stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batch and scan counters"""
+        with self._stats_lock:
+            return {**self._stats, "running": self._thread is not None, "batch_size": self.batch_size}
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                tasks = self._lease_batch()
+            except Exception as e:
+                log.error(f"Failed to lease bias scan tasks: {e}")
+                tasks = []
+
+            if not tasks:
+                self._stop.wait(self.poll_interval)
+                continue
+
+            self.process(tasks)
+
+    def _lease_batch(self) -> List[Dict]:
+        tasks = task_queue.lease_batch(self.worker_id, [TASK_TYPE], self.batch_size)
+        if tasks and len(tasks) < self.batch_size and self.linger > 0:
+            # A bulk import enqueues scans one parse at a time; give the batch a moment to fill
+            self._stop.wait(self.linger)
+            tasks += task_queue.lease_batch(self.worker_id, [TASK_TYPE], self.batch_size - len(tasks))
+        return tasks
+
+    def process(self, tasks: List[Dict]):
+        """Scan the candidates of leased tasks and complete or fail each task"""
+        by_email: Dict[str, List[Dict]] = defaultdict(list)
+        for task in tasks:
+            self._report(task, "started")
+            candidate_email = task["payload"].get("candidate_email")
+            if not candidate_email:
+                self._finish(task, {"success": False, "error": "Task has no candidate_email"}, permanent=True)
+                continue
+            by_email[candidate_email].append(task)
+
+        if not by_email:
+            return
+
+        missing: List[str] = []
+        try:
+            outcomes = self._scan(list(by_email), missing)
+        except Exception as e:
+            log.error(f"Bias scan batch failed: {e}")
+            outcomes = {candidate_email: {"success": False, "error": str(e)} for candidate_email in by_email}
+
+        for candidate_email, email_tasks in by_email.items():
+            if candidate_email in missing:
+                outcome = {"success": False, "error": f"Candidate not found: {candidate_email}"}
+            else:
+                outcome = outcomes.get(candidate_email) or {"success": False, "error": "No scan result"}
+            for task in email_tasks:
+                self._finish(task, outcome, permanent=candidate_email in missing)
+
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(tasks)
+
+    def _scan(self, candidate_emails: List[str], missing: List[str]) -> Dict[str, Dict]:
+        found = database_tool._run(
+            action="find",
+            collection="candidates",
+            query={"email": {"$in": candidate_emails}}
+        )
+        if not found.get("success"):
+            raise RuntimeError(found.get("error", "Failed to load candidates"))
+        candidates = {candidate["email"]: candidate for candidate in found.get("documents", [])}
+
+        outcomes: Dict[str, Dict] = {}
+        to_scan = []
+        for candidate_email in candidate_emails:
+            candidate = candidates.get(candidate_email)
+            if candidate is None:
+                missing.append(candidate_email)
+                continue
+            fingerprint = resume_fingerprint(candidate.get("resume_text", ""), candidate.get("skills", []))
+            previous = workflow_runs.completed_output(candidate_email, TASK_TYPE, fingerprint)
+            if previous is not None:
+                outcomes[candidate_email] = previous
+                continue
+            to_scan.append((candidate, fingerprint))
+
+        results = compliance_agent.scan_for_bias_batch([candidate for candidate, _ in to_scan]) if to_scan else {}
+        for candidate, fingerprint in to_scan:
+            result = results.get(candidate["email"]) or {"success": False, "error": "No scan result"}
+            workflow_runs.record_step(candidate["email"], TASK_TYPE, fingerprint, result)
+            outcomes[candidate["email"]] = result
+
+        with self._stats_lock:
+            self._stats["scanned"] += len(to_scan)
+            self._stats["unchanged"] += len(candidate_emails) - len(to_scan) - len(missing)
+        return outcomes
+
+    def _finish(self, task: Dict, outcome: Dict, permanent: bool = False):
+        try:
+            if outcome.get("success"):
+                result = {"risk_level": (outcome.get("scan_result") or {}).get("risk_level")}
+                task_queue.complete(task["_id"], self.worker_id, result)
+                self._report(task, "completed", result)
+                return
+
+            error = outcome.get("error") or "Bias scan failed"
+            with self._stats_lock:
+                self._stats["failed"] += 1
+            status = task_queue.fail(task, self.worker_id, error, permanent=permanent)
+            if status == "dead":
+                self._report(task, "failed", {"error": error})
+        except Exception as e:
+            # The lease runs out and the task is retried
+            log.error(f"Failed to settle bias scan task {task['_id']}: {e}")
+
+    def _report(self, task: Dict, status: str, detail: Optional[Dict] = None):
+        ingestion_id = task["payload"].get("ingestion_id")
+        if ingestion_id:
+            ingestion_manager.record_event(ingestion_id, TASK_TYPE, status, detail)
+
+
+# Global instance
+bias_scan_consumer = BiasScanConsumer()
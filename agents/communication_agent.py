@@ -145,12 +145,7 @@ class CommunicationAgent:
                 return {"success": False, "error": "Candidate not found"}
             
             # Update candidate status to rejected
-            database_tool._run(
-                action="update",
-                collection="candidates",
-                query={"email": candidate_email},
-                data={"status": "rejected"}
-            )
+            database_tool.update_candidate_status(candidate_email, "rejected")
             
             # Send rejection email
             result = email_tool._run(
@@ -1,14 +1,118 @@
 # Compliance & Diversity Agent
+import re
 from crewai import Agent
 from tools.database_tool import database_tool
+from utils.log_sink import log_sink
+from database.compliance_reports import compliance_reports
+from database.job_stats import job_stats
+from database.pipeline_analytics import pipeline_analytics
 from llm.groq_client import groq_client
 from utils.logger import log
+from utils.bias_rules import prescreen
+from utils.dates import parse_utc
 from langchain_groq import ChatGroq
 from config.settings import settings
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
+BIAS_MARKERS = """- Gender or gender identity
+- Age: birth dates, stated age, or graduation years used to signal it (the dates of listed degrees alone are not a marker)
+- Ethnicity, race, or nationality (unless directly relevant to job)
+- Religious affiliations
+- Marital status or family situation
+- Physical characteristics or disabilities (unless job-relevant accommodations)
+- Personal photos or descriptions"""
+
+BIAS_SCAN_PROMPT = """Analyze this resume for potential bias markers that should NOT influence 
+hiring decisions. Look for mentions of:
+""" + BIAS_MARKERS + """
+
+Resume excerpt:
+{excerpt}
+
+Return JSON with:
+- has_bias_markers: boolean
+- detected_markers: list of found markers
+- recommendations: suggestions to ensure fair evaluation
+- risk_level: low/medium/high
+"""
+
+RISK_LEVELS = ('low', 'medium', 'high')
+
+# Contact details carry no bias markers; dropping them keeps excerpts short
+_CONTACT_PATTERNS = [
+    (re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b'), "[email]"),
+    (re.compile(r'\b(?:https?://|www\.)\S+', re.IGNORECASE), "[link]"),
+    (re.compile(r'(?<!\w)(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}(?!\w)'), "[phone]"),
+]
+
+
+def bias_excerpt(resume_text: str) -> str:
+    """The part of a resume sent for bias scanning, with contact details redacted"""
+    text = resume_text or ""
+    for pattern, placeholder in _CONTACT_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return text[:settings.BIAS_SCAN_EXCERPT_CHARS]
+
+
+def build_batch_prompt(excerpts: List[str]) -> str:
+    """One prompt asking for a bias scan of each numbered excerpt"""
+    sections = "\n\n".join(
+        f"=== Resume {index} ===\n{excerpt}" for index, excerpt in enumerate(excerpts, start=1)
+    )
+    return f"""Analyze each of the {len(excerpts)} resume excerpts below for potential bias markers that
+should NOT influence hiring decisions. Look for mentions of:
+{BIAS_MARKERS}
+
+Judge every resume on its own text only.
+
+{sections}
+
+Return JSON with a "results" list holding one object per resume, each with:
+- resume: the resume number
+- has_bias_markers: boolean
+- detected_markers: list of found markers
+- recommendations: suggestions to ensure fair evaluation
+- risk_level: low/medium/high
+"""
+
+
+def parse_batch_scan(response: Dict, count: int) -> Dict[int, Dict]:
+    """Per-resume results of a batched scan, keyed by 0-based position
+    
+    Entries that are malformed, duplicated or numbered out of range are
+    left out so the caller can rescan those resumes individually.
+    """
+    entries = response.get("results") if isinstance(response, dict) else None
+    parsed: Dict[int, Dict] = {}
+    duplicates = set()
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            index = int(entry.get("resume")) - 1
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= index < count or not isinstance(entry.get("has_bias_markers"), bool):
+            continue
+        if str(entry.get("risk_level", "")).lower() not in RISK_LEVELS:
+            continue
+        if index in parsed:
+            duplicates.add(index)
+            continue
+        parsed[index] = {
+            "has_bias_markers": entry["has_bias_markers"],
+            "detected_markers": entry.get("detected_markers") or [],
+            "recommendations": entry.get("recommendations") or [],
+            "risk_level": str(entry["risk_level"]).lower()
+        }
+    # Two answers for one resume: trust neither
+    for index in duplicates:
+        parsed.pop(index, None)
+    return parsed
+
+
 class ComplianceAgent:
     """Agent responsible for ensuring compliance and diversity"""
     
@@ -55,62 +159,119 @@ class ComplianceAgent:
             if not candidate:
                 return {"success": False, "error": "Candidate not found"}
             
-            resume_text = candidate.get("resume_text", "")
-            
-            # Use LLM to detect potential bias indicators
-            prompt = f"""Analyze this resume for potential bias markers that should NOT influence 
-hiring decisions. Look for mentions of:
-- Gender or gender identity
-- Age or graduation years that reveal age
-- Ethnicity, race, or nationality (unless directly relevant to job)
-- Religious affiliations
-- Marital status or family situation
-- Physical characteristics or disabilities (unless job-relevant accommodations)
-- Personal photos or descriptions
-
-Resume excerpt:
-{resume_text[:1000]}
-
-Return JSON with:
-- has_bias_markers: boolean
-- detected_markers: list of found markers
-- recommendations: suggestions to ensure fair evaluation
-- risk_level: low/medium/high
-"""
-            
-            scan_result = groq_client.extract_json(prompt)
-            
-            # Log compliance check
-            compliance_log = {
-                "candidate_id": str(candidate["_id"]),
-                "candidate_email": candidate_email,
-                "scan_type": "bias_detection",
-                "timestamp": datetime.utcnow(),
-                "has_bias_markers": scan_result.get("has_bias_markers", False),
-                "detected_markers": scan_result.get("detected_markers", []),
-                "risk_level": scan_result.get("risk_level", "low"),
-                "recommendations": scan_result.get("recommendations", [])
-            }
-            
-            # Save to compliance log
-            database_tool._run(
-                action="insert",
-                collection="compliance_logs",
-                data=compliance_log
-            )
-            
-            log.info(f"Bias scan completed for {candidate_email}: {scan_result.get('risk_level', 'low')} risk")
-            
-            return {
-                "success": True,
-                "candidate_email": candidate_email,
-                "scan_result": scan_result
-            }
+            return self._scan_candidate(candidate)
             
         except Exception as e:
             log.error(f"Error in bias scan: {e}")
             return {"success": False, "error": str(e)}
     
+    def scan_for_bias_batch(self, candidates: List[Dict]) -> Dict[str, Dict]:
+        """Scan several candidates, packing their excerpts into shared LLM calls
+        
+        Resumes the local pre-screen clears are not sent to the LLM.
+        Candidates missing from a batch's reply, or with a malformed entry,
+        are rescanned one at a time.
+        
+        Args:
+            candidates: Candidate documents with email and resume_text
+            
+        Returns:
+            Bias scan results keyed by candidate email, as scan_for_bias()
+        """
+        batch_size = max(1, settings.BIAS_SCAN_BATCH_SIZE)
+        results: Dict[str, Dict] = {}
+        
+        escalated = []
+        for candidate in candidates:
+            screen = self._prescreen(candidate)
+            if screen and not screen["escalate"]:
+                results[candidate["email"]] = self._record_scan(candidate, screen["scan_result"], screen)
+            else:
+                escalated.append((candidate, screen))
+        
+        if len(escalated) < len(candidates):
+            log.info(f"Bias pre-screen cleared {len(candidates) - len(escalated)} of {len(candidates)} candidate(s) locally")
+        
+        for start in range(0, len(escalated), batch_size):
+            batch = escalated[start:start + batch_size]
+            try:
+                scan_results = parse_batch_scan(
+                    groq_client.extract_json(build_batch_prompt([
+                        bias_excerpt(candidate.get("resume_text", "")) for candidate, _ in batch
+                    ])),
+                    len(batch)
+                )
+            except Exception as e:
+                log.error(f"Batched bias scan of {len(batch)} candidate(s) failed: {e}")
+                scan_results = {}
+            
+            fallbacks = 0
+            for index, (candidate, screen) in enumerate(batch):
+                try:
+                    if index in scan_results:
+                        results[candidate["email"]] = self._record_scan(candidate, scan_results[index], screen)
+                    else:
+                        fallbacks += 1
+                        results[candidate["email"]] = self._scan_with_llm(candidate, screen)
+                except Exception as e:
+                    log.error(f"Error in bias scan of {candidate.get('email')}: {e}")
+                    results[candidate["email"]] = {"success": False, "error": str(e)}
+            
+            log.info(f"Bias scan batch of {len(batch)} candidate(s) done, {fallbacks} rescanned individually")
+        
+        return results
+    
+    def _prescreen(self, candidate: Dict) -> Optional[Dict]:
+        """Local bias marker pre-screen, or None when disabled"""
+        if not settings.BIAS_PRESCREEN_ENABLED:
+            return None
+        return prescreen(candidate.get("resume_text", ""), candidate.get("resume_file_path"))
+    
+    def _scan_candidate(self, candidate: Dict) -> Dict:
+        """Scan one candidate, with the LLM only if the pre-screen finds markers"""
+        screen = self._prescreen(candidate)
+        if screen and not screen["escalate"]:
+            return self._record_scan(candidate, screen["scan_result"], screen)
+        return self._scan_with_llm(candidate, screen)
+    
+    def _scan_with_llm(self, candidate: Dict, screen: Optional[Dict] = None) -> Dict:
+        """Scan one candidate with its own LLM call"""
+        prompt = BIAS_SCAN_PROMPT.format(excerpt=bias_excerpt(candidate.get("resume_text", "")))
+        scan_result = groq_client.extract_json(prompt)
+        return self._record_scan(candidate, scan_result, screen)
+    
+    def _record_scan(self, candidate: Dict, scan_result: Dict, screen: Optional[Dict] = None) -> Dict:
+        """Log a bias scan result to the compliance log"""
+        candidate_email = candidate["email"]
+        screened_by = "rules" if screen and not screen["escalate"] else "llm"
+        
+        # Log compliance check
+        compliance_log = {
+            "candidate_id": str(candidate["_id"]),
+            "candidate_email": candidate_email,
+            "scan_type": "bias_detection",
+            "timestamp": datetime.utcnow(),
+            "has_bias_markers": scan_result.get("has_bias_markers", False),
+            "detected_markers": scan_result.get("detected_markers", []),
+            "risk_level": scan_result.get("risk_level", "low"),
+            "recommendations": scan_result.get("recommendations", []),
+            "screened_by": screened_by,
+            "rule_markers": screen["markers"] if screen else None
+        }
+        
+        # Save to compliance log (buffered, written in bulk off this thread)
+        log_sink.write("compliance_logs", compliance_log)
+        pipeline_analytics.record("scanned", candidate_email, risk_level=compliance_log["risk_level"], screened_by=screened_by)
+        
+        log.info(f"Bias scan completed for {candidate_email} ({screened_by}): {scan_result.get('risk_level', 'low')} risk")
+        
+        return {
+            "success": True,
+            "candidate_email": candidate_email,
+            "scan_result": scan_result,
+            "screened_by": screened_by
+        }
+    
     def audit_selection_process(self, job_id: str) -> Dict:
         """Audit the candidate selection process for a job
         
@@ -123,59 +284,46 @@ Return JSON with:
         try:
             log.info(f"Auditing selection process for job: {job_id}")
             
-            # Get all candidates for this job
-            candidates_result = database_tool._run(
-                action="find",
-                collection="candidates",
-                query={"matched_jobs": job_id}
-            )
-            
-            candidates = candidates_result.get("documents", [])
+            # One maintained statistics document instead of every candidate
+            stats = job_stats.get(job_id)
             
-            if not candidates:
+            if not stats["total_candidates"]:
                 return {
                     "success": True,
                     "message": "No candidates found for this job",
                     "audit_passed": True
                 }
             
-            # Analyze diversity metrics
-            total_candidates = len(candidates)
-            shortlisted = [c for c in candidates if c.get("status") == "shortlisted"]
-            rejected = [c for c in candidates if c.get("status") == "rejected"]
-            
-            # Check score distribution
-            scores = [c.get("score", 0) for c in candidates if c.get("score")]
-            avg_score = sum(scores) / len(scores) if scores else 0
+            status_counts = stats["status_counts"]
+            avg_score = stats["average_score"]
             
             # Create audit report
             audit_report = {
                 "job_id": job_id,
                 "timestamp": datetime.utcnow(),
-                "total_candidates": total_candidates,
-                "shortlisted_count": len(shortlisted),
-                "rejected_count": len(rejected),
+                "total_candidates": stats["total_candidates"],
+                "shortlisted_count": status_counts.get("shortlisted", 0),
+                "rejected_count": status_counts.get("rejected", 0),
                 "average_score": avg_score,
+                "score_stddev": stats["score_stddev"],
                 "score_range": {
-                    "min": min(scores) if scores else 0,
-                    "max": max(scores) if scores else 0
+                    "min": stats["score_min"] or 0,
+                    "max": stats["score_max"] or 0
                 },
+                "status_counts": status_counts,
+                "status_average_scores": stats["status_average_scores"],
                 "audit_passed": True,
                 "notes": []
             }
             
             # Check for concerning patterns
-            if shortlisted and avg_score > 0:
-                shortlisted_avg = sum(c.get("score", 0) for c in shortlisted) / len(shortlisted)
+            shortlisted_avg = stats["status_average_scores"].get("shortlisted")
+            if shortlisted_avg is not None and avg_score > 0:
                 if shortlisted_avg < avg_score * 0.8:
                     audit_report["notes"].append("Warning: Shortlisted candidates have lower average scores than overall pool")
             
-            # Save audit report
-            database_tool._run(
-                action="insert",
-                collection="audit_logs",
-                data=audit_report
-            )
+            # Save audit report (buffered, written in bulk off this thread)
+            log_sink.write("audit_logs", audit_report)
             
             log.info(f"Audit completed for job {job_id}")
             
@@ -205,13 +353,13 @@ Return JSON with:
                 "details": details
             }
             
-            result = database_tool._run(
-                action="insert",
-                collection="compliance_logs",
-                data=log_entry
-            )
+            entry_id = log_sink.write("compliance_logs", log_entry)
             
-            return result
+            return {
+                "success": True,
+                "inserted_id": entry_id,
+                "message": "Action logged"
+            }
             
         except Exception as e:
             log.error(f"Error logging action: {e}")
@@ -221,30 +369,22 @@ Return JSON with:
         """Generate compliance report for a time period
         
         Args:
-            start_date: Start date (ISO format)
-            end_date: End date (ISO format)
+            start_date: Start date (ISO format, UTC unless it has an offset)
+            end_date: End date (ISO format, UTC unless it has an offset)
             
         Returns:
             Compliance report
         """
         try:
-            query = {}
-            if start_date:
-                query["timestamp"] = {"$gte": datetime.fromisoformat(start_date)}
-            if end_date:
-                if "timestamp" in query:
-                    query["timestamp"]["$lte"] = datetime.fromisoformat(end_date)
-                else:
-                    query["timestamp"] = {"$lte": datetime.fromisoformat(end_date)}
-            
-            # Get compliance logs
-            logs_result = database_tool._run(
-                action="find",
-                collection="compliance_logs",
-                query=query
-            )
+            start = parse_utc(start_date)
+            end = parse_utc(end_date)
             
-            logs = logs_result.get("documents", [])
+            # Counted in Mongo from daily rollups plus the partial days at the edges
+            counts = compliance_reports.counts(start, end)
+            by_risk_level: Dict[str, int] = {}
+            for levels in counts.values():
+                for risk_level, count in levels.items():
+                    by_risk_level[risk_level] = by_risk_level.get(risk_level, 0) + count
             
             # Generate summary
             report = {
@@ -252,9 +392,10 @@ Return JSON with:
                     "start": start_date or "beginning",
                     "end": end_date or "now"
                 },
-                "total_scans": len([l for l in logs if l.get("scan_type") == "bias_detection"]),
-                "high_risk_findings": len([l for l in logs if l.get("risk_level") == "high"]),
-                "medium_risk_findings": len([l for l in logs if l.get("risk_level") == "medium"]),
+                "total_scans": sum(counts.get("bias_detection", {}).values()),
+                "high_risk_findings": by_risk_level.get("high", 0),
+                "medium_risk_findings": by_risk_level.get("medium", 0),
+                "by_scan_type": {scan_type: dict(levels) for scan_type, levels in counts.items()},
                 "recommendations": [],
                 "generated_at": datetime.utcnow().isoformat()
             }
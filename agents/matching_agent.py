@@ -4,7 +4,9 @@ from crewai import Agent
 from langchain_groq import ChatGroq
 from config.settings import settings
 from tools.database_tool import database_tool
+from llm.groq_client import llm_semaphore
 from utils.logger import log
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 
 class MatchingAgent:
@@ -24,7 +26,8 @@ class MatchingAgent:
 
     def match_candidate_to_jobs(self, candidate_email: str) -> dict:
         """
-        Fetches a candidate and all jobs, then uses an LLM to calculate the best match.
+        Fetches a candidate and all jobs, then scores the jobs in fixed-size chunks
+        with concurrent LLM calls and merges the results as each chunk completes.
         """
         log.info(f"Matching agent starting process for candidate: {candidate_email}")
         
@@ -40,60 +43,54 @@ class MatchingAgent:
             if not all_jobs:
                 return {"success": False, "error": "No job postings found in the database to match against."}
 
-            log.info(f"Found {len(all_jobs)} jobs to match against.")
+            chunk_size = max(1, settings.MATCH_CHUNK_SIZE)
+            chunks = [all_jobs[i:i + chunk_size] for i in range(0, len(all_jobs), chunk_size)]
+            log.info(f"Found {len(all_jobs)} jobs to match against in {len(chunks)} chunk(s).")
 
-            # 3. Construct a detailed prompt for the LLM
             candidate_summary = f"""
             Candidate Skills: {', '.join(candidate.get('skills', []))}
             Candidate Resume Text: {candidate.get('resume_text', '')[:2000]}
             """
 
-            jobs_summary = json.dumps([{
-                "job_id": job["job_id"],
-                "title": job["title"],
-                "required_skills": job.get("required_skills", []),
-                "description": job.get("description", "")[:500]
-            } for job in all_jobs], indent=2)
-
-            prompt = f"""
-            As an expert AI recruiter, your task is to evaluate the following candidate against a list of available jobs.
-
-            **Candidate Profile:**
-            {candidate_summary}
-
-            **Available Jobs:**
-            {jobs_summary}
-
-            **Instructions:**
-            1.  Review the candidate's skills and resume text carefully.
-            2.  For EACH job in the list, calculate a match score from 0 to 100 based on how well the candidate's experience and skills align with the job's required skills and description.
-            3.  Consider both direct keyword matches (e.g., "Python") and conceptual matches (e.g., experience with "RAG" matches a "Generative AI" requirement).
-            4.  Identify the single job with the HIGHEST match score.
-            5.  Provide your response ONLY in the following JSON format. Do not add any other text or explanations before or after the JSON block.
-
-            {{
-              "best_match_job_id": "The job_id of the top-scoring job",
-              "best_match_score": "The highest score (as a number)",
-              "reasoning": "A brief, 2-sentence explanation for why this job is the best match.",
-              "all_scores": [
-                {{"job_id": "JOB-ID-001", "score": 75}},
-                {{"job_id": "JOB-ID-002", "score": 88}}
-              ]
-            }}
-            """
-            
-            # 4. Get Evaluation from LLM
-            response_text = self.llm.invoke(prompt).content
-            log.info(f"LLM matching response: {response_text}")
+            # 3. Score every chunk concurrently and merge results as they arrive
+            job_scores = []
+            failed_chunks = []
+            workers = min(max(1, settings.MATCH_CONCURRENCY), len(chunks))
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(self._score_chunk_with_retry, candidate_summary, chunk): index
+                    for index, chunk in enumerate(chunks)
+                }
+
+                for completed, future in enumerate(as_completed(futures), start=1):
+                    index = futures[future]
+                    try:
+                        job_scores.extend(future.result())
+                    except Exception as e:
+                        log.error(f"Matching chunk {index + 1}/{len(chunks)} failed for {candidate_email}: {e}")
+                        failed_chunks.append(index)
+
+                    self._save_partial_scores(candidate_email, job_scores, completed, len(chunks), failed_chunks)
+
+            if not job_scores:
+                return {"success": False, "error": "All matching chunks failed."}
+
+            # The best job may sit in a failed chunk, so a partial match must not be decided on.
+            # The scores so far are already saved; the step fails and is retried.
+            if failed_chunks:
+                return {
+                    "success": False,
+                    "error": f"{len(failed_chunks)} of {len(chunks)} matching chunk(s) failed.",
+                    "job_scores": sorted(job_scores, key=lambda x: x["score"], reverse=True),
+                    "failed_chunks": len(failed_chunks)
+                }
+
+            job_scores.sort(key=lambda x: x["score"], reverse=True)
+            top_score = job_scores[0]["score"]
+            best_job_id = job_scores[0]["job_id"]
             
-            # Clean up the response to ensure it's valid JSON
-            cleaned_response = response_text.strip().replace("```json", "").replace("```", "")
-            match_data = json.loads(cleaned_response)
-
-            top_score = match_data.get("best_match_score", 0)
-            best_job_id = match_data.get("best_match_job_id")
-            
-            # 5. Update the candidate's record in the database
+            # 4. Update the candidate's record in the database
             database_tool.update_candidate_score(
                 email=candidate_email,
                 score=top_score,
@@ -104,12 +101,98 @@ class MatchingAgent:
             return {
                 "success": True,
                 "overall_score": top_score,
-                "matched_jobs": [{"job_id": best_job_id, "score": top_score}] if best_job_id else []
+                "matched_jobs": [{"job_id": best_job_id, "score": top_score}] if best_job_id else [],
+                "job_scores": job_scores,
+                "failed_chunks": 0
             }
 
         except Exception as e:
             log.error(f"Error in matching agent: {e}")
             return {"success": False, "error": str(e)}
 
+    def _score_chunk_with_retry(self, candidate_summary: str, jobs: list) -> list:
+        """Score one chunk of jobs, retrying only this chunk on bad output."""
+        attempts = settings.MATCH_CHUNK_RETRIES + 1
+        last_error = None
+
+        for attempt in range(1, attempts + 1):
+            try:
+                return self._score_chunk(candidate_summary, jobs)
+            except Exception as e:
+                last_error = e
+                log.warning(f"Matching chunk attempt {attempt}/{attempts} failed: {e}")
+
+        raise last_error
+
+    def _score_chunk(self, candidate_summary: str, jobs: list) -> list:
+        """Ask the LLM to score a single chunk of jobs and validate the reply."""
+        jobs_summary = json.dumps([{
+            "job_id": job["job_id"],
+            "title": job["title"],
+            "required_skills": job.get("required_skills", []),
+            "description": job.get("description", "")[:500]
+        } for job in jobs], indent=2)
+
+        prompt = f"""
+        As an expert AI recruiter, your task is to evaluate the following candidate against a list of available jobs.
+
+        **Candidate Profile:**
+        {candidate_summary}
+
+        **Available Jobs:**
+        {jobs_summary}
+
+        **Instructions:**
+        1.  Review the candidate's skills and resume text carefully.
+        2.  For EACH job in the list, calculate a match score from 0 to 100 based on how well the candidate's experience and skills align with the job's required skills and description.
+        3.  Consider both direct keyword matches (e.g., "Python") and conceptual matches (e.g., experience with "RAG" matches a "Generative AI" requirement).
+        4.  Provide your response ONLY in the following JSON format. Do not add any other text or explanations before or after the JSON block.
+
+        {{
+          "scores": [
+            {{"job_id": "JOB-ID-001", "score": 75}},
+            {{"job_id": "JOB-ID-002", "score": 88}}
+          ]
+        }}
+        """
+
+        with llm_semaphore:
+            response_text = self.llm.invoke(prompt).content
+        log.debug(f"LLM matching response: {response_text}")
+
+        # Clean up the response to ensure it's valid JSON
+        cleaned_response = response_text.strip().replace("```json", "").replace("```", "")
+        start_idx = cleaned_response.find('{')
+        end_idx = cleaned_response.rfind('}') + 1
+        match_data = json.loads(cleaned_response[start_idx:end_idx] if start_idx != -1 else cleaned_response)
+
+        expected_ids = {job["job_id"] for job in jobs}
+        scores = {}
+        for entry in match_data.get("scores", []):
+            if entry.get("job_id") in expected_ids:
+                scores[entry["job_id"]] = float(entry.get("score", 0))
+
+        missing = expected_ids - scores.keys()
+        if missing:
+            raise ValueError(f"LLM response is missing scores for {len(missing)} job(s)")
+
+        return [{"job_id": job_id, "score": score} for job_id, score in scores.items()]
+
+    def _save_partial_scores(self, candidate_email: str, job_scores: list, completed: int, total: int, failed_chunks: list):
+        """Persist the scores merged so far so progress survives a crash mid-match."""
+        database_tool._run(
+            action="update",
+            collection="candidates",
+            query={"email": candidate_email},
+            data={
+                "job_scores": sorted(job_scores, key=lambda x: x["score"], reverse=True),
+                "matching_progress": {
+                    "chunks_completed": completed,
+                    "chunks_total": total,
+                    "failed_chunks": len(failed_chunks)
+                }
+            }
+        )
+
 # Create a singleton instance
 matching_agent = MatchingAgent()
\ No newline at end of file
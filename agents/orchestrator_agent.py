@@ -4,7 +4,7 @@ from crewai import Agent
 from utils.logger import log
 from langchain_groq import ChatGroq
 from config.settings import settings
-from typing import Dict
+from typing import Callable, Dict, List, Optional, Tuple
 from bson import ObjectId
 from datetime import datetime
 
@@ -14,6 +14,18 @@ from agents.matching_agent import matching_agent
 from agents.communication_agent import communication_agent
 from agents.compliance_agent import compliance_agent
 from tools.database_tool import database_tool
+from database.workflow_runs import workflow_runs, resume_fingerprint
+from database.task_queue import task_queue
+from database.pipeline_analytics import pipeline_analytics
+from database.unit_of_work import in_unit_of_work
+from utils.dag import dag_executor, DagStep
+
+
+# (step, status, detail) progress hook used by background ingestion
+ProgressCallback = Callable[[str, str, Optional[Dict]], None]
+
+# Minimum match score for an automatic AI interview
+SHORTLIST_THRESHOLD = 50
 
 
 class OrchestratorAgent:
@@ -39,52 +51,356 @@ class OrchestratorAgent:
         self.communication_agent = communication_agent
         self.compliance_agent = compliance_agent
     
-    def process_candidate_application(self, resume_file_path: str) -> Dict:
-        """Complete end-to-end processing of a candidate application"""
+    @in_unit_of_work
+    def process_candidate_application(
+        self,
+        resume_file_path: str,
+        content_hash: Optional[str] = None,
+        resume_text: Optional[str] = None,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> Dict:
+        """Complete end-to-end processing of a candidate application
+        
+        Args:
+            resume_file_path: Path to the stored resume
+            content_hash: SHA-256 of the resume content, used to skip resumes
+                that have already been through the pipeline
+            resume_text: Pre-extracted resume text (optional)
+            progress_callback: Called as (step, status, detail) when a step
+                starts, completes or fails (optional)
+        """
+        workflow_result = {"success": True, "steps": [], "errors": [], "decision": None}
+        
+        def report(step: str, status: str, detail: Optional[Dict] = None):
+            if status == "completed":
+                workflow_result["steps"].append(step)
+            if progress_callback:
+                try:
+                    progress_callback(step, status, detail)
+                except Exception as e:
+                    log.warning(f"Orchestrator: progress callback failed for step {step}: {e}")
+        
+        step = "start"
         try:
             log.info(f"Orchestrator: Starting candidate application processing for {resume_file_path}")
             
-            workflow_result = {"success": True, "steps": [], "errors": [], "decision": None}
+            if content_hash:
+                known_result = self.reuse_known_resume(content_hash)
+                if known_result:
+                    report("deduplicate", "completed", {"candidate_email": known_result["candidate_email"]})
+                    return known_result
             
-            parse_result = self.resume_agent.process_resume(resume_file_path)
+            step = "parse"
+            report(step, "started")
+            parse_result = self.resume_agent.parse_resume(resume_file_path, resume_text=resume_text)
             if not parse_result.get("success"):
                 raise ValueError(f"Resume parsing failed: {parse_result.get('error')}")
             
             candidate_email = parse_result["candidate_email"]
+            workflow_result["candidate_email"] = candidate_email
+            workflow_result["candidate_name"] = parse_result.get("candidate_name", "")
+            report(step, "completed", {"candidate_email": candidate_email})
+            pipeline_analytics.record("uploaded", candidate_email)
             
-            self.communication_agent.send_application_confirmation(candidate_email)
-            self.compliance_agent.scan_for_bias(candidate_email)
-            match_result = self.matching_agent.match_candidate_to_jobs(candidate_email)
+            if content_hash:
+                self.register_resume_blob(content_hash, resume_file_path, parse_result)
             
-            overall_score = match_result.get("overall_score", 0)
-            matched_jobs = match_result.get("matched_jobs", [])
-            
-            if overall_score >= 50 and matched_jobs: # Using a threshold of 50
-                workflow_result["decision"] = "shortlisted_for_ai_interview"
-                top_job_id = matched_jobs[0]["job_id"]
-                
-                log.info(f"AUTO-SHORTLIST: Score {overall_score} >= 50. Scheduling AI interview for job {top_job_id}")
-                
-                shortlist_result = self.process_candidate_shortlisting(
-                    candidate_email=candidate_email,
-                    job_id=top_job_id
+            # Indexing, confirmation, bias scan and matching only need the saved
+            # candidate, so they run concurrently and the decision waits on
+            # matching alone. Steps whose inputs are unchanged since their last
+            # successful run (e.g. a re-upload) are skipped. The bias scan is
+            # only queued here; it runs batched with other candidates' scans.
+            step = "workflow"
+            candidate_id = parse_result["candidate_id"]
+            fingerprint = resume_fingerprint(parse_result["resume_text"], parse_result["skills"])
+            dag_result = dag_executor.run([
+                DagStep(
+                    "embed",
+                    lambda _: self.run_indexing(candidate_email, candidate_id, parse_result["resume_text"], parse_result["skills"]),
+                    timeout=settings.PIPELINE_STEP_TIMEOUT_SECONDS
+                ),
+                DagStep(
+                    "confirmation",
+                    lambda _: self.run_confirmation(candidate_email),
+                    timeout=settings.PIPELINE_STEP_TIMEOUT_SECONDS
+                ),
+                DagStep(
+                    "bias_scan",
+                    lambda _: self.queue_bias_scan(candidate_email, fingerprint),
+                    timeout=settings.PIPELINE_STEP_TIMEOUT_SECONDS
+                ),
+                DagStep(
+                    "match",
+                    lambda _: self.run_matching(candidate_email, fingerprint),
+                    timeout=settings.PIPELINE_MATCH_TIMEOUT_SECONDS
+                ),
+                DagStep(
+                    "decision",
+                    lambda inputs: workflow_runs.run_step(
+                        candidate_email,
+                        "decision",
+                        inputs["match"],
+                        lambda: self._apply_decision(candidate_email, inputs["match"])
+                    ),
+                    depends_on=["match"],
+                    timeout=settings.PIPELINE_STEP_TIMEOUT_SECONDS
                 )
-                
-                workflow_result["message"] = f"SHORTLISTED! Score: {overall_score:.2f}. AI interview link sent."
-                workflow_result["ai_interview_link"] = shortlist_result.get("ai_interview_link", "")
-            else:
-                workflow_result["decision"] = "rejected"
-                log.info(f"AUTO-REJECT: Score {overall_score} < 50. Sending rejection email")
-                job_id_for_rejection = matched_jobs[0]["job_id"] if matched_jobs else "GENERAL"
-                self.reject_candidate(candidate_email, job_id_for_rejection)
-                workflow_result["message"] = f"REJECTED. Score: {overall_score:.2f}. Rejection email sent."
+            ], on_event=report)
+            
+            for failed_step, error in dag_result["errors"].items():
+                workflow_result["errors"].append({"step": failed_step, "error": error})
+            
+            workflow_result["timings"] = {
+                "steps": {name: round(timing["duration"], 3) for name, timing in dag_result["timings"].items()},
+                "critical_path": dag_result["critical_path"],
+                "critical_path_seconds": round(dag_result["critical_path_seconds"], 3)
+            }
+            log.info(
+                f"Orchestrator: workflow for {candidate_email} finished in {dag_result['total_seconds']:.2f}s, "
+                f"critical path {' -> '.join(dag_result['critical_path'])}"
+            )
+            
+            if dag_result["statuses"].get("decision") != "completed":
+                failed_step = "match" if "match" in dag_result["errors"] else "decision"
+                raise RuntimeError(f"{failed_step} step did not complete: {dag_result['errors'].get(failed_step, 'skipped')}")
+            
+            workflow_result.update(dag_result["results"]["decision"])
             
             return workflow_result
             
         except Exception as e:
             log.error(f"Orchestrator error in application processing: {e}")
-            return {"success": False, "error": str(e)}
+            report(step, "failed", {"error": str(e)})
+            return {"success": False, "error": str(e), "steps": workflow_result["steps"]}
+    
+    def reuse_known_resume(self, content_hash: str) -> Optional[Dict]:
+        """Return the prior outcome for a resume whose content was already processed.
+        
+        Only resumes that made it all the way through matching are reused; a blob
+        whose candidate was deleted or never scored goes through the pipeline again.
+        """
+        blob = database_tool._run(
+            action="find_one",
+            collection="resume_blobs",
+            query={"sha256": content_hash}
+        ).get("document")
+        
+        if not blob or not blob.get("candidate_email"):
+            return None
+        
+        candidate = database_tool._run(
+            action="find_one",
+            collection="candidates",
+            query={"email": blob["candidate_email"]}
+        ).get("document")
+        
+        if not candidate or candidate.get("score") is None:
+            return None
+        
+        database_tool._run(
+            action="update",
+            collection="resume_blobs",
+            query={"sha256": content_hash},
+            data={"last_seen_at": datetime.utcnow()}
+        )
+        
+        score = candidate.get("score") or 0
+        log.info(f"Orchestrator: Resume {content_hash[:12]} already processed for {candidate['email']}, reusing prior result")
+        
+        return {
+            "success": True,
+            "deduplicated": True,
+            "steps": [],
+            "errors": [],
+            "decision": candidate.get("status"),
+            "candidate_email": candidate["email"],
+            "candidate_name": candidate.get("name", ""),
+            "overall_score": score,
+            "message": f"Resume already processed. Score: {score:.2f}."
+        }
+    
+    def register_resume_blob(self, content_hash: str, resume_file_path: str, parse_result: Dict):
+        """Link resume content to the candidate it produced"""
+        database_tool._run(
+            action="upsert",
+            collection="resume_blobs",
+            query={"sha256": content_hash},
+            data={
+                "sha256": content_hash,
+                "file_path": resume_file_path,
+                "candidate_id": parse_result.get("candidate_id"),
+                "candidate_email": parse_result["candidate_email"],
+                "last_seen_at": datetime.utcnow()
+            }
+        )
+    
+    def run_indexing(self, candidate_email: str, candidate_id: str, resume_text: str, skills: List[str]) -> Dict:
+        """Add a candidate to the search indexes unless their resume is unchanged"""
+        return workflow_runs.run_step(
+            candidate_email,
+            "embed",
+            resume_fingerprint(resume_text, skills),
+            lambda: self.resume_agent.index_candidate(candidate_id, resume_text, skills)
+        )
+    
+    def run_confirmation(self, candidate_email: str) -> Dict:
+        """Send the application confirmation once per candidate"""
+        return workflow_runs.run_step(
+            candidate_email,
+            "confirmation",
+            {"candidate_email": candidate_email},
+            lambda: self.communication_agent.send_application_confirmation(candidate_email)
+        )
+    
+    def run_bias_scan(self, candidate_email: str, fingerprint: Dict) -> Dict:
+        """Scan a candidate for bias markers unless their resume is unchanged"""
+        return workflow_runs.run_step(
+            candidate_email,
+            "bias_scan",
+            fingerprint,
+            lambda: self.compliance_agent.scan_for_bias(candidate_email)
+        )
+    
+    def queue_bias_scan(self, candidate_email: str, fingerprint: Dict) -> Dict:
+        """Queue a candidate for the batched bias scanner unless their resume is unchanged
+        
+        The scan runs on the bias scan consumer (agents/bias_scan_consumer.py)
+        together with other candidates' scans, so the workflow does not wait
+        on it. A settled task for the same resume is run again: a dead one
+        failed, and a completed one was for a scan no longer on record (the
+        resume changed and then changed back).
+        """
+        previous = workflow_runs.completed_output(candidate_email, "bias_scan", fingerprint)
+        if previous is not None:
+            log.info(f"Workflow: skipping bias_scan for {candidate_email}, inputs unchanged")
+            return previous
+        
+        task_id = task_queue.enqueue(
+            "bias_scan",
+            {"candidate_email": candidate_email},
+            dedupe_key=f"bias_scan:{candidate_email}:{fingerprint['resume_sha256']}",
+            requeue_settled=True
+        )
+        return {"success": True, "queued": True, "task_id": task_id}
+    
+    def run_matching(self, candidate_email: str, fingerprint: Dict) -> Dict:
+        """Match a candidate to jobs unless neither their resume nor the jobs changed
+        
+        Returns:
+            Dict with success, overall_score and matched_jobs
+        """
+        def match():
+            match_result = self.matching_agent.match_candidate_to_jobs(candidate_email)
+            if match_result.get("success"):
+                matched_jobs = match_result.get("matched_jobs") or []
+                pipeline_analytics.record(
+                    "matched",
+                    candidate_email,
+                    matched_jobs[0].get("job_id") if matched_jobs else None,
+                    overall_score=match_result.get("overall_score", 0)
+                )
+            return {
+                "success": match_result.get("success", False),
+                "error": match_result.get("error"),
+                "overall_score": match_result.get("overall_score", 0),
+                "matched_jobs": match_result.get("matched_jobs", [])
+            }
+        
+        return workflow_runs.run_step(
+            candidate_email,
+            "match",
+            {**fingerprint, "jobs": workflow_runs.jobs_fingerprint()},
+            match
+        )
+    
+    def _apply_decision(self, candidate_email: str, match_result: Dict) -> Dict:
+        """Shortlist or reject a candidate from their match result
+        
+        Raises:
+            RuntimeError: If shortlisting or rejecting failed, so the decision
+                is not recorded as done and runs again on a retry
+        """
+        overall_score = match_result.get("overall_score", 0)
+        decision, job_id = self.decide(overall_score, match_result.get("matched_jobs", []))
+        outcome = {"overall_score": overall_score, "decision": decision}
+        
+        if decision == "shortlisted_for_ai_interview":
+            log.info(f"AUTO-SHORTLIST: Score {overall_score} >= {SHORTLIST_THRESHOLD}. Scheduling AI interview for job {job_id}")
+            
+            shortlist_result = self.process_candidate_shortlisting(
+                candidate_email=candidate_email,
+                job_id=job_id
+            )
+            if not shortlist_result.get("success"):
+                raise RuntimeError(f"Shortlisting failed: {shortlist_result.get('error', 'unknown error')}")
+            
+            outcome["message"] = f"SHORTLISTED! Score: {overall_score:.2f}. AI interview link sent."
+            outcome["ai_interview_link"] = shortlist_result.get("ai_interview_link", "")
+        else:
+            log.info(f"AUTO-REJECT: Score {overall_score} < {SHORTLIST_THRESHOLD}. Sending rejection email")
+            reject_result = self.reject_candidate(candidate_email, job_id)
+            if not reject_result.get("success"):
+                raise RuntimeError(f"Rejection failed: {reject_result.get('error', 'unknown error')}")
+            outcome["message"] = f"REJECTED. Score: {overall_score:.2f}. Rejection email sent."
+        
+        return outcome
+    
+    def decide(self, overall_score: float, matched_jobs: List[Dict]) -> Tuple[str, str]:
+        """Decide whether a matched candidate is shortlisted or rejected
+        
+        Args:
+            overall_score: Best match score
+            matched_jobs: Matched jobs, best first
+            
+        Returns:
+            Tuple of (decision, job_id the decision applies to)
+        """
+        if overall_score >= SHORTLIST_THRESHOLD and matched_jobs:
+            return "shortlisted_for_ai_interview", matched_jobs[0]["job_id"]
+        return "rejected", matched_jobs[0]["job_id"] if matched_jobs else "GENERAL"
+    
+    def create_ai_interview(self, candidate_email: str, job_id: str) -> str:
+        """Create the pending AI interview record for a shortlisted candidate
+        
+        A pending interview that already exists for the same candidate and job
+        is reused, so a retried shortlisting does not send a second link.
+        
+        Returns:
+            AI interview link
+        """
+        existing = database_tool._run(
+            action="find_one",
+            collection="interviews",
+            query={"candidate_id": candidate_email, "job_id": job_id, "status": "pending_ai_interview"}
+        ).get("document")
+        if existing:
+            return existing["meeting_link"]
+        
+        unique_interview_id = str(ObjectId())
+        base_url = settings.FRONTEND_URL.strip('/')
+        ai_interview_link = f"{base_url}/frontend/interview.html?interview_id={unique_interview_id}"
+        
+        ### FIX: Using the generic _run method to save the interview ###
+        # This ensures that we have full control over the data being inserted and
+        # that the 'status' is correctly set to 'pending_ai_interview'.
+        database_tool._run(
+            action="insert",
+            collection="interviews",
+            data={
+                "_id": unique_interview_id,
+                "job_id": job_id,
+                "candidate_id": candidate_email,
+                "status": "pending_ai_interview", # The correct status
+                "meeting_link": ai_interview_link,
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow(),
+            }
+        )
+        log.info(f"Successfully created AI interview record {unique_interview_id} in database.")
+        pipeline_analytics.record("shortlisted", candidate_email, job_id)
+        return ai_interview_link
     
+    @in_unit_of_work
     def process_candidate_shortlisting(self, candidate_email: str, job_id: str) -> Dict:
         """
         Processes shortlisting by creating an AI interview record with the CORRECT status.
@@ -92,27 +408,7 @@ class OrchestratorAgent:
         try:
             log.info(f"Orchestrator: Processing AI interview shortlisting for {candidate_email} for job {job_id}")
             
-            unique_interview_id = str(ObjectId())
-            base_url = settings.FRONTEND_URL.strip('/')
-            ai_interview_link = f"{base_url}/frontend/interview.html?interview_id={unique_interview_id}"
-
-            ### FIX: Using the generic _run method to save the interview ###
-            # This ensures that we have full control over the data being inserted and
-            # that the 'status' is correctly set to 'pending_ai_interview'.
-            database_tool._run(
-                action="insert",
-                collection="interviews",
-                data={
-                    "_id": unique_interview_id,
-                    "job_id": job_id,
-                    "candidate_id": candidate_email,
-                    "status": "pending_ai_interview", # The correct status
-                    "meeting_link": ai_interview_link,
-                    "created_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow(),
-                }
-            )
-            log.info(f"Successfully created AI interview record {unique_interview_id} in database.")
+            ai_interview_link = self.create_ai_interview(candidate_email, job_id)
 
             self.communication_agent.send_interview_invitation(
                 candidate_email=candidate_email,
@@ -131,6 +427,7 @@ class OrchestratorAgent:
             log.error(f"Orchestrator error in AI interview shortlisting: {e}")
             return {"success": False, "error": str(e)}
     
+    @in_unit_of_work
     def process_post_interview_decision(self, interview_id: str):
         """
         Makes a final hiring decision after an AI interview is complete.
@@ -152,12 +449,15 @@ class OrchestratorAgent:
                 log.info(f"REJECT DECISION: Score {score} < 70. Sending rejection email.")
                 self.communication_agent.send_rejection_notice(candidate_email, job_id, is_rejection=True)
 
-            return {"success": True, "decision": "hire" if score >= 70 else "reject"}
+            decision = "hire" if score >= 70 else "reject"
+            pipeline_analytics.record("decided", candidate_email, job_id, decision=decision)
+            return {"success": True, "decision": decision}
             
         except Exception as e:
             log.error(f"Orchestrator error in post-interview decision: {e}")
             return {"success": False, "error": str(e)}
 
+    @in_unit_of_work
     def reject_candidate(self, candidate_email: str, job_id: str) -> Dict:
         """Processes an immediate candidate rejection."""
         try:
@@ -0,0 +1,320 @@
+# Candidate pipeline as queue tasks
+"""
+Task handlers that run the candidate application pipeline from the durable
+task queue
+
+    parse -> embed
+          -> bias_scan
+          -> notify (confirmation)
+          -> match -> decide -> notify (interview invitation / rejection)
+
+bias_scan tasks are normally taken by the batched consumer in
+agents/bias_scan_consumer.py; the handler here scans a single candidate.
+
+Every handler is safe to run more than once: follow-up tasks are enqueued
+with a dedupe key per application, and each step is recorded in the
+candidate's workflow run so a completed step is not repeated on the same
+inputs.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from bson import ObjectId
+from database.task_queue import task_queue, PermanentTaskError
+from database.workflow_runs import workflow_runs, resume_fingerprint
+from database.unit_of_work import in_unit_of_work
+from database.pipeline_analytics import pipeline_analytics
+from agents.orchestrator_agent import orchestrator
+from tools.database_tool import database_tool
+from utils.ingestion import ingestion_manager
+
+
+# Dead-lettering one of these leaves the application without a decision
+CRITICAL_TASKS = ('parse', 'match', 'decide')
+
+
+class PipelineTasks:
+    """Handlers for each step of the candidate pipeline"""
+
+    def __init__(self):
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Optional[Dict]]] = {
+            "parse": self._parse,
+            "embed": self._embed,
+            "bias_scan": self._bias_scan,
+            "match": self._match,
+            "decide": self._decide,
+            "notify": self._notify
+        }
+
+    def start_application(
+        self,
+        resume_file_path: str,
+        content_hash: Optional[str] = None,
+        resume_text: Optional[str] = None,
+        ingestion_id: Optional[str] = None
+    ) -> str:
+        """Enqueue the first task of a candidate application
+
+        Args:
+            resume_file_path: Path to the stored resume
+            content_hash: SHA-256 of the resume content
+            resume_text: Pre-extracted resume text (optional)
+            ingestion_id: Ingestion to report progress to (optional)
+
+        Returns:
+            Application ID shared by all tasks of this application
+        """
+        return self.start_applications([{
+            "resume_file_path": resume_file_path,
+            "content_hash": content_hash,
+            "resume_text": resume_text,
+            "ingestion_id": ingestion_id
+        }])[0]
+
+    def start_applications(self, applications: List[Dict]) -> List[str]:
+        """Enqueue the first task of several applications in one round trip
+
+        Args:
+            applications: One dict per application with the arguments of
+                start_application()
+
+        Returns:
+            Application IDs in the order given
+        """
+        tasks = []
+        for application in applications:
+            application_id = application.get("ingestion_id") or str(ObjectId())
+            payload = {
+                "application_id": application_id,
+                "ingestion_id": application.get("ingestion_id"),
+                "resume_file_path": application["resume_file_path"],
+                "content_hash": application.get("content_hash")
+            }
+            if application.get("resume_text"):
+                payload["resume_text"] = application["resume_text"]
+            tasks.append({"type": "parse", "payload": payload, "dedupe_key": f"{application_id}:parse"})
+
+        task_queue.enqueue_many(tasks)
+        return [task["payload"]["application_id"] for task in tasks]
+
+    @in_unit_of_work
+    def handle(self, task: Dict) -> Optional[Dict]:
+        """Run the handler for a leased task
+
+        Args:
+            task: Leased task document
+
+        Returns:
+            Result stored on the completed task
+        """
+        handler = self.handlers.get(task["type"])
+        if handler is None:
+            raise PermanentTaskError(f"Unknown task type: {task['type']}")
+
+        payload = task["payload"]
+        step = self._step_name(task)
+        self._report(payload, step, "started")
+        result = handler(payload)
+        self._report(payload, step, "completed", result)
+        return result
+
+    def on_dead_letter(self, task: Dict, error: str):
+        """Record a task that will not be retried again"""
+        payload = task["payload"]
+        self._report(payload, self._step_name(task), "failed", {"error": error})
+
+        ingestion_id = payload.get("ingestion_id")
+        if ingestion_id and (task["type"] in CRITICAL_TASKS or payload.get("kind") not in (None, "confirmation")):
+            ingestion_manager.finish(ingestion_id, {"success": False, "error": f"{task['type']} failed: {error}"})
+
+    def _step_name(self, task: Dict) -> str:
+        kind = task["payload"].get("kind")
+        return f"{task['type']}:{kind}" if kind else task["type"]
+
+    def _report(self, payload: Dict, step: str, status: str, detail: Optional[Dict] = None):
+        if payload.get("ingestion_id"):
+            ingestion_manager.record_event(payload["ingestion_id"], step, status, detail)
+
+    def _enqueue_next(self, payload: Dict, task_type: str, kind: Optional[str] = None, **extra):
+        next_payload = {
+            "application_id": payload["application_id"],
+            "ingestion_id": payload.get("ingestion_id"),
+            "candidate_email": extra.pop("candidate_email", payload.get("candidate_email")),
+            **extra
+        }
+        if kind:
+            next_payload["kind"] = kind
+        dedupe_key = f"{payload['application_id']}:{task_type}" + (f":{kind}" if kind else "")
+        task_queue.enqueue(task_type, next_payload, dedupe_key=dedupe_key)
+
+    def _parse(self, payload: Dict) -> Dict:
+        ingestion_id = payload.get("ingestion_id")
+        if ingestion_id:
+            ingestion_manager.mark_processing(ingestion_id)
+
+        content_hash = payload.get("content_hash")
+        if content_hash:
+            known_result = orchestrator.reuse_known_resume(content_hash)
+            if known_result:
+                if ingestion_id:
+                    ingestion_manager.finish(ingestion_id, known_result)
+                return {"deduplicated": True, "candidate_email": known_result["candidate_email"]}
+
+        parse_result = orchestrator.resume_agent.parse_resume(
+            payload["resume_file_path"],
+            resume_text=payload.get("resume_text")
+        )
+        if not parse_result.get("success"):
+            # Extraction and validation failures repeat identically on retry
+            raise PermanentTaskError(f"Resume parsing failed: {parse_result.get('error')}")
+
+        candidate_email = parse_result["candidate_email"]
+        pipeline_analytics.record("uploaded", candidate_email)
+        if content_hash:
+            orchestrator.register_resume_blob(content_hash, payload["resume_file_path"], parse_result)
+
+        self._enqueue_next(payload, "embed", candidate_email=candidate_email)
+        self._enqueue_next(payload, "bias_scan", candidate_email=candidate_email)
+        self._enqueue_next(payload, "notify", kind="confirmation", candidate_email=candidate_email)
+        self._enqueue_next(
+            payload,
+            "match",
+            candidate_email=candidate_email,
+            candidate_name=parse_result.get("candidate_name", "")
+        )
+
+        return {"candidate_email": candidate_email, "candidate_id": parse_result.get("candidate_id")}
+
+    def _load_candidate(self, candidate_email: str) -> Dict:
+        candidate = database_tool._run(
+            action="find_one",
+            collection="candidates",
+            query={"email": candidate_email}
+        ).get("document")
+        if not candidate:
+            raise PermanentTaskError(f"Candidate not found: {candidate_email}")
+        return candidate
+
+    def _fingerprint(self, candidate: Dict) -> Dict:
+        return resume_fingerprint(candidate.get("resume_text", ""), candidate.get("skills", []))
+
+    def _embed(self, payload: Dict) -> Dict:
+        candidate = self._load_candidate(payload["candidate_email"])
+        result = orchestrator.run_indexing(
+            candidate["email"],
+            candidate["_id"],
+            candidate.get("resume_text", ""),
+            candidate.get("skills", [])
+        )
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", "Indexing failed"))
+        return {"candidate_id": candidate["_id"]}
+
+    def _bias_scan(self, payload: Dict) -> Dict:
+        candidate = self._load_candidate(payload["candidate_email"])
+        result = orchestrator.run_bias_scan(candidate["email"], self._fingerprint(candidate))
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", "Bias scan failed"))
+        return {"risk_level": result.get("scan_result", {}).get("risk_level")}
+
+    def _match(self, payload: Dict) -> Dict:
+        candidate = self._load_candidate(payload["candidate_email"])
+        match_result = orchestrator.run_matching(candidate["email"], self._fingerprint(candidate))
+        if not match_result.get("success"):
+            raise RuntimeError(match_result.get("error", "Matching failed"))
+
+        overall_score = match_result.get("overall_score", 0)
+        matched_jobs = match_result.get("matched_jobs", [])
+        self._enqueue_next(
+            payload,
+            "decide",
+            candidate_name=payload.get("candidate_name", ""),
+            overall_score=overall_score,
+            matched_jobs=matched_jobs
+        )
+        return {"overall_score": overall_score}
+
+    def _decide(self, payload: Dict) -> Dict:
+        candidate_email = payload["candidate_email"]
+        match_output = {
+            "overall_score": payload.get("overall_score", 0),
+            "matched_jobs": payload.get("matched_jobs", [])
+        }
+
+        def decide():
+            overall_score = match_output["overall_score"]
+            decision, job_id = orchestrator.decide(overall_score, match_output["matched_jobs"])
+            outcome = {"decision": decision, "job_id": job_id, "overall_score": overall_score}
+            if decision == "shortlisted_for_ai_interview":
+                outcome["meeting_link"] = orchestrator.create_ai_interview(candidate_email, job_id)
+                outcome["message"] = f"SHORTLISTED! Score: {overall_score:.2f}. AI interview link sent."
+            else:
+                outcome["message"] = f"REJECTED. Score: {overall_score:.2f}. Rejection email sent."
+            return outcome
+
+        outcome = workflow_runs.run_step(candidate_email, "decision", match_output, decide)
+
+        summary = {
+            "candidate_name": payload.get("candidate_name", ""),
+            "overall_score": outcome["overall_score"],
+            "decision": outcome["decision"],
+            "message": outcome["message"]
+        }
+
+        if outcome["decision"] == "shortlisted_for_ai_interview":
+            self._enqueue_next(
+                payload,
+                "notify",
+                kind="interview_invitation",
+                job_id=outcome["job_id"],
+                meeting_link=outcome["meeting_link"],
+                summary=summary
+            )
+        else:
+            self._enqueue_next(payload, "notify", kind="rejection", job_id=outcome["job_id"], summary=summary)
+
+        return {"decision": outcome["decision"], "job_id": outcome["job_id"]}
+
+    def _notify(self, payload: Dict) -> Dict:
+        kind = payload.get("kind")
+        candidate_email = payload["candidate_email"]
+        communication_agent = orchestrator.communication_agent
+
+        if kind == "confirmation":
+            result = orchestrator.run_confirmation(candidate_email)
+        elif kind == "interview_invitation":
+            result = workflow_runs.run_step(
+                candidate_email,
+                "decision_notice",
+                {"kind": kind, "job_id": payload["job_id"], "meeting_link": payload["meeting_link"]},
+                lambda: communication_agent.send_interview_invitation(
+                    candidate_email=candidate_email,
+                    job_id=payload["job_id"],
+                    interview_time="at your convenience within the next 48 hours",
+                    meeting_link=payload["meeting_link"]
+                )
+            )
+        elif kind == "rejection":
+            result = workflow_runs.run_step(
+                candidate_email,
+                "decision_notice",
+                {"kind": kind, "job_id": payload["job_id"]},
+                lambda: communication_agent.send_rejection_notice(candidate_email, payload["job_id"])
+            )
+        else:
+            raise PermanentTaskError(f"Unknown notification kind: {kind}")
+
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", f"Sending {kind} failed"))
+
+        # The decision e-mail is the last step of an application
+        if kind != "confirmation" and payload.get("ingestion_id"):
+            ingestion_manager.finish(payload["ingestion_id"], {
+                "success": True,
+                "candidate_email": candidate_email,
+                **payload.get("summary", {})
+            })
+
+        return {"kind": kind}
+
+
+# Global instance
+pipeline_tasks = PipelineTasks()
@@ -32,29 +32,54 @@ class ResumeParsingAgent:
             tools=[resume_parser_tool, database_tool, vector_search_tool]
         )
     
-    def process_resume(self, file_path: str) -> dict:
+    def process_resume(self, file_path: str, resume_text: str = None) -> dict:
         """Process a resume file and store candidate data
         
         Args:
             file_path: Path to resume file
+            resume_text: Pre-extracted resume text (optional)
             
         Returns:
             Dictionary with processing results
         """
+        result = self.parse_resume(file_path, resume_text=resume_text)
+        if not result.get("success"):
+            return result
+        
+        self.index_candidate(result["candidate_id"], result.pop("resume_text"), result["skills"])
+        return result
+    
+    def parse_resume(self, file_path: str, resume_text: str = None) -> dict:
+        """Parse a resume file and save the candidate, without indexing it
+        
+        Args:
+            file_path: Path to resume file
+            resume_text: Pre-extracted resume text (optional)
+            
+        Returns:
+            Dictionary with processing results, including the resume text
+            for the indexing step
+        """
         try:
             log.info(f"Processing resume: {file_path}")
             
             # Parse resume
-            parsed_data = resume_parser_tool._run(file_path)
+            parsed_data = resume_parser_tool._run(file_path, resume_text=resume_text)
             
             if "error" in parsed_data:
                 log.error(f"Resume parsing failed: {parsed_data['error']}")
                 return {"success": False, "error": parsed_data["error"]}
             
+            # Candidates are keyed by email; without one the resume cannot be saved
+            email = (parsed_data.get("email") or "").strip()
+            if not email:
+                log.error(f"No email found in resume: {file_path}")
+                return {"success": False, "error": "No email address found in resume"}
+            
             # Prepare candidate data
             candidate_data = {
                 "name": parsed_data.get("name", "Unknown"),
-                "email": parsed_data.get("email", ""),
+                "email": email,
                 "phone": parsed_data.get("phone", ""),
                 "resume_text": parsed_data.get("resume_text", ""),
                 "skills": parsed_data.get("skills", []),
@@ -73,30 +98,39 @@ class ResumeParsingAgent:
                 log.error(f"Failed to save candidate: {db_result.get('error')}")
                 return {"success": False, "error": db_result.get("error")}
             
-            candidate_id = db_result.get("inserted_id")
-            
-            # Add to vector store for semantic search
-            vector_result = vector_search_tool._run(
-                action="add_candidate",
-                candidate_id=candidate_id,
-                text=candidate_data["resume_text"],
-                skills=candidate_data["skills"]
-            )
-            
             log.info(f"Resume processed successfully: {candidate_data['name']}")
             
             return {
                 "success": True,
-                "candidate_id": candidate_id,
+                "candidate_id": db_result.get("inserted_id"),
                 "candidate_name": candidate_data["name"],
                 "candidate_email": candidate_data["email"],
                 "skills": candidate_data["skills"],
-                "experience_years": candidate_data["experience_years"]
+                "experience_years": candidate_data["experience_years"],
+                "resume_text": candidate_data["resume_text"]
             }
             
         except Exception as e:
             log.error(f"Error processing resume: {e}")
             return {"success": False, "error": str(e)}
+    
+    def index_candidate(self, candidate_id: str, resume_text: str, skills: list) -> dict:
+        """Add a saved candidate to the search indexes
+        
+        Args:
+            candidate_id: Candidate document ID
+            resume_text: Full resume text
+            skills: Parsed skills
+            
+        Returns:
+            Vector search tool result
+        """
+        return vector_search_tool._run(
+            action="add_candidate",
+            candidate_id=candidate_id,
+            text=resume_text,
+            skills=skills
+        )
 
 
 # Create agent instance
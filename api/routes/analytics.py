@@ -0,0 +1,72 @@
+# api/routes/analytics.py
+
+from datetime import datetime
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional, Tuple
+
+from database.pipeline_analytics import pipeline_analytics
+from utils.dates import parse_utc
+from utils.logger import log
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+def _parse_range(start: Optional[str], end: Optional[str]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    try:
+        return parse_utc(start), parse_utc(end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+
+
+@router.get("/funnel", response_model=dict)
+async def get_funnel(start: Optional[str] = None, end: Optional[str] = None, job_id: Optional[str] = None):
+    """Get the number of candidates reaching each pipeline stage
+
+    Args:
+        start: Inclusive lower bound (ISO format, UTC unless it has an offset)
+        end: Exclusive upper bound (ISO format, UTC unless it has an offset)
+        job_id: Only stages recorded for this job (matched onwards)
+    """
+    try:
+        start_at, end_at = _parse_range(start, end)
+        funnel = await run_in_threadpool(pipeline_analytics.funnel, start_at, end_at, job_id)
+        return {"success": True, **funnel}
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.error(f"Error computing pipeline funnel: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/latency", response_model=dict)
+async def get_latency(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    job_id: Optional[str] = None,
+    percentiles: str = "50,90,99"
+):
+    """Get the time from upload to each pipeline stage
+
+    Args:
+        start: Inclusive lower bound (ISO format, UTC unless it has an offset)
+        end: Exclusive upper bound (ISO format, UTC unless it has an offset)
+        job_id: Only stages recorded for this job (matched onwards)
+        percentiles: Comma-separated percentiles between 0 and 100
+    """
+    try:
+        start_at, end_at = _parse_range(start, end)
+        try:
+            requested = [float(value) for value in percentiles.split(",") if value.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="percentiles must be comma-separated numbers")
+        if not requested or not all(0 <= value <= 100 for value in requested):
+            raise HTTPException(status_code=400, detail="percentiles must be between 0 and 100")
+
+        latency = await run_in_threadpool(pipeline_analytics.latency, start_at, end_at, job_id, requested)
+        return {"success": True, **latency}
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.error(f"Error computing pipeline latency: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,22 +1,35 @@
 # api/routes/candidates.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, List
+from datetime import datetime
+from bson import ObjectId
 
 from models.candidate import CandidateUpdate, CandidateResponse
-from tools.database_tool import database_tool
+from config.settings import settings
+from database.mongodb_client import mongodb
+from database.repositories import candidate_repository
+from database.leaderboards import job_leaderboards
+from database.job_stats import STATS_FIELDS, job_stats
+from database.system_stats import system_stats
+from utils.pagination import MAX_PAGE_SIZE, PaginationError, build_projection, parse_sort
+from tools.vector_search_tool import vector_search_tool
 from agents.orchestrator_agent import orchestrator
 from agents.matching_agent import matching_agent
 from utils.logger import log
 
 router = APIRouter(prefix="/candidates", tags=["Candidates"])
 
+CANDIDATE_SORT_FIELDS = ("uploaded_at", "updated_at", "score", "experience_years", "name")
+
 
 # Define a Pydantic model for the list response to ensure proper serialization
 class CandidateListResponse(BaseModel):
     success: bool = True
     count: int
+    next_cursor: Optional[str] = None
     candidates: List[CandidateResponse]
 
 # Define a Pydantic model for the single item response
@@ -25,28 +38,39 @@ class SingleCandidateResponse(BaseModel):
     candidate: CandidateResponse
 
 
-@router.get("/", response_model=CandidateListResponse)
+# Unset fields are left out, so a `fields=` selection is not padded with defaults
+@router.get("/", response_model=CandidateListResponse, response_model_exclude_unset=True)
 async def get_candidates(
     status: Optional[str] = None,
     min_score: Optional[float] = None,
-    limit: int = 50
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "-uploaded_at",
+    fields: Optional[str] = None
 ):
-    """Get all candidates with optional filters"""
+    """Get candidates with optional filters, one page at a time
+    
+    Args:
+        status: Only candidates with this status
+        min_score: Only candidates scoring at least this
+        limit: Page size
+        cursor: ``next_cursor`` of the previous page; keep the same filters and sort
+        sort: Field to sort on, prefixed with ``-`` for descending
+        fields: Comma-separated fields to return; id, name, email, status
+            and uploaded_at are always included
+    """
     try:
-        query = {}
-        if status:
-            query["status"] = status
-        if min_score is not None:
-            query["score"] = {"$gte": min_score}
-        
-        result = database_tool._run(
-            action="find",
-            collection="candidates",
-            query=query
+        sort_field, descending = parse_sort(sort, CANDIDATE_SORT_FIELDS)
+        db_candidates, next_cursor = await candidate_repository.list(
+            status=status,
+            min_score=min_score,
+            limit=limit,
+            cursor=cursor,
+            sort_field=sort_field,
+            descending=descending,
+            projection=build_projection(CandidateResponse, fields)
         )
         
-        db_candidates = result.get("documents", [])[:limit]
-        
         # Transform DB data to match the CandidateResponse model
         # Pydantic will handle datetime serialization automatically
         candidates_list = []
@@ -56,26 +80,121 @@ async def get_candidates(
 
         # Return a dictionary that matches the response_model. FastAPI does the rest.
         return {
+            "success": True,
             "count": len(candidates_list),
+            "next_cursor": next_cursor,
             "candidates": candidates_list
         }
         
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         log.error(f"Error fetching candidates: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/search", response_model=dict)
+async def search_candidates(
+    q: str,
+    status: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    uploaded_after: Optional[datetime] = None,
+    uploaded_before: Optional[datetime] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100)
+):
+    """Hybrid keyword + semantic candidate search with filters and pagination
+    
+    Filters are applied before ranking: both indexes only rank candidates
+    that match them. Results come from the top HYBRID_SEARCH_POOL_SIZE
+    fused hits, so ``total`` counts the matches within that ranked pool
+    (returned as ``pool_size``), not every candidate matching the query.
+    """
+    try:
+        filters = {}
+        if status:
+            filters["status"] = status
+        if min_score is not None or max_score is not None:
+            filters["score"] = {}
+            if min_score is not None:
+                filters["score"]["$gte"] = min_score
+            if max_score is not None:
+                filters["score"]["$lte"] = max_score
+        if uploaded_after or uploaded_before:
+            filters["uploaded_at"] = {}
+            if uploaded_after:
+                filters["uploaded_at"]["$gte"] = uploaded_after
+            if uploaded_before:
+                filters["uploaded_at"]["$lte"] = uploaded_before
+        
+        candidates = mongodb.get_collection("candidates")
+        candidate_ids = None
+        if filters:
+            candidate_ids = {str(doc["_id"]) async for doc in candidates.find(filters, {"_id": 1})}
+        
+        ranked = []
+        if candidate_ids is None or candidate_ids:
+            # Embedding the query is CPU-bound, keep it off the event loop
+            search_result = await run_in_threadpool(
+                vector_search_tool._run,
+                action="hybrid_search_candidates",
+                query=q,
+                candidate_ids=candidate_ids
+            )
+            
+            if "error" in search_result:
+                raise HTTPException(status_code=500, detail=search_result["error"])
+            
+            ranked = search_result.get("results", [])
+        
+        # Filters again, in case a candidate changed since the ids were read
+        query = {
+            "_id": {"$in": [ObjectId(r["candidate_id"]) for r in ranked if ObjectId.is_valid(r["candidate_id"])]},
+            **filters
+        }
+        
+        cursor = candidates.find(query, {"resume_text": 0})
+        documents = {str(doc["_id"]): doc async for doc in cursor}
+        
+        # Keep the fused ranking order; Mongo returns documents unordered
+        matches = []
+        for result in ranked:
+            candidate = documents.get(result["candidate_id"])
+            if not candidate:
+                continue
+            candidate["id"] = str(candidate.pop("_id"))
+            candidate["search"] = {
+                "score": result["score"],
+                "vector_rank": result["vector_rank"],
+                "keyword_rank": result["keyword_rank"]
+            }
+            matches.append(candidate)
+        
+        start = (page - 1) * page_size
+        
+        return {
+            "success": True,
+            "query": q,
+            "page": page,
+            "page_size": page_size,
+            "total": len(matches),
+            "pool_size": settings.HYBRID_SEARCH_POOL_SIZE,
+            "candidates": matches[start:start + page_size]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.error(f"Error searching candidates: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{candidate_email}", response_model=SingleCandidateResponse)
 async def get_candidate(candidate_email: str):
     """Get a specific candidate by email"""
     try:
-        result = database_tool._run(
-            action="find_one",
-            collection="candidates",
-            query={"email": candidate_email}
-        )
-        
-        candidate = result.get("document")
+        candidate = await candidate_repository.get_by_email(candidate_email)
         if not candidate:
             raise HTTPException(status_code=404, detail="Candidate not found")
         
@@ -101,15 +220,21 @@ async def update_candidate(candidate_email: str, update: CandidateUpdate):
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
         
-        result = database_tool._run(
-            action="update",
-            collection="candidates",
-            query={"email": candidate_email},
-            data=update_data
-        )
+        if update_data.keys() & STATS_FIELDS.keys():
+            # Job statistics need the score and status being replaced
+            previous = await candidate_repository.update_returning_previous(candidate_email, update_data, STATS_FIELDS)
+            if previous is None:
+                raise HTTPException(status_code=404, detail="Candidate not found")
+            await job_stats.record_change_async(previous, {**previous, **update_data})
+        else:
+            result = await candidate_repository.update_by_email(candidate_email, update_data)
+            if result["matched_count"] == 0:
+                raise HTTPException(status_code=404, detail="Candidate not found")
         
-        if result.get("matched_count", 0) == 0:
-            raise HTTPException(status_code=404, detail="Candidate not found")
+        if "score" in update_data:
+            await run_in_threadpool(job_leaderboards.refresh_candidate, candidate_email)
+        if "status" in update_data:
+            system_stats.invalidate()
         
         log.info(f"Candidate updated: {candidate_email}")
         
@@ -129,7 +254,7 @@ async def update_candidate(candidate_email: str, update: CandidateUpdate):
 async def rematch_candidate(candidate_email: str):
     """Re-run job matching for a candidate"""
     try:
-        result = matching_agent.match_candidate_to_jobs(candidate_email)
+        result = await run_in_threadpool(matching_agent.match_candidate_to_jobs, candidate_email)
         
         if not result.get("success"):
             raise HTTPException(status_code=500, detail=result.get("error", "Matching failed"))
@@ -147,7 +272,8 @@ async def rematch_candidate(candidate_email: str):
 async def shortlist_candidate(candidate_email: str, job_id: str):
     """Shortlist a candidate for a job and schedule interview"""
     try:
-        result = orchestrator.process_candidate_shortlisting(
+        result = await run_in_threadpool(
+            orchestrator.process_candidate_shortlisting,
             candidate_email=candidate_email,
             job_id=job_id
         )
@@ -171,7 +297,8 @@ async def shortlist_candidate(candidate_email: str, job_id: str):
 async def reject_candidate(candidate_email: str, job_id: str):
     """Reject a candidate for a job"""
     try:
-        result = orchestrator.reject_candidate(
+        result = await run_in_threadpool(
+            orchestrator.reject_candidate,
             candidate_email=candidate_email,
             job_id=job_id
         )
@@ -192,15 +319,17 @@ async def reject_candidate(candidate_email: str, job_id: str):
 async def delete_candidate(candidate_email: str):
     """Delete a candidate"""
     try:
-        result = database_tool._run(
-            action="delete",
-            collection="candidates",
-            query={"email": candidate_email}
-        )
+        candidate = await candidate_repository.delete_by_email(candidate_email)
         
-        if result.get("deleted_count", 0) == 0:
+        if not candidate:
             raise HTTPException(status_code=404, detail="Candidate not found")
         
+        # Drop the candidate from the search indexes, job leaderboards and job statistics as well
+        await run_in_threadpool(vector_search_tool._run, action="remove_candidate", candidate_id=candidate["_id"])
+        await run_in_threadpool(job_leaderboards.refresh_candidate, candidate_email)
+        await job_stats.record_change_async(candidate, None)
+        system_stats.invalidate()
+        
         log.info(f"Candidate deleted: {candidate_email}")
         
         return {
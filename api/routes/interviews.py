@@ -1,22 +1,28 @@
 # api/routes/interviews.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, List
 
 from models.interview import InterviewCreate, InterviewUpdate, InterviewResponse
-from tools.database_tool import database_tool
+from database.repositories import interview_repository
+from database.system_stats import system_stats
+from utils.pagination import MAX_PAGE_SIZE, PaginationError, build_projection, parse_sort
 from agents.scheduling_agent import scheduling_agent
 from agents.communication_agent import communication_agent
 from utils.logger import log
 
 router = APIRouter(prefix="/interviews", tags=["Interviews"])
 
+INTERVIEW_SORT_FIELDS = ("created_at", "scheduled_time", "status")
+
 
 # Define Pydantic models for structured, serialized responses
 class InterviewListResponse(BaseModel):
     success: bool = True
     count: int
+    next_cursor: Optional[str] = None
     interviews: List[InterviewResponse]
 
 class SingleInterviewResponse(BaseModel):
@@ -28,7 +34,8 @@ class SingleInterviewResponse(BaseModel):
 async def create_interview(interview: InterviewCreate):
     """Create and schedule an interview"""
     try:
-        result = scheduling_agent.schedule_interview(
+        result = await run_in_threadpool(
+            scheduling_agent.schedule_interview,
             candidate_email=interview.candidate_id,
             job_id=interview.job_id,
             preferred_time=interview.scheduled_time.isoformat()
@@ -37,6 +44,7 @@ async def create_interview(interview: InterviewCreate):
         if not result.get("success"):
             raise HTTPException(status_code=500, detail=result.get("error", "Scheduling failed"))
         
+        system_stats.invalidate()
         return result
         
     except HTTPException:
@@ -46,30 +54,41 @@ async def create_interview(interview: InterviewCreate):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/", response_model=InterviewListResponse)
+# Unset fields are left out, so a `fields=` selection is not padded with defaults
+@router.get("/", response_model=InterviewListResponse, response_model_exclude_unset=True)
 async def get_interviews(
     status: Optional[str] = None,
     candidate_id: Optional[str] = None,
     job_id: Optional[str] = None,
-    limit: int = 50
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "-created_at",
+    fields: Optional[str] = None
 ):
-    """Get interviews with optional filters"""
+    """Get interviews with optional filters, one page at a time
+    
+    Args:
+        status: Only interviews with this status
+        candidate_id: Only interviews of this candidate
+        job_id: Only interviews for this job
+        limit: Page size
+        cursor: ``next_cursor`` of the previous page; keep the same filters and sort
+        sort: Field to sort on, prefixed with ``-`` for descending
+        fields: Comma-separated fields to return; the required fields of an
+            interview are always included
+    """
     try:
-        query = {}
-        if status:
-            query["status"] = status
-        if candidate_id:
-            query["candidate_id"] = candidate_id
-        if job_id:
-            query["job_id"] = job_id
-        
-        result = database_tool._run(
-            action="find",
-            collection="interviews",
-            query=query
+        sort_field, descending = parse_sort(sort, INTERVIEW_SORT_FIELDS)
+        db_interviews, next_cursor = await interview_repository.list(
+            status=status,
+            candidate_id=candidate_id,
+            job_id=job_id,
+            limit=limit,
+            cursor=cursor,
+            sort_field=sort_field,
+            descending=descending,
+            projection=build_projection(InterviewResponse, fields)
         )
-        
-        db_interviews = result.get("documents", [])[:limit]
 
         # Transform DB data to match InterviewResponse model
         interview_list = []
@@ -79,10 +98,14 @@ async def get_interviews(
         
         # Return a dictionary, FastAPI will handle serialization
         return {
+            "success": True,
             "count": len(interview_list),
+            "next_cursor": next_cursor,
             "interviews": interview_list
         }
         
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         log.error(f"Error fetching interviews: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -92,13 +115,7 @@ async def get_interviews(
 async def get_interview(interview_id: str):
     """Get a specific interview"""
     try:
-        result = database_tool._run(
-            action="find_one",
-            collection="interviews",
-            query={"_id": interview_id}
-        )
-        
-        interview = result.get("document")
+        interview = await interview_repository.get(interview_id)
         if not interview:
             raise HTTPException(status_code=404, detail="Interview not found")
         
@@ -123,15 +140,12 @@ async def update_interview(interview_id: str, update: InterviewUpdate):
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
         
-        result = database_tool._run(
-            action="update",
-            collection="interviews",
-            query={"_id": interview_id},
-            data=update_data
-        )
+        result = await interview_repository.update_by_id(interview_id, update_data)
         
-        if result.get("matched_count", 0) == 0:
+        if result["matched_count"] == 0:
             raise HTTPException(status_code=404, detail="Interview not found")
+        if "status" in update_data:
+            system_stats.invalidate()
         
         log.info(f"Interview updated: {interview_id}")
         
@@ -151,28 +165,18 @@ async def update_interview(interview_id: str, update: InterviewUpdate):
 async def send_interview_reminder(interview_id: str):
     """Send interview reminder to candidate"""
     try:
-        interview_result = database_tool._run(
-            action="find_one",
-            collection="interviews",
-            query={"_id": interview_id}
-        )
-        
-        interview = interview_result.get("document")
+        interview = await interview_repository.get(interview_id)
         if not interview:
             raise HTTPException(status_code=404, detail="Interview not found")
         
-        result = communication_agent.send_interview_reminder(
+        result = await run_in_threadpool(
+            communication_agent.send_interview_reminder,
             candidate_email=interview.get("candidate_id"),
             interview_time=str(interview.get("scheduled_time")),
             meeting_link=interview.get("meeting_link", "")
         )
         
-        database_tool._run(
-            action="update",
-            collection="interviews",
-            query={"_id": interview_id},
-            data={"reminder_sent": True}
-        )
+        await interview_repository.update_by_id(interview_id, {"reminder_sent": True})
         
         return result
         
@@ -187,15 +191,11 @@ async def send_interview_reminder(interview_id: str):
 async def cancel_interview(interview_id: str):
     """Cancel an interview"""
     try:
-        result = database_tool._run(
-            action="update",
-            collection="interviews",
-            query={"_id": interview_id},
-            data={"status": "cancelled"}
-        )
+        result = await interview_repository.update_by_id(interview_id, {"status": "cancelled"})
         
-        if result.get("matched_count", 0) == 0:
+        if result["matched_count"] == 0:
             raise HTTPException(status_code=404, detail="Interview not found")
+        system_stats.invalidate()
         
         log.info(f"Interview cancelled: {interview_id}")
         
@@ -215,7 +215,7 @@ async def cancel_interview(interview_id: str):
 async def get_available_slots(days_ahead: int = 7):
     """Get available interview slots"""
     try:
-        result = scheduling_agent.get_available_slots(days_ahead=days_ahead)
+        result = await run_in_threadpool(scheduling_agent.get_available_slots, days_ahead=days_ahead)
         
         return result
         
@@ -1,21 +1,30 @@
 # api/routes/jobs.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from datetime import datetime
 from typing import List, Optional
 
 # Import the corrected models
 from models.job_posting import JobPostingCreate, JobPostingUpdate, JobPostingResponse
-from tools.database_tool import database_tool
+from database.repositories import job_repository, candidate_repository
+from database.job_catalogue import job_catalogue
+from database.job_stats import job_stats
+from database.system_stats import system_stats
+from utils.pagination import MAX_PAGE_SIZE, PaginationError, build_projection, parse_sort
 from tools.vector_search_tool import vector_search_tool
 from utils.logger import log
 
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 
+JOB_SORT_FIELDS = ("created_at", "updated_at", "job_id", "title")
+
 # Define a wrapper model for the list response for better serialization
 class JobListResponse(BaseModel):
     success: bool = True
     count: int
+    next_cursor: Optional[str] = None
     jobs: List[JobPostingResponse]
 
 
@@ -24,14 +33,14 @@ async def create_job(job: JobPostingCreate):
     """Create a new job posting"""
     try:
         job_data = job.model_dump()
-        result = database_tool._run(action="insert", collection="jobs", data=job_data)
-        
-        if not result.get("success"):
-            raise HTTPException(status_code=500, detail="Failed to create job")
+        job_data["created_at"] = job_data["updated_at"] = datetime.utcnow()
+        job_id = await job_repository.insert(job_data)
+        await run_in_threadpool(job_catalogue.invalidate)
+        system_stats.invalidate()
         
-        job_id = result.get("inserted_id")
-        
-        vector_search_tool._run(
+        # Embedding the job is CPU-bound, keep it off the event loop
+        await run_in_threadpool(
+            vector_search_tool._run,
             action="add_job",
             job_id=job_data["job_id"],
             title=job_data["title"],
@@ -51,21 +60,33 @@ async def create_job(job: JobPostingCreate):
 
 
 ### FIX: Corrected get_jobs endpoint ###
-@router.get("/", response_model=JobListResponse)
-async def get_jobs(limit: int = 50):
-    """Get all job postings"""
+# Unset fields are left out, so a `fields=` selection is not padded with defaults
+@router.get("/", response_model=JobListResponse, response_model_exclude_unset=True)
+async def get_jobs(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "-created_at",
+    fields: Optional[str] = None
+):
+    """Get job postings, one page at a time
+    
+    Args:
+        limit: Page size
+        cursor: ``next_cursor`` of the previous page; keep the same sort
+        sort: Field to sort on, prefixed with ``-`` for descending
+        fields: Comma-separated fields to return; the required fields of a
+            job are always included
+    """
     try:
-        # The incorrect 'status' filter has been removed.
-        # This now fetches ALL jobs.
-        query = {}
-        
-        result = database_tool._run(
-            action="find",
-            collection="jobs",
-            query=query
+        sort_field, descending = parse_sort(sort, JOB_SORT_FIELDS)
+        # No 'status' filter: this fetches ALL jobs.
+        db_jobs, next_cursor = await job_repository.list(
+            limit=limit,
+            cursor=cursor,
+            sort_field=sort_field,
+            descending=descending,
+            projection=build_projection(JobPostingResponse, fields)
         )
-        
-        db_jobs = result.get("documents", [])[:limit]
 
         # Transform the _id to id to match the Pydantic model
         jobs_list = []
@@ -75,10 +96,14 @@ async def get_jobs(limit: int = 50):
         
         # Return a dictionary that FastAPI will serialize using the response_model
         return {
+            "success": True,
             "count": len(jobs_list),
+            "next_cursor": next_cursor,
             "jobs": jobs_list
         }
         
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         log.error(f"Error fetching jobs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -87,10 +112,8 @@ async def get_jobs(limit: int = 50):
 @router.get("/{job_id}", response_model=dict)
 async def get_job(job_id: str):
     """Get a specific job posting"""
-    # NOTE: This assumes `get_job_by_id` handles ObjectId conversion.
-    # If not, this might also need adjustment.
     try:
-        job = database_tool.get_job_by_id(job_id)
+        job = await job_repository.get_by_job_id(job_id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         return {"success": True, "job": job}
@@ -108,18 +131,18 @@ async def update_job(job_id: str, job_update: JobPostingUpdate):
         update_data = job_update.model_dump(exclude_unset=True)
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
+        update_data["updated_at"] = datetime.utcnow()
         
-        result = database_tool._run(
-            action="update", collection="jobs", query={"job_id": job_id}, data=update_data
-        )
-        if result.get("matched_count", 0) == 0:
+        result = await job_repository.update_by_job_id(job_id, update_data)
+        if result["matched_count"] == 0:
             raise HTTPException(status_code=404, detail="Job not found")
+        await run_in_threadpool(job_catalogue.invalidate)
         
         log.info(f"Job updated: {job_id}")
         return {
             "success": True,
             "message": "Job updated successfully",
-            "modified_count": result.get("modified_count", 0)
+            "modified_count": result["modified_count"]
         }
     except HTTPException:
         raise
@@ -132,11 +155,11 @@ async def update_job(job_id: str, job_update: JobPostingUpdate):
 async def delete_job(job_id: str):
     """Delete a job posting"""
     try:
-        result = database_tool._run(
-            action="delete", collection="jobs", query={"job_id": job_id}
-        )
-        if result.get("deleted_count", 0) == 0:
+        deleted_count = await job_repository.delete_by_job_id(job_id)
+        if deleted_count == 0:
             raise HTTPException(status_code=404, detail="Job not found")
+        await run_in_threadpool(job_catalogue.invalidate)
+        system_stats.invalidate()
         
         log.info(f"Job deleted: {job_id}")
         return {"success": True, "message": "Job deleted successfully"}
@@ -151,7 +174,7 @@ async def delete_job(job_id: str):
 async def get_job_candidates(job_id: str, top_n: int = 10):
     """Get top candidates for a job"""
     try:
-        candidates = database_tool.get_top_candidates(job_id, limit=top_n)
+        candidates = await candidate_repository.top_for_job(job_id, limit=top_n)
         return {
             "success": True,
             "job_id": job_id,
@@ -160,4 +183,15 @@ async def get_job_candidates(job_id: str, top_n: int = 10):
         }
     except Exception as e:
         log.error(f"Error fetching job candidates: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{job_id}/stats", response_model=dict)
+async def get_job_stats(job_id: str):
+    """Get candidate statistics for a job (counts per status, score mean, spread and range)"""
+    try:
+        stats = await run_in_threadpool(job_stats.get, job_id)
+        return {"success": True, "stats": stats}
+    except Exception as e:
+        log.error(f"Error fetching job stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
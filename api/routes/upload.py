@@ -1,68 +1,98 @@
 # Resume upload endpoints
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from typing import Optional
 from config.settings import settings
 from utils.logger import log
-from agents.orchestrator_agent import orchestrator
+from utils.file_handler import file_handler
+from utils.ingestion import ingestion_manager, serialize_ingestion, FINAL_STATUSES
+from utils.upload_stream import receive_batch_upload, receive_resume_upload, UploadRejected
+from utils.resumable_upload import resumable_uploads, serialize_session
+from database.mongodb_client import mongodb
+from bson import ObjectId
+import asyncio
+import json
 import os
-import shutil
-from datetime import datetime
+import re
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
 
+CONTENT_RANGE_PATTERN = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
 
-@router.post("/resume")
-async def upload_resume(file: UploadFile = File(...)):
-    """Upload a resume and process it through the complete pipeline
+# Saved batch files recorded per ingestion insert
+BATCH_SUBMIT_SIZE = 50
+
+
+# Streamed straight from the request body, so the form is described by hand for the docs
+RESUME_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}}
+                }
+            }
+        }
+    }
+}
+
+BATCH_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["files"],
+                    "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}}
+                }
+            }
+        }
+    }
+}
+
+
+@router.post("/resume", openapi_extra=RESUME_UPLOAD_OPENAPI)
+async def upload_resume(request: Request):
+    """Upload a resume and queue it for the complete pipeline
+    
+    The file is streamed to disk as it arrives, hashed on the way and
+    rejected with 413 as soon as it passes the size limit.
     
     Args:
-        file: Resume file (PDF or DOCX)
+        file: Resume file (PDF or DOCX), sent as multipart form field "file"
         
     Returns:
-        Processing results
+        Ingestion ID to poll for processing results
     """
     try:
-        # Validate file type
-        allowed_extensions = ['.pdf', '.docx', '.doc']
-        file_ext = os.path.splitext(file.filename)[1].lower()
-        
-        if file_ext not in allowed_extensions:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}"
-            )
-        
-        # Validate file size
-        file.file.seek(0, 2)
-        file_size = file.file.tell()
-        file.file.seek(0)
-        
-        if file_size > settings.MAX_UPLOAD_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Maximum size: {settings.MAX_UPLOAD_SIZE / 1024 / 1024}MB"
-            )
-        
-        # Save file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_filename = f"{timestamp}_{file.filename}"
-        file_path = os.path.join(settings.UPLOAD_DIR, safe_filename)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        try:
+            upload = await receive_resume_upload(request)
+        except UploadRejected as rejected:
+            raise HTTPException(status_code=rejected.status_code, detail=rejected.detail)
         
+        file_path = upload["file_path"]
         log.info(f"File uploaded: {file_path}")
         
-        # Process through orchestrator
-        result = orchestrator.process_candidate_application(file_path)
+        # Hand off to the ingestion pool; known content reuses its prior results
+        ingestion_id = await run_in_threadpool(
+            ingestion_manager.submit,
+            file_path,
+            filename=upload["filename"],
+            content_hash=upload["content_hash"]
+        )
         
-        return JSONResponse(content={
-            "success": result.get("success", False),
-            "message": result.get("message", ""),
-            "candidate_email": result.get("candidate_email", ""),
-            "candidate_name": result.get("candidate_name", ""),
-            "overall_score": result.get("overall_score", 0),
-            "workflow_steps": result.get("steps", []),
+        return JSONResponse(status_code=202, content={
+            "success": True,
+            "message": "Resume accepted for processing",
+            "ingestion_id": ingestion_id,
+            "status_url": f"/upload/status/{ingestion_id}",
+            "events_url": f"/upload/status/{ingestion_id}/events",
             "file_path": file_path
         })
         
@@ -73,66 +103,458 @@ async def upload_resume(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/resume/batch")
-async def upload_resumes_batch(files: list[UploadFile] = File(...)):
+def _accept_batch_files(
+    files: list[dict],
+    batch_id: str,
+    max_files: Optional[int] = None,
+    max_zip_size: Optional[int] = None
+) -> list[dict]:
+    """Queue every received file of a batch, expanding zip archives
+    
+    Runs in a worker thread: unzipping is blocking file I/O.
+    
+    Args:
+        files: One dict per received file with its filename and either an
+            error, a stored resume (file_path, content_hash) or a zip
+            archive to expand (archive_path)
+        batch_id: Batch the resulting ingestions belong to
+        max_files: Resumes to accept (default: BATCH_MAX_FILES)
+        max_zip_size: Uncompressed bytes per archive (default: ZIP_MAX_TOTAL_SIZE)
+    """
+    max_files = max_files or settings.BATCH_MAX_FILES
+    results = []
+    accepted = 0
+    # Saved files waiting to be recorded, with their slot in `results`
+    pending = []
+    
+    def submit_pending():
+        # One insert per group of files instead of one per file
+        ingestion_ids = ingestion_manager.submit_many([upload for upload, _ in pending])
+        for (upload, index), ingestion_id in zip(pending, ingestion_ids):
+            results[index] = {
+                "filename": upload["filename"],
+                "success": True,
+                "ingestion_id": ingestion_id,
+                "status_url": f"/upload/status/{ingestion_id}"
+            }
+        pending.clear()
+    
+    def accept(filename: str, file_path: str, content_hash: str):
+        nonlocal accepted
+        if accepted >= max_files:
+            results.append({"filename": filename, "success": False, "error": "Batch file limit reached"})
+            return
+        accepted += 1
+        results.append(None)
+        pending.append(({
+            "file_path": file_path,
+            "filename": filename,
+            "content_hash": content_hash,
+            "batch_id": batch_id
+        }, len(results) - 1))
+        # Flushed in groups so a large archive starts processing before it is fully unpacked
+        if len(pending) >= BATCH_SUBMIT_SIZE:
+            submit_pending()
+    
+    for file in files:
+        if file.get("error"):
+            results.append({"filename": file["filename"], "success": False, "error": file["error"]})
+            continue
+        
+        if file.get("archive_path"):
+            with open(file["archive_path"], 'rb') as archive:
+                members = file_handler.save_zip_members(archive, file["filename"], max_files, max_zip_size)
+            for member in members:
+                if member["success"]:
+                    accept(member["filename"], member["file_path"], member["content_hash"])
+                else:
+                    results.append({"filename": member["filename"], "success": False, "error": member["error"]})
+            continue
+        
+        # Each ingestion runs independently on the ingestion pool, so one slow
+        # resume does not hold up the rest of the batch
+        accept(file["filename"], file["file_path"], file["content_hash"])
+    
+    if pending:
+        submit_pending()
+    return results
+
+
+async def _stream_batch_results(batch_id: str, results: list[dict], request: Request):
+    """Yield one NDJSON line per file as soon as its outcome is known"""
+    pending = {r["ingestion_id"]: r["filename"] for r in results if r.get("success")}
+    counts = {"completed": 0, "failed": 0}
+    
+    # Files rejected at upload time are already final
+    for result in results:
+        if not result.get("success"):
+            counts["failed"] += 1
+            yield json.dumps({"type": "result", "status": "rejected", **result}) + "\n"
+    
+    while pending:
+        if await request.is_disconnected():
+            return
+        
+        cursor = mongodb.db.ingestions.find(
+            {"_id": {"$in": list(pending)}, "status": {"$in": list(FINAL_STATUSES)}},
+            {"events": 0}
+        )
+        async for document in cursor:
+            ingestion = serialize_ingestion(document)
+            counts[ingestion["status"]] += 1
+            yield json.dumps({
+                "type": "result",
+                "filename": pending.pop(document["_id"]),
+                "ingestion_id": ingestion["ingestion_id"],
+                "status": ingestion["status"],
+                "result": ingestion["result"],
+                "error": ingestion["error"]
+            }) + "\n"
+        
+        if pending:
+            await asyncio.sleep(settings.INGESTION_EVENTS_POLL_SECONDS)
+    
+    yield json.dumps({"type": "summary", "batch_id": batch_id, "total_files": len(results), **counts}) + "\n"
+
+
+def _batch_response(batch_id: str, results: list[dict], request: Request, stream: bool):
+    if stream:
+        return StreamingResponse(
+            _stream_batch_results(batch_id, results, request),
+            media_type="application/x-ndjson",
+            headers={"X-Accel-Buffering": "no"}
+        )
+    
+    return JSONResponse(status_code=202, content={
+        "batch_id": batch_id,
+        "total_files": len(results),
+        "accepted": len([r for r in results if r.get("success")]),
+        "rejected": len([r for r in results if not r.get("success")]),
+        "results": results
+    })
+
+
+@router.post("/resume/batch", openapi_extra=BATCH_UPLOAD_OPENAPI)
+async def upload_resumes_batch(request: Request, stream: bool = False):
     """Upload multiple resumes in batch
     
+    Every file is streamed to disk as it arrives and checked on the way, so
+    an oversized or mistyped file is rejected without the request being
+    buffered first. Files are processed concurrently on the ingestion pool.
+    Zip archives are expanded and each resume inside is processed as its
+    own file.
+    
     Args:
-        files: List of resume files
+        files: Resume files and/or zip archives, sent as multipart form field "files"
+        stream: Keep the connection open and stream one NDJSON line per file
+            as it finishes, followed by a summary line
         
     Returns:
-        Batch processing results
+        Ingestion ID for every accepted file, or an NDJSON stream of results
     """
     try:
-        results = []
-        
-        for file in files:
-            try:
-                # Validate and save each file
-                file_ext = os.path.splitext(file.filename)[1].lower()
-                
-                if file_ext not in ['.pdf', '.docx', '.doc']:
-                    results.append({
-                        "filename": file.filename,
-                        "success": False,
-                        "error": "Invalid file type"
-                    })
-                    continue
-                
-                # Save file
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                safe_filename = f"{timestamp}_{file.filename}"
-                file_path = os.path.join(settings.UPLOAD_DIR, safe_filename)
-                
-                with open(file_path, "wb") as buffer:
-                    shutil.copyfileobj(file.file, buffer)
-                
-                # Process
-                result = orchestrator.process_candidate_application(file_path)
-                
-                results.append({
-                    "filename": file.filename,
-                    "success": result.get("success", False),
-                    "candidate_email": result.get("candidate_email", ""),
-                    "candidate_name": result.get("candidate_name", ""),
-                    "overall_score": result.get("overall_score", 0)
-                })
-                
-            except Exception as e:
-                log.error(f"Error processing {file.filename}: {e}")
-                results.append({
-                    "filename": file.filename,
-                    "success": False,
-                    "error": str(e)
-                })
-        
-        return JSONResponse(content={
-            "total_files": len(files),
-            "successful": len([r for r in results if r.get("success")]),
-            "failed": len([r for r in results if not r.get("success")]),
-            "results": results
-        })
+        try:
+            files = await receive_batch_upload(request)
+        except UploadRejected as rejected:
+            raise HTTPException(status_code=rejected.status_code, detail=rejected.detail)
+        
+        batch_id = str(ObjectId())
+        try:
+            results = await run_in_threadpool(_accept_batch_files, files, batch_id)
+        finally:
+            for file in files:
+                if file.get("archive_path"):
+                    await run_in_threadpool(file_handler.delete_file, file["archive_path"])
         
+        return _batch_response(batch_id, results, request, stream)
+        
+    except HTTPException:
+        raise
     except Exception as e:
         log.error(f"Batch upload error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class ResumableUploadCreate(BaseModel):
+    filename: str
+    size: int
+
+
+def _upload_rejected(rejected: UploadRejected) -> HTTPException:
+    return HTTPException(status_code=rejected.status_code, detail=rejected.detail, headers=rejected.headers)
+
+
+def _parse_content_range(header: Optional[str]) -> tuple[int, int, int]:
+    match = CONTENT_RANGE_PATTERN.fullmatch((header or "").strip())
+    if not match:
+        raise HTTPException(status_code=400, detail="Content-Range header must look like 'bytes start-end/total'")
+    return int(match.group(1)), int(match.group(2)), int(match.group(3))
+
+
+def _accept_assembled_upload(part_path: str, filename: str, batch_id: str) -> list[dict]:
+    """Ingest a fully received resumable upload as a one-file batch
+    
+    Resumable archives are far larger than form uploads, so they get their
+    own file and size limits instead of the batch ones.
+    """
+    file_ext = os.path.splitext(filename)[1].lower()
+    if file_ext == '.zip':
+        received = {"filename": filename, "archive_path": part_path}
+    elif file_ext not in file_handler.ALLOWED_EXTENSIONS:
+        received = {"filename": filename, "error": "Invalid file type"}
+    else:
+        with open(part_path, 'rb') as file_obj:
+            _, file_path, content_hash, error = file_handler.save_stream_hashed(file_obj, filename)
+        received = {"filename": filename, "file_path": file_path, "content_hash": content_hash, "error": error}
+    
+    return _accept_batch_files(
+        [received],
+        batch_id,
+        max_files=settings.RESUMABLE_MAX_FILES,
+        max_zip_size=settings.RESUMABLE_ZIP_MAX_TOTAL_SIZE
+    )
+
+
+@router.post("/resumable", status_code=201)
+async def create_resumable_upload(upload: ResumableUploadCreate):
+    """Start a resumable upload
+    
+    Send the file afterwards with PUT requests carrying
+    ``Content-Range: bytes start-end/total``, in order, then finalise it.
+    After a dropped connection, HEAD the upload to get the offset to resume
+    from.
+    
+    Args:
+        upload: Filename (a zip archive or a single resume) and total size in bytes
+        
+    Returns:
+        Upload ID and the chunk size limit
+    """
+    try:
+        session = await resumable_uploads.create(upload.filename, upload.size)
+        upload_url = f"/upload/resumable/{session['_id']}"
+        
+        return JSONResponse(
+            status_code=201,
+            headers={"Location": upload_url, "Upload-Offset": "0"},
+            content={
+                "success": True,
+                "upload": serialize_session(session),
+                "upload_url": upload_url,
+                "max_chunk_size": settings.RESUMABLE_MAX_CHUNK_SIZE
+            }
+        )
+        
+    except UploadRejected as rejected:
+        raise _upload_rejected(rejected)
+    except Exception as e:
+        log.error(f"Error creating resumable upload: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.head("/resumable/{upload_id}")
+async def get_resumable_upload_offset(upload_id: str):
+    """Get the offset to resume an upload from, in the Upload-Offset header"""
+    session = await resumable_uploads.get(upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    return Response(headers={
+        "Upload-Offset": str(session["offset"]),
+        "Upload-Length": str(session["size"]),
+        "Cache-Control": "no-store"
+    })
+
+
+@router.get("/resumable/{upload_id}")
+async def get_resumable_upload(upload_id: str):
+    """Get the state of a resumable upload
+    
+    Args:
+        upload_id: ID returned when the upload was created
+        
+    Returns:
+        Offset, size and status, plus the ingestion results once finalised
+    """
+    try:
+        session = await resumable_uploads.get(upload_id)
+        
+        if not session:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        
+        return {
+            "success": True,
+            "upload": serialize_session(session),
+            "results": session.get("results")
+        }
+        
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        log.error(f"Error fetching resumable upload: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.put("/resumable/{upload_id}")
+async def upload_resumable_chunk(upload_id: str, request: Request):
+    """Write one byte range of a resumable upload
+    
+    The range must start at the current offset. If the connection drops
+    mid-chunk, the bytes that arrived are kept; HEAD the upload and send the
+    rest from the returned offset.
+    
+    Args:
+        upload_id: ID returned when the upload was created
+        
+    Returns:
+        The new offset, also sent in the Upload-Offset header
+    """
+    try:
+        start, end, total = _parse_content_range(request.headers.get("content-range"))
+        session = await resumable_uploads.write_chunk(upload_id, start, end, total, request.stream())
+        
+        return JSONResponse(
+            headers={"Upload-Offset": str(session["offset"])},
+            content={
+                "success": True,
+                "upload": serialize_session(session),
+                "complete": session["offset"] == session["size"]
+            }
+        )
+        
+    except UploadRejected as rejected:
+        raise _upload_rejected(rejected)
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        log.error(f"Resumable chunk error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/resumable/{upload_id}/complete")
+async def complete_resumable_upload(upload_id: str, request: Request, stream: bool = False):
+    """Finalise a resumable upload and queue its resumes
+    
+    Zip archives are expanded like batch uploads. Calling this again on a
+    finalised upload returns the same ingestions.
+    
+    Args:
+        upload_id: ID returned when the upload was created
+        stream: Stream one NDJSON line per resume as it finishes
+        
+    Returns:
+        Ingestion ID for every accepted resume, or an NDJSON stream of results
+    """
+    try:
+        session = await resumable_uploads.begin_completion(upload_id)
+        
+        if session["status"] == "completed":
+            return _batch_response(session["batch_id"], session["results"], request, stream)
+        
+        batch_id = upload_id
+        try:
+            results = await run_in_threadpool(
+                _accept_assembled_upload,
+                session["part_path"],
+                session["filename"],
+                batch_id
+            )
+        except Exception:
+            await resumable_uploads.abort_completion(upload_id)
+            raise
+        
+        await resumable_uploads.mark_completed(upload_id, batch_id, results)
+        log.info(f"Resumable upload {upload_id} finalised: {len(results)} file(s)")
+        
+        return _batch_response(batch_id, results, request, stream)
+        
+    except UploadRejected as rejected:
+        raise _upload_rejected(rejected)
+    except Exception as e:
+        log.error(f"Error finalising resumable upload: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.delete("/resumable/{upload_id}")
+async def delete_resumable_upload(upload_id: str):
+    """Abandon a resumable upload and delete the bytes received so far"""
+    try:
+        if not await resumable_uploads.discard(upload_id):
+            raise HTTPException(status_code=404, detail="Upload not found or being finalised")
+        
+        return {"success": True, "message": "Upload deleted"}
+        
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        log.error(f"Error deleting resumable upload: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/status/{ingestion_id}")
+async def get_ingestion_status(ingestion_id: str):
+    """Get the status and step events of a resume ingestion
+    
+    Args:
+        ingestion_id: ID returned by the upload endpoint
+        
+    Returns:
+        Ingestion status, step events and, once finished, the result
+    """
+    try:
+        ingestion = await mongodb.db.ingestions.find_one({"_id": ingestion_id})
+        
+        if not ingestion:
+            raise HTTPException(status_code=404, detail="Ingestion not found")
+        
+        return {"success": True, "ingestion": serialize_ingestion(ingestion)}
+        
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        log.error(f"Error fetching ingestion status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/status/{ingestion_id}/events")
+async def stream_ingestion_events(ingestion_id: str, request: Request):
+    """Stream step events of a resume ingestion as server-sent events
+    
+    Each step event is sent as a ``step`` event. A final ``status`` event
+    carries the result once the ingestion completes or fails, and the stream
+    then closes.
+    
+    Args:
+        ingestion_id: ID returned by the upload endpoint
+    """
+    ingestion = await mongodb.db.ingestions.find_one({"_id": ingestion_id}, {"_id": 1})
+    if not ingestion:
+        raise HTTPException(status_code=404, detail="Ingestion not found")
+    
+    async def event_stream():
+        sent = 0
+        while True:
+            if await request.is_disconnected():
+                break
+            
+            document = await mongodb.db.ingestions.find_one({"_id": ingestion_id})
+            if not document:
+                break
+            
+            ingestion = serialize_ingestion(document)
+            for event in ingestion["events"][sent:]:
+                yield f"event: step\ndata: {json.dumps(event)}\n\n"
+            sent = len(ingestion["events"])
+            
+            if ingestion["status"] in FINAL_STATUSES:
+                final = {key: ingestion[key] for key in ("ingestion_id", "status", "result", "error")}
+                yield f"event: status\ndata: {json.dumps(final)}\n\n"
+                break
+            
+            await asyncio.sleep(settings.INGESTION_EVENTS_POLL_SECONDS)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
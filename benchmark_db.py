@@ -0,0 +1,149 @@
+# benchmark_db.py
+"""
+Concurrent request throughput of route data access, sync vs async
+
+Simulates API requests (a candidate lookup by email plus a page of the
+candidate list) with many requests in flight on one event loop:
+
+- sync:  database_tool._run called from the async handler, as the routes
+         did before the repositories - every query blocks the loop
+- async: the motor repositories in database/repositories.py
+
+A heartbeat task records event loop lag while the requests run. Results go
+to a separate benchmark database, seeded with synthetic candidates on
+first use.
+
+Usage:
+    python benchmark_db.py --requests 1000 --concurrency 50
+    python benchmark_db.py --drop   # remove the benchmark database
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime
+
+from config.settings import settings
+from database.mongodb_client import mongodb, mongodb_sync
+from database.repositories import candidate_repository
+from tools.database_tool import database_tool
+
+
+def seed(count: int):
+    """Insert synthetic candidates if the benchmark database is short of them"""
+    collection = mongodb_sync.get_collection("candidates")
+    existing = collection.count_documents({})
+    if existing >= count:
+        return
+
+    collection.create_index("email", unique=True)
+    now = datetime.utcnow()
+    collection.insert_many([
+        {
+            "email": f"bench{i}@example.com",
+            "name": f"Bench Candidate {i}",
+            "skills": random.sample(["python", "sql", "aws", "react", "docker", "java", "go"], 3),
+            "experience_years": random.randint(0, 15),
+            "resume_text": "lorem ipsum " * 200,
+            "status": random.choice(["pending", "shortlisted", "rejected"]),
+            "score": round(random.uniform(0, 100), 2),
+            "uploaded_at": now
+        }
+        for i in range(existing, count)
+    ])
+    print(f"Seeded {count - existing} candidates")
+
+
+async def sync_request(email: str):
+    database_tool._run(action="find_one", collection="candidates", query={"email": email})
+    database_tool._run(action="find", collection="candidates", query={"status": "pending"})
+
+
+async def async_request(email: str):
+    await candidate_repository.get_by_email(email)
+    await candidate_repository.list(status="pending", limit=100)
+
+
+async def heartbeat(lags: list, stop: asyncio.Event, interval: float = 0.01):
+    """Measure how late the loop wakes up a task that sleeps for `interval`"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def run(mode: str, handler, emails: list, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    lags = []
+    stop = asyncio.Event()
+
+    async def one(email: str):
+        async with semaphore:
+            started = time.perf_counter()
+            await handler(email)
+            latencies.append(time.perf_counter() - started)
+
+    monitor = asyncio.create_task(heartbeat(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(email) for email in emails))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "requests": len(emails),
+        "seconds": elapsed,
+        "rps": len(emails) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "max_loop_lag_ms": max(lags, default=0.0) * 1000
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async data access under concurrency")
+    parser.add_argument("--requests", type=int, default=1000, help="Simulated requests per mode")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once")
+    parser.add_argument("--candidates", type=int, default=5000, help="Candidates in the benchmark database")
+    parser.add_argument("--db", default=f"{settings.MONGODB_DB_NAME}_benchmark", help="Benchmark database name")
+    parser.add_argument("--drop", action="store_true", help="Drop the benchmark database and exit")
+    args = parser.parse_args()
+
+    mongodb_sync.db = mongodb_sync.client[args.db]
+    if args.drop:
+        mongodb_sync.client.drop_database(args.db)
+        print(f"Dropped {args.db}")
+        return
+
+    # Indexes are created in the benchmark database, never the live one
+    await mongodb.connect(args.db)
+    seed(args.candidates)
+
+    emails = [f"bench{random.randrange(args.candidates)}@example.com" for _ in range(args.requests)]
+
+    # Warm up connection pools so neither mode pays for connecting
+    await run("warmup", async_request, emails[:args.concurrency], args.concurrency)
+    await run("warmup", sync_request, emails[:args.concurrency], args.concurrency)
+
+    results = [
+        await run("sync", sync_request, emails, args.concurrency),
+        await run("async", async_request, emails, args.concurrency)
+    ]
+
+    print(f"\n{args.requests} requests, {args.concurrency} in flight\n")
+    print(f"{'mode':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'loop lag ms':>14}")
+    for result in results:
+        print(
+            f"{result['mode']:<8}{result['rps']:>10.1f}{result['p50_ms']:>10.1f}"
+            f"{result['p95_ms']:>10.1f}{result['max_loop_lag_ms']:>14.1f}"
+        )
+
+    await mongodb.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -110,6 +110,73 @@ class Settings(BaseSettings):
     FAISS_INDEX_PATH: str = "./data/faiss_index"
     UPLOAD_DIR: str = "./uploads"
     
+    # --- Resume Text Extraction ---
+    EXTRACTION_WORKERS: int = 0  # Worker processes; 0 uses one per CPU core
+    EXTRACTION_TIMEOUT_SECONDS: int = 30  # Wall-clock budget per file
+    EXTRACTION_CPU_SECONDS: int = 20  # CPU budget per file
+    EXTRACTION_MAX_PAGES: int = 20  # PDF pages read per file
+    PDF_EXTRACTION_ENGINE: str = "pypdf2"  # pypdf2 or pdfplumber
+    PDF_FALLBACK_ENGINE: Optional[str] = "pdfplumber"  # Tried when the primary engine fails; empty to disable
+    
+    # --- Ingestion ---
+    INGESTION_WORKERS: int = 4  # Resumes in the LLM pipeline at once; text extraction runs ahead on the extraction pool
+    INGESTION_EVENTS_POLL_SECONDS: float = 1.0  # How often the SSE stream checks for new events
+    
+    # --- Batch Uploads ---
+    LLM_MAX_CONCURRENCY: int = 8  # In-flight LLM requests per process, across all pipelines
+    BATCH_MAX_FILES: int = 500  # Resumes accepted in one batch, zip members included
+    BATCH_MAX_REQUEST_SIZE: int = 524288000  # 500MB per batch request, archives included
+    ZIP_MAX_TOTAL_SIZE: int = 209715200  # 200MB uncompressed per archive
+    ZIP_MAX_COMPRESSION_RATIO: int = 100  # Reject members that inflate more than this
+    
+    # --- Resumable Uploads ---
+    RESUMABLE_MAX_UPLOAD_SIZE: int = 1073741824  # 1GB per resumable upload
+    RESUMABLE_MAX_CHUNK_SIZE: int = 16777216  # 16MB per PUT
+    RESUMABLE_SESSION_TTL_HOURS: int = 24  # Idle time before an unfinished upload is discarded
+    RESUMABLE_WRITE_LEASE_SECONDS: int = 300  # How long one PUT may hold an upload before another can resume it
+    RESUMABLE_COMPLETION_LEASE_SECONDS: int = 1800  # How long finalising may take before another request can retry it
+    RESUMABLE_MAX_FILES: int = 20000  # Resumes accepted from one resumable archive
+    RESUMABLE_ZIP_MAX_TOTAL_SIZE: int = 4294967296  # 4GB uncompressed per resumable archive
+    
+    # --- Pipeline Steps ---
+    DAG_MAX_WORKERS: int = 16  # Threads shared by concurrently running workflow steps
+    PIPELINE_STEP_TIMEOUT_SECONDS: int = 120  # Confirmation, bias scan and decision
+    PIPELINE_MATCH_TIMEOUT_SECONDS: int = 300  # LLM matching across all jobs
+    
+    # --- Task Queue ---
+    USE_TASK_QUEUE: bool = False  # Run the pipeline through worker.py processes instead of the API's pool
+    TASK_VISIBILITY_TIMEOUT_SECONDS: int = 300  # Lease length before another worker may take a task
+    TASK_MAX_ATTEMPTS: int = 5  # Attempts before a task is dead-lettered
+    TASK_RETRY_BACKOFF_SECONDS: int = 10  # First retry delay, doubled on each attempt
+    TASK_POLL_INTERVAL_SECONDS: float = 1.0  # Idle wait between lease attempts
+    TASK_WORKER_CONCURRENCY: int = 4  # Tasks run at once per worker process
+    
+    # --- Compliance Logging ---
+    LOG_SINK_BATCH_SIZE: int = 100  # Buffered log entries that trigger a bulk insert
+    LOG_SINK_FLUSH_INTERVAL_SECONDS: float = 1.0  # Longest an entry waits in the buffer
+    LOG_SINK_MAX_BUFFER: int = 10000  # Beyond this, callers write their entries directly
+    
+    # --- Bias Scanning ---
+    BIAS_SCAN_BATCH_SIZE: int = 8  # Resume excerpts packed into one LLM call
+    BIAS_SCAN_EXCERPT_CHARS: int = 1000  # Resume characters scanned per candidate
+    BIAS_SCAN_LINGER_SECONDS: float = 2.0  # How long a partial batch waits for more candidates
+    BIAS_PRESCREEN_ENABLED: bool = True  # Only send resumes with local marker hits to the LLM
+    
+    # --- Matching ---
+    MATCH_CHUNK_SIZE: int = 10  # Jobs scored per LLM call
+    MATCH_CONCURRENCY: int = 8  # Chunks scored in parallel
+    MATCH_CHUNK_RETRIES: int = 2  # Extra attempts for a chunk with bad output
+    JOB_LEADERBOARD_SIZE: int = 100  # Top candidates precomputed per job
+    JOB_CATALOGUE_POLL_SECONDS: float = 5.0  # How often cached jobs are checked against other processes' changes
+    
+    # --- Search ---
+    HYBRID_SEARCH_POOL_SIZE: int = 200  # Candidates pulled from each index before fusion
+    HYBRID_SEARCH_RRF_K: int = 60  # Reciprocal-rank fusion damping constant
+    
+    # --- Dashboard ---
+    STATS_CACHE_TTL_SECONDS: float = 5.0  # How long /stats serves counts from memory
+    ROLLUP_MAX_DAYS_PER_REQUEST: int = 31  # Days a report rolls up itself; a longer backlog is caught up at startup
+    
     # --- Other ---
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB
     
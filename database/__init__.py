@@ -1,4 +1,5 @@
 from database.mongodb_client import mongodb, mongodb_sync
 from database.vector_store import vector_store
+from database.keyword_index import keyword_index
 
-__all__ = ['mongodb', 'mongodb_sync', 'vector_store']
\ No newline at end of file
+__all__ = ['mongodb', 'mongodb_sync', 'vector_store', 'keyword_index']
\ No newline at end of file
@@ -0,0 +1,107 @@
+# Compliance report aggregation
+"""
+Counts of compliance scans per scan type and risk level over a time range
+
+Counting happens in Mongo: a ``$match`` on ``timestamp`` followed by a
+``$group`` on (scan_type, risk_level), both served by the
+(timestamp, scan_type, risk_level) index on ``compliance_logs``.
+
+Whole days are read from ``compliance_daily`` instead, one rollup document
+per UTC day holding that day's counts, built behind a watermark by
+database/daily_rollups.py. Only the partial days at either end of a range,
+and the days after the watermark, are counted from the logs themselves, so
+a multi-year report touches a few hundred small documents.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pymongo import ReplaceOne
+from config.settings import settings
+from database.daily_rollups import DailyRollup, split_range
+from database.mongodb_client import mongodb_sync
+
+# {scan_type: {risk_level: count}}
+Counts = Dict[str, Dict[str, int]]
+
+
+def _add(counts: Counts, scan_type: str, risk_level: Optional[str], count: int):
+    counts[scan_type][risk_level or "unknown"] += count
+
+
+class ComplianceReports:
+    """Aggregated compliance counts with daily rollups"""
+
+    def __init__(self):
+        self.rollup = DailyRollup("compliance logs", "compliance_logs", "compliance_daily", self._build_day)
+
+    @property
+    def logs(self):
+        return mongodb_sync.get_collection("compliance_logs")
+
+    @property
+    def daily(self):
+        return mongodb_sync.get_collection("compliance_daily")
+
+    def counts(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Counts:
+        """Scan counts per scan type and risk level
+
+        Args:
+            start: Inclusive lower bound (default: the first log)
+            end: Exclusive upper bound (default: now)
+
+        Returns:
+            Nested dict {scan_type: {risk_level: count}}
+        """
+        now = datetime.utcnow()
+        end = min(end or now, now)
+        watermark = self.rollup.roll_up(now, max_days=settings.ROLLUP_MAX_DAYS_PER_REQUEST, blocking=False)
+
+        counts: Counts = defaultdict(lambda: defaultdict(int))
+        if start is not None and start >= end:
+            return counts
+
+        # Whole days from the rollups, the rest from the logs
+        rollup_range, live_ranges = split_range(start, end, watermark)
+        if rollup_range:
+            self._add_rollups(counts, *rollup_range)
+        for live_start, live_end in live_ranges:
+            self._add_live(counts, live_start, live_end)
+
+        return counts
+
+    def _build_day(self, day: datetime, next_day: datetime) -> List[Any]:
+        """The rollup document of one day, if it has any scans"""
+        counts: Counts = defaultdict(lambda: defaultdict(int))
+        self._add_live(counts, day, next_day)
+        if not counts:
+            return []
+        return [ReplaceOne(
+            {"_id": day},
+            {"_id": day, "counts": {scan_type: dict(levels) for scan_type, levels in counts.items()}},
+            upsert=True
+        )]
+
+    def _add_rollups(self, counts: Counts, first_day: Optional[datetime], last_day: datetime):
+        day_range = {"$lt": last_day}
+        if first_day is not None:
+            day_range["$gte"] = first_day
+        for rollup in self.daily.find({"_id": day_range}):
+            for scan_type, levels in rollup.get("counts", {}).items():
+                for risk_level, count in levels.items():
+                    _add(counts, scan_type, risk_level, count)
+
+    def _add_live(self, counts: Counts, start: Optional[datetime], end: datetime):
+        time_range = {"$lt": end}
+        if start is not None:
+            time_range["$gte"] = start
+        for row in self.logs.aggregate([
+            {"$match": {"timestamp": time_range}},
+            {"$group": {"_id": {"scan_type": "$scan_type", "risk_level": "$risk_level"}, "count": {"$sum": 1}}}
+        ]):
+            # Action log entries have no scan type
+            if row["_id"].get("scan_type"):
+                _add(counts, row["_id"]["scan_type"], row["_id"].get("risk_level"), row["count"])
+
+
+# Global instance
+compliance_reports = ComplianceReports()
@@ -0,0 +1,145 @@
+# Daily rollups behind a watermark
+"""
+Incremental per-day rollups of a timestamped collection
+
+Reports over long ranges read one or a few precomputed documents per UTC
+day instead of the raw entries. A watermark document in the rollup
+collection records the first day not rolled up yet; days are rolled up in
+order once they are ``ROLLUP_GRACE`` old, which leaves time for buffered
+entries (see utils/log_sink.py) to be written. Each day's documents are
+written together with the advanced watermark, so memory holds one day at a
+time and an interrupted run resumes where it stopped.
+
+Reports roll up at most ``ROLLUP_MAX_DAYS_PER_REQUEST`` days themselves and
+never wait for a rollup already running; the backlog of a first run over a
+long history is left to ``catch_up_in_background`` at startup. Days past
+the watermark are read from the source until they are rolled up.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, List, Optional, Tuple
+from pymongo import ASCENDING, ReplaceOne
+from database.mongodb_client import mongodb_sync
+from utils.logger import log
+
+
+ROLLUP_GRACE = timedelta(minutes=10)
+WATERMARK_ID = "watermark"
+
+# (start, end), start None meaning unbounded
+TimeRange = Tuple[Optional[datetime], datetime]
+
+
+def start_of_day(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def split_range(start: Optional[datetime], end: datetime, watermark: datetime) -> Tuple[Optional[TimeRange], List[TimeRange]]:
+    """Split a range into whole rolled-up days and the parts read live
+
+    Args:
+        start: Inclusive lower bound (None: unbounded)
+        end: Exclusive upper bound
+        watermark: Days before it are covered by rollups
+
+    Returns:
+        (first_day, last_day) of the rollups to read, or None, and the
+        (start, end) ranges to read from the source
+    """
+    first_day = None if start is None else start_of_day(start)
+    if first_day is not None and first_day < start:
+        first_day += timedelta(days=1)
+    last_day = min(start_of_day(end), watermark)
+
+    if first_day is not None and first_day >= last_day:
+        return None, [(start, end)]
+
+    live_ranges: List[TimeRange] = []
+    if first_day is not None and start < first_day:
+        live_ranges.append((start, first_day))
+    live_ranges.append((last_day, end))
+    return (first_day, last_day), live_ranges
+
+
+class DailyRollup:
+    """Builds the daily rollups of one source collection"""
+
+    def __init__(self, name: str, source: str, daily: str, build_day: Callable[[datetime, datetime], List[Any]]):
+        """
+        Args:
+            name: Used in log messages and the catch-up thread name
+            source: Collection of entries with a ``timestamp``
+            daily: Collection holding the rollups and the watermark
+            build_day: Returns the write operations (e.g. ReplaceOne) of
+                the rollup documents for the entries in [day, next day)
+        """
+        self.name = name
+        self._source = source
+        self._daily = daily
+        self._build_day = build_day
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def source(self):
+        return mongodb_sync.get_collection(self._source)
+
+    @property
+    def daily(self):
+        return mongodb_sync.get_collection(self._daily)
+
+    def roll_up(self, now: Optional[datetime] = None, max_days: Optional[int] = None, blocking: bool = True) -> datetime:
+        """Build rollups for the days closed since the watermark
+
+        Rebuilding a day replaces its documents, so concurrent calls from
+        other processes are harmless; within a process only one call runs.
+
+        Args:
+            now: Current time (default: utcnow)
+            max_days: Stop after this many days (default: all closed days)
+            blocking: Wait for a rollup already running in this process;
+                otherwise return the watermark it has reached so far
+
+        Returns:
+            The watermark: days before it are covered by rollups
+        """
+        closed = start_of_day((now or datetime.utcnow()) - ROLLUP_GRACE)
+        if not self._lock.acquire(blocking=blocking):
+            return self._watermark(closed)
+
+        try:
+            day = self._watermark(closed)
+            built = 0
+            while day < closed and (max_days is None or built < max_days):
+                next_day = day + timedelta(days=1)
+                operations = list(self._build_day(day, next_day))
+                operations.append(ReplaceOne({"_id": WATERMARK_ID}, {"_id": WATERMARK_ID, "until": next_day}, upsert=True))
+                self.daily.bulk_write(operations, ordered=True)
+                day = next_day
+                built += 1
+
+            if built:
+                log.info(f"Rolled up {self.name} for {built} day(s) up to {day.date()}")
+            return day
+        finally:
+            self._lock.release()
+
+    def catch_up_in_background(self):
+        """Roll up every closed day on a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._catch_up, name=f"{self.name}-rollup", daemon=True)
+        self._thread.start()
+
+    def _catch_up(self):
+        try:
+            self.roll_up()
+        except Exception as e:
+            log.error(f"Failed to roll up {self.name}: {e}")
+
+    def _watermark(self, closed: datetime) -> datetime:
+        state = self.daily.find_one({"_id": WATERMARK_ID})
+        if state:
+            return state["until"]
+        first = self.source.find_one({}, {"timestamp": 1}, sort=[("timestamp", ASCENDING)])
+        return start_of_day(first["timestamp"]) if first and first.get("timestamp") else closed
@@ -0,0 +1,165 @@
+# In-process job catalogue
+"""
+Read-through cache of the job postings
+
+Every upload matches the candidate against the full job list, while jobs
+change rarely. ``job_catalogue`` keeps the list in memory together with
+data derived from it: each job's normalised skill set and, built on first
+use, its embedding.
+
+The job routes call ``invalidate()`` after a create, update or delete. That
+drops this process's copy and bumps a version counter in the
+``cache_versions`` collection; other processes (API workers, ``worker.py``)
+compare the counter at most every ``JOB_CATALOGUE_POLL_SECONDS`` and reload
+when it moved. Code writing to ``jobs`` outside the routes must call
+``invalidate()`` as well.
+"""
+import copy
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+import numpy as np
+from pymongo import ASCENDING
+from config.settings import settings
+from database.mongodb_client import mongodb_sync
+from utils.logger import log
+
+
+VERSION_ID = "jobs"
+
+
+def normalise_skills(skills: Iterable[str]) -> FrozenSet[str]:
+    """Lower-cased, whitespace-collapsed skill names"""
+    return frozenset(" ".join(skill.lower().split()) for skill in skills or [] if skill and skill.strip())
+
+
+def job_search_text(title: str, description: str, required_skills: List[str]) -> str:
+    """Text a job is embedded from"""
+    return f"{title}. {description} Required Skills: {', '.join(required_skills)}"
+
+
+class JobCatalogue:
+    """Cached job postings with normalised skills and embeddings"""
+
+    def __init__(self):
+        self.poll_interval = settings.JOB_CATALOGUE_POLL_SECONDS
+        self._lock = threading.Lock()
+        self._jobs: Optional[List[Dict]] = None
+        self._by_id: Dict[str, Dict] = {}
+        self._skills: Dict[str, FrozenSet[str]] = {}
+        self._embeddings: Optional[Tuple[List[str], np.ndarray]] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        # Bumped by invalidate(), so a load racing it is not trusted
+        self._generation = 0
+
+    @property
+    def collection(self):
+        return mongodb_sync.get_collection("jobs")
+
+    @property
+    def versions(self):
+        return mongodb_sync.get_collection("cache_versions")
+
+    def jobs(self) -> List[Dict]:
+        """All job postings, ordered by job_id"""
+        self._ensure_current()
+        with self._lock:
+            return copy.deepcopy(self._jobs)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """A job posting by job_id, or None"""
+        self._ensure_current()
+        with self._lock:
+            job = self._by_id.get(job_id)
+            return copy.deepcopy(job) if job else None
+
+    def skills(self, job_id: str) -> FrozenSet[str]:
+        """Normalised required skills of a job"""
+        self._ensure_current()
+        with self._lock:
+            return self._skills.get(job_id, frozenset())
+
+    def embeddings(self) -> Tuple[List[str], np.ndarray]:
+        """Job ids and their L2-normalised embeddings, one row per job
+
+        The embeddings are computed once per catalogue version.
+        """
+        self._ensure_current()
+        with self._lock:
+            if self._embeddings is not None:
+                return self._embeddings
+            version, jobs = self._version, self._jobs
+
+        # Loading the model is slow, so only processes that need it pay for it
+        from llm.embeddings import embedding_model
+
+        job_ids = [job["job_id"] for job in jobs]
+        if jobs:
+            vectors = embedding_model.encode_batch([
+                job_search_text(job.get("title", ""), job.get("description", ""), job.get("required_skills", []))
+                for job in jobs
+            ]).astype("float32")
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        else:
+            vectors = np.zeros((0, embedding_model.dimension), dtype="float32")
+
+        with self._lock:
+            # Keep them only if the catalogue was not reloaded meanwhile
+            if self._version == version and self._jobs is jobs:
+                self._embeddings = (job_ids, vectors)
+        return job_ids, vectors
+
+    def invalidate(self):
+        """Drop the cached catalogue here and in every other process"""
+        with self._lock:
+            self._jobs = None
+            self._embeddings = None
+            self._generation += 1
+        try:
+            self.versions.update_one({"_id": VERSION_ID}, {"$inc": {"version": 1}}, upsert=True)
+        except Exception as e:
+            # Other processes catch up when the counter next moves
+            log.error(f"Failed to bump job catalogue version: {e}")
+
+    def _ensure_current(self):
+        """Load the catalogue if it is missing or another process changed it"""
+        with self._lock:
+            loaded = self._jobs is not None
+            if loaded and time.monotonic() - self._checked_at < self.poll_interval:
+                return
+            generation = self._generation
+
+        version = self._read_version()
+        with self._lock:
+            if self._jobs is not None and version == self._version:
+                self._checked_at = time.monotonic()
+                return
+
+        # Read after the version, so a write in between is caught by the next check
+        jobs = list(self.collection.find({}).sort("job_id", ASCENDING))
+        for job in jobs:
+            job["_id"] = str(job["_id"])
+
+        with self._lock:
+            self._jobs = jobs
+            self._by_id = {job["job_id"]: job for job in jobs}
+            self._skills = {job["job_id"]: normalise_skills(job.get("required_skills", [])) for job in jobs}
+            self._embeddings = None
+            if generation == self._generation:
+                self._version = version
+                self._checked_at = time.monotonic()
+            else:
+                # Jobs changed while loading: serve this copy once, then reload
+                self._version = None
+                self._checked_at = 0.0
+        log.info(f"Loaded job catalogue: {len(jobs)} jobs (version {version})")
+
+    def _read_version(self) -> int:
+        document = self.versions.find_one({"_id": VERSION_ID})
+        return (document or {}).get("version", 0)
+
+
+# Global instance
+job_catalogue = JobCatalogue()
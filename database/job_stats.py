@@ -0,0 +1,260 @@
+# Per-job candidate statistics
+"""
+Running statistics of the candidates matched to each job
+
+One ``job_stats`` document per job holds the candidate count, per-status
+counts and, over the scored candidates, the count, sum, sum of squares,
+min and max of their scores (also per status). Every write that changes
+a candidate's score, status or matched jobs passes the candidate as it
+was before and after to ``record_change``, which ``$inc``-s the
+difference into the affected jobs. Mean and variance follow from the
+sums, so audits and dashboards read a single document.
+
+A removed score cannot be taken back out of ``$min`` / ``$max``; when it
+was the current bound the document is flagged and the bounds are
+recomputed on the next read. A document first created by an increment
+may be missing candidates written before it existed, so it is rebuilt
+from the candidates on first read, as is a job without a document.
+
+Every increment also bumps the document's ``version``. A rebuild only
+replaces the document if the version it started from is unchanged, and
+aggregates again otherwise, so an increment landing while the candidates
+are aggregated is not overwritten. (A candidate written just before the
+aggregation whose increment arrives after the replace is still counted
+twice; that window is the gap between a candidate write and its
+``record_change``.)
+"""
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from database.mongodb_client import mongodb, mongodb_sync
+from utils.logger import log
+
+
+# Candidate fields the statistics depend on
+STATS_FIELDS = {"matched_jobs": 1, "score": 1, "status": 1}
+
+# Rebuilds interrupted by concurrent increments before giving up
+REBUILD_ATTEMPTS = 5
+
+
+def _contribution(candidate: Optional[Dict], job_id: str, sign: int, inc: Dict[str, float]):
+    """Add (sign=1) or remove (sign=-1) a candidate's share of a job's sums"""
+    if not candidate or job_id not in (candidate.get("matched_jobs") or []):
+        return
+    status = candidate.get("status") or "unknown"
+    inc["count"] += sign
+    inc[f"status_counts.{status}"] += sign
+
+    score = candidate.get("score")
+    if score is None:
+        return
+    inc["score_count"] += sign
+    inc["score_sum"] += sign * score
+    inc["score_sq_sum"] += sign * score * score
+    inc[f"status_scores.{status}.count"] += sign
+    inc[f"status_scores.{status}.sum"] += sign * score
+
+
+def stats_updates(before: Optional[Dict], after: Optional[Dict]) -> List[UpdateOne]:
+    """Updates moving job statistics from a candidate's old state to its new one
+
+    Args:
+        before: Candidate before the write (None if it was created)
+        after: Candidate after the write (None if it was deleted)
+
+    Returns:
+        Operations for one bulk_write on ``job_stats``
+    """
+    job_ids = set((before or {}).get("matched_jobs") or []) | set((after or {}).get("matched_jobs") or [])
+    now = datetime.utcnow()
+    operations = []
+
+    for job_id in sorted(job_ids):
+        inc: Dict[str, float] = defaultdict(int)
+        _contribution(before, job_id, -1, inc)
+        _contribution(after, job_id, 1, inc)
+        inc = {field: value for field, value in inc.items() if value}
+
+        new_score = after.get("score") if after and job_id in (after.get("matched_jobs") or []) else None
+        old_score = before.get("score") if before and job_id in (before.get("matched_jobs") or []) else None
+        if not inc and new_score == old_score:
+            continue
+
+        update: Dict[str, Any] = {
+            "$set": {"updated_at": now},
+            # May be missing earlier candidates; rebuilt on first read
+            "$setOnInsert": {"complete": False}
+        }
+        update["$inc"] = {**inc, "version": 1}
+        if new_score is not None:
+            update["$min"] = {"score_min": new_score}
+            update["$max"] = {"score_max": new_score}
+        operations.append(UpdateOne({"_id": job_id}, update, upsert=True))
+
+        if old_score is not None and old_score != new_score:
+            # The removed score may have been a bound
+            operations.append(UpdateOne(
+                {"_id": job_id, "$or": [{"score_min": old_score}, {"score_max": old_score}]},
+                {"$set": {"bounds_stale": True}}
+            ))
+
+    return operations
+
+
+def summarize(document: Dict) -> Dict[str, Any]:
+    """Derived statistics of a ``job_stats`` document"""
+    scored = document.get("score_count", 0)
+    mean = document.get("score_sum", 0) / scored if scored else 0.0
+    # Population variance; clamped since float sums can dip just below zero
+    variance = max(document.get("score_sq_sum", 0) / scored - mean * mean, 0.0) if scored else 0.0
+
+    status_means = {
+        status: values["sum"] / values["count"]
+        for status, values in document.get("status_scores", {}).items()
+        if values.get("count")
+    }
+    return {
+        "job_id": document["_id"],
+        "total_candidates": document.get("count", 0),
+        "scored_candidates": scored,
+        "status_counts": {status: n for status, n in document.get("status_counts", {}).items() if n},
+        "average_score": mean,
+        "score_variance": variance,
+        "score_stddev": math.sqrt(variance),
+        "score_min": document.get("score_min") if scored else None,
+        "score_max": document.get("score_max") if scored else None,
+        "status_average_scores": status_means,
+        "updated_at": document.get("updated_at")
+    }
+
+
+class JobStats:
+    """Maintains the ``job_stats`` collection"""
+
+    @property
+    def collection(self):
+        return mongodb_sync.get_collection("job_stats")
+
+    @property
+    def candidates(self):
+        return mongodb_sync.get_collection("candidates")
+
+    def record_change(self, before: Optional[Dict], after: Optional[Dict]):
+        """Apply one candidate write to the statistics of its jobs"""
+        operations = stats_updates(before, after)
+        if not operations:
+            return
+        try:
+            self.collection.bulk_write(operations, ordered=True)
+        except Exception as e:
+            log.error(f"Failed to update job statistics: {e}")
+
+    async def record_change_async(self, before: Optional[Dict], after: Optional[Dict]):
+        """record_change() over the motor client, for request handlers"""
+        operations = stats_updates(before, after)
+        if not operations:
+            return
+        try:
+            await mongodb.get_collection("job_stats").bulk_write(operations, ordered=True)
+        except Exception as e:
+            log.error(f"Failed to update job statistics: {e}")
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        """Statistics of the candidates matched to a job
+
+        Returns:
+            Summary with counts, average, variance, standard deviation,
+            min/max score and per-status counts and averages
+        """
+        document = self.collection.find_one({"_id": job_id})
+        if not document or not document.get("complete", True):
+            document = self.rebuild(job_id)
+        elif document.get("bounds_stale"):
+            document = self._refresh_bounds(job_id)
+        return summarize(document)
+
+    def rebuild(self, job_id: str) -> Dict:
+        """Recompute a job's statistics from its candidates
+
+        The result is stored only if no increment reached the document while
+        the candidates were aggregated; otherwise the aggregation is retried.
+        """
+        for _ in range(REBUILD_ATTEMPTS):
+            current = self.collection.find_one({"_id": job_id}, {"version": 1})
+            version = current.get("version") if current else None
+            document = self._aggregate(job_id)
+            document["version"] = (version or 0) + 1
+
+            try:
+                if current is None:
+                    self.collection.insert_one(document)
+                    return document
+                if self.collection.replace_one({"_id": job_id, "version": version}, document).matched_count:
+                    return document
+            except DuplicateKeyError:
+                # Created by an increment meanwhile
+                pass
+
+        log.warning(f"Job statistics for {job_id} kept changing during rebuild; serving an unsaved copy")
+        return document
+
+    def _aggregate(self, job_id: str) -> Dict:
+        document: Dict[str, Any] = {
+            "_id": job_id,
+            "count": 0,
+            "score_count": 0,
+            "score_sum": 0,
+            "score_sq_sum": 0,
+            "status_counts": {},
+            "status_scores": {},
+            "complete": True,
+            "updated_at": datetime.utcnow()
+        }
+        for row in self.candidates.aggregate([
+            {"$match": {"matched_jobs": job_id}},
+            {"$project": {
+                "status": {"$ifNull": ["$status", "unknown"]},
+                "score": 1,
+                "scored": {"$cond": [{"$eq": [{"$ifNull": ["$score", None]}, None]}, 0, 1]}
+            }},
+            {"$group": {
+                "_id": "$status",
+                "count": {"$sum": 1},
+                "score_count": {"$sum": "$scored"},
+                "score_sum": {"$sum": "$score"},
+                "score_sq_sum": {"$sum": {"$multiply": [{"$ifNull": ["$score", 0]}, {"$ifNull": ["$score", 0]}]}},
+                "score_min": {"$min": "$score"},
+                "score_max": {"$max": "$score"}
+            }}
+        ]):
+            status = row["_id"]
+            document["count"] += row["count"]
+            document["status_counts"][status] = row["count"]
+            if row["score_count"]:
+                document["score_count"] += row["score_count"]
+                document["score_sum"] += row["score_sum"]
+                document["score_sq_sum"] += row["score_sq_sum"]
+                document["status_scores"][status] = {"count": row["score_count"], "sum": row["score_sum"]}
+                for bound, pick in (("score_min", min), ("score_max", max)):
+                    current = document.get(bound)
+                    document[bound] = row[bound] if current is None else pick(current, row[bound])
+
+        return document
+
+    def _refresh_bounds(self, job_id: str) -> Dict:
+        bounds = list(self.candidates.aggregate([
+            {"$match": {"matched_jobs": job_id, "score": {"$ne": None}}},
+            {"$group": {"_id": None, "score_min": {"$min": "$score"}, "score_max": {"$max": "$score"}}}
+        ]))
+        update: Dict[str, Any] = {"$unset": {"bounds_stale": ""}}
+        if bounds:
+            update["$set"] = {"score_min": bounds[0]["score_min"], "score_max": bounds[0]["score_max"]}
+        return self.collection.find_one_and_update({"_id": job_id}, update, return_document=ReturnDocument.AFTER)
+
+
+# Global instance
+job_stats = JobStats()
@@ -0,0 +1,286 @@
+# Keyword index (BM25)
+import math
+import os
+import pickle
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from config.settings import settings
+from database.vector_store import write_atomically
+from utils.logger import log
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into BM25 terms
+
+    Keeps characters such as '+', '#', '.' and '-' inside a token so that
+    terms like "c++", "c#", "node.js" or "ci-cd" survive tokenization.
+    """
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def candidate_search_text(resume_text: str, skills: List[str]) -> str:
+    """Text a candidate is indexed under, in both the keyword and vector indexes"""
+    return f"{resume_text} Skills: {', '.join(skills or [])}"
+
+
+class KeywordIndex:
+    """Incremental BM25 index over candidate resume text"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.index_path = os.path.join(settings.VECTOR_STORE_PATH, "bm25_index.pkl")
+        self._lock = threading.Lock()
+
+        self.doc_terms: Dict[str, Counter] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.doc_freq: Counter = Counter()
+        self.postings: Dict[str, set] = {}
+        self.total_length = 0
+        self._loaded_mtime = None
+
+        self._initialize_index()
+
+    def _initialize_index(self):
+        """Load the index from disk if it exists"""
+        if os.path.exists(self.index_path):
+            self.load_index()
+        else:
+            log.info("Created new BM25 keyword index")
+
+    def add_document(self, doc_id: str, text: str):
+        """Add or replace a document in the index
+
+        Args:
+            doc_id: Candidate ID
+            text: Full resume text
+        """
+        terms = Counter(tokenize(text))
+
+        with self._lock:
+            self._remove_locked(doc_id)
+
+            self.doc_terms[doc_id] = terms
+            self.doc_lengths[doc_id] = sum(terms.values())
+            self.total_length += self.doc_lengths[doc_id]
+
+            for term in terms:
+                self.doc_freq[term] += 1
+                self.postings.setdefault(term, set()).add(doc_id)
+
+        log.info(f"Indexed document {doc_id} in BM25 index. Total: {len(self.doc_terms)}")
+
+    def rebuild(self, documents: Iterable[Tuple[str, str]]) -> int:
+        """Replace the whole index with the given documents
+
+        The new index is built aside and swapped in, so searches keep using
+        the old one meanwhile.
+
+        Args:
+            documents: (doc_id, text) pairs
+
+        Returns:
+            Number of documents indexed
+        """
+        doc_terms: Dict[str, Counter] = {}
+        doc_lengths: Dict[str, int] = {}
+        doc_freq: Counter = Counter()
+        postings: Dict[str, set] = {}
+        for doc_id, text in documents:
+            terms = Counter(tokenize(text))
+            doc_terms[doc_id] = terms
+            doc_lengths[doc_id] = sum(terms.values())
+            for term in terms:
+                doc_freq[term] += 1
+                postings.setdefault(term, set()).add(doc_id)
+
+        with self._lock:
+            self.doc_terms = doc_terms
+            self.doc_lengths = doc_lengths
+            self.doc_freq = doc_freq
+            self.postings = postings
+            self.total_length = sum(doc_lengths.values())
+
+        log.info(f"Rebuilt BM25 index with {len(doc_terms)} documents")
+        return len(doc_terms)
+
+    def rebuild_from_candidates(self) -> int:
+        """Rebuild the index from every candidate in the database and save it
+
+        Returns:
+            Number of candidates indexed
+        """
+        from database.mongodb_client import mongodb_sync
+
+        candidates = mongodb_sync.get_collection("candidates").find(
+            {"resume_text": {"$nin": [None, ""]}},
+            {"resume_text": 1, "skills": 1}
+        )
+        count = self.rebuild(
+            (str(candidate["_id"]), candidate_search_text(candidate["resume_text"], candidate.get("skills", [])))
+            for candidate in candidates
+        )
+        self.save_index()
+        return count
+
+    def ensure_built(self) -> int:
+        """Build the index from the database if it has never been saved
+
+        Candidates indexed before keyword search existed are otherwise
+        missing from it.
+
+        Returns:
+            Number of candidates indexed, 0 if the index already existed
+        """
+        if os.path.exists(self.index_path):
+            return 0
+        return self.rebuild_from_candidates()
+
+    def remove_document(self, doc_id: str) -> bool:
+        """Remove a document from the index
+
+        Args:
+            doc_id: Candidate ID
+
+        Returns:
+            True if the document was indexed
+        """
+        with self._lock:
+            removed = self._remove_locked(doc_id)
+
+        if removed:
+            log.info(f"Removed document {doc_id} from BM25 index")
+        return removed
+
+    def _remove_locked(self, doc_id: str) -> bool:
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+
+        self.total_length -= self.doc_lengths.pop(doc_id, 0)
+
+        for term in terms:
+            self.doc_freq[term] -= 1
+            if self.doc_freq[term] <= 0:
+                del self.doc_freq[term]
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.discard(doc_id)
+                if not docs:
+                    del self.postings[term]
+
+        return True
+
+    def search(self, query: str, k: int = 10, doc_ids: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """Score documents against a query with BM25
+
+        Args:
+            query: Free-text query
+            k: Number of results to return
+            doc_ids: Only score these documents (default: all)
+
+        Returns:
+            List of (doc_id, score) tuples, best first
+        """
+        query_terms = set(tokenize(query))
+
+        with self._lock:
+            n_docs = len(self.doc_terms)
+            if n_docs == 0 or not query_terms:
+                return []
+
+            avg_length = self.total_length / n_docs
+            scores: Dict[str, float] = {}
+
+            for term in query_terms:
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+
+                df = self.doc_freq[term]
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+                for doc_id in docs:
+                    if doc_ids is not None and doc_id not in doc_ids:
+                        continue
+                    tf = self.doc_terms[doc_id][term]
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:k]
+
+    def save_index(self):
+        """Save index to disk"""
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+
+            with self._lock:
+                payload = {
+                    "doc_terms": self.doc_terms,
+                    "doc_lengths": self.doc_lengths
+                }
+
+                def write(path: str):
+                    with open(path, 'wb') as f:
+                        pickle.dump(payload, f)
+
+                write_atomically(self.index_path, write)
+                self._loaded_mtime = os.path.getmtime(self.index_path)
+
+            log.info(f"Saved BM25 index to {self.index_path}")
+
+        except Exception as e:
+            log.error(f"Failed to save BM25 index: {e}")
+
+    def load_index(self):
+        """Load index from disk and rebuild derived structures"""
+        try:
+            # Taken first, so a save that lands mid-read is picked up on the next reload
+            mtime = os.path.getmtime(self.index_path)
+            with open(self.index_path, 'rb') as f:
+                payload = pickle.load(f)
+
+            with self._lock:
+                self.doc_terms = payload.get("doc_terms", {})
+                self.doc_lengths = payload.get("doc_lengths", {})
+                self.total_length = sum(self.doc_lengths.values())
+                self.doc_freq = Counter()
+                self.postings = {}
+                for doc_id, terms in self.doc_terms.items():
+                    for term in terms:
+                        self.doc_freq[term] += 1
+                        self.postings.setdefault(term, set()).add(doc_id)
+                self._loaded_mtime = mtime
+
+            log.info(f"Loaded BM25 index from {self.index_path} with {len(self.doc_terms)} documents")
+
+        except Exception as e:
+            # Keeps what is loaded; the next reload tries again
+            log.error(f"Failed to load BM25 index: {e}")
+
+    def reload_if_changed(self):
+        """Reload the index if another process saved a newer copy to disk"""
+        try:
+            mtime = os.path.getmtime(self.index_path)
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            self.load_index()
+
+    def get_stats(self) -> Dict:
+        """Get index statistics"""
+        return {
+            "total_documents": len(self.doc_terms),
+            "vocabulary_size": len(self.doc_freq),
+            "average_length": self.total_length / len(self.doc_terms) if self.doc_terms else 0
+        }
+
+
+# Global instance
+keyword_index = KeywordIndex()
@@ -0,0 +1,193 @@
+# Per-job candidate leaderboards
+"""
+Precomputed top candidates per job
+
+Each ``job_leaderboards`` document holds the highest scoring candidates
+matched to one job, best first and capped at ``JOB_LEADERBOARD_SIZE``,
+updated whenever a candidate's score is written. Reading the top
+candidates of a job is then one document fetch.
+
+A board that has been capped (``truncated``) has dropped candidates, none
+of which outranks any entry still on it. A candidate that leaves such a
+board, or falls below every other entry, might now be outranked by one of
+those, so the board is rebuilt from the indexed ``matched_jobs`` +
+``score`` query instead of being patched. Every change is written
+conditionally on the board's ``version`` and retried on conflict, so
+concurrent refreshes neither lose updates nor duplicate entries.
+
+Reads for jobs without a board yet use the indexed query; a missing board
+is built from it.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
+from config.settings import settings
+from database.mongodb_client import mongodb_sync
+from utils.logger import log
+
+
+# Candidate fields stored on a board and returned as top candidates
+LEADERBOARD_PROJECTION = {"_id": 1, "email": 1, "name": 1, "score": 1}
+
+# Conflicting concurrent refreshes of one board before giving up
+BOARD_UPDATE_ATTEMPTS = 5
+
+
+def board_entry(candidate: Dict) -> Dict:
+    """Board entry for a candidate document"""
+    return {
+        "_id": str(candidate["_id"]),
+        "email": candidate["email"],
+        "name": candidate.get("name"),
+        "score": candidate["score"]
+    }
+
+
+def _rank(entry: Dict):
+    # Same order as the indexed query: score, then _id, descending
+    return entry["score"], entry["_id"]
+
+
+def board_covers(board: Optional[Dict], limit: int) -> bool:
+    """Whether a board holds the true top ``limit`` candidates"""
+    if not board:
+        return False
+    return len(board["entries"]) >= limit or not board.get("truncated")
+
+
+def top_candidates_query(job_id: str) -> Dict:
+    """Filter served by the ``matched_jobs`` + ``score`` index"""
+    return {"matched_jobs": job_id, "score": {"$ne": None}}
+
+
+class JobLeaderboards:
+    """Maintains the ``job_leaderboards`` collection"""
+
+    def __init__(self):
+        self.size = settings.JOB_LEADERBOARD_SIZE
+
+    @property
+    def collection(self):
+        return mongodb_sync.get_collection("job_leaderboards")
+
+    @property
+    def candidates(self):
+        return mongodb_sync.get_collection("candidates")
+
+    def top(self, job_id: str, limit: int = 10) -> List[Dict]:
+        """Highest scoring candidates matched to a job
+
+        Args:
+            job_id: Job to rank candidates for
+            limit: Number of candidates
+
+        Returns:
+            Candidates with _id, email, name and score, best first
+        """
+        board = self.collection.find_one({"_id": job_id})
+        if board_covers(board, limit):
+            return board["entries"][:limit]
+
+        candidates = self._ranked(job_id, max(limit, self.size))
+        if board is None:
+            self.create(job_id, candidates)
+        return candidates[:limit]
+
+    def _ranked(self, job_id: str, limit: int) -> List[Dict]:
+        return [
+            board_entry(candidate)
+            for candidate in self.candidates.find(top_candidates_query(job_id), LEADERBOARD_PROJECTION)
+            .sort([("score", DESCENDING), ("_id", DESCENDING)])
+            .limit(limit)
+        ]
+
+    def create(self, job_id: str, ranked: List[Dict]):
+        """Store a new board from candidates already ranked best first"""
+        try:
+            self.collection.insert_one({
+                "_id": job_id,
+                "entries": ranked[:self.size],
+                "truncated": len(ranked) >= self.size,
+                "version": 0,
+                "updated_at": datetime.utcnow()
+            })
+        except DuplicateKeyError:
+            # Another request built it first
+            pass
+
+    def refresh_candidate(self, email: str):
+        """Bring every board in line with a candidate's current score and jobs
+
+        Call after writing a candidate's score or matched jobs, or after
+        deleting the candidate.
+        """
+        try:
+            job_ids = [board["_id"] for board in self.collection.find({"entries.email": email}, {"_id": 1})]
+            candidate = self.candidates.find_one({"email": email}, {"matched_jobs": 1})
+            for job_id in (candidate or {}).get("matched_jobs", []):
+                if job_id not in job_ids:
+                    job_ids.append(job_id)
+
+            # Only existing boards are updated; a missing one is built on first read
+            for job_id in job_ids:
+                self._refresh_board(job_id, email)
+
+        except Exception as e:
+            # A stale board is corrected by the candidate's next score write
+            log.error(f"Failed to update leaderboards for {email}: {e}")
+
+    def _refresh_board(self, job_id: str, email: str):
+        for _ in range(BOARD_UPDATE_ATTEMPTS):
+            board = self.collection.find_one({"_id": job_id})
+            if board is None:
+                return
+
+            # Read after the board, so a retry sees any score written since
+            candidate = self.candidates.find_one({"email": email}, {**LEADERBOARD_PROJECTION, "matched_jobs": 1})
+            on_job = candidate and candidate.get("score") is not None and job_id in candidate.get("matched_jobs", [])
+            entry = board_entry(candidate) if on_job else None
+
+            update = self._board_update(board, email, entry)
+            if update is None:
+                return
+
+            result = self.collection.update_one(
+                {"_id": job_id, "version": board.get("version")},
+                {"$set": {**update, "version": (board.get("version") or 0) + 1, "updated_at": datetime.utcnow()}}
+            )
+            if result.matched_count:
+                return
+
+        log.warning(f"Gave up updating leaderboard {job_id} for {email} after {BOARD_UPDATE_ATTEMPTS} conflicting writes")
+
+    def _board_update(self, board: Dict, email: str, entry: Optional[Dict]) -> Optional[Dict]:
+        """New entries and truncated flag of a board, or None if unchanged"""
+        others = [other for other in board["entries"] if other["email"] != email]
+        was_on = len(others) < len(board["entries"])
+        truncated = bool(board.get("truncated"))
+
+        if entry is None and not was_on:
+            return None
+
+        # Candidates dropped from a truncated board score at most the lowest entry kept
+        if truncated and (not others or entry is None or _rank(entry) < _rank(others[-1])):
+            if not was_on and len(others) >= self.size:
+                # Stays off the board, below every entry on it
+                return None
+            ranked = self._ranked(board["_id"], self.size)
+            return {"entries": ranked, "truncated": len(ranked) >= self.size}
+
+        entries = others + ([entry] if entry else [])
+        entries.sort(key=_rank, reverse=True)
+        if entries == board["entries"]:
+            return None
+        return {
+            "entries": entries[:self.size],
+            # A full board drops its lowest entry on the next addition
+            "truncated": truncated or len(entries) >= self.size
+        }
+
+
+# Global instance
+job_leaderboards = JobLeaderboards()
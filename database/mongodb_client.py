@@ -13,11 +13,15 @@ class MongoDB:
         self.client: Optional[AsyncIOMotorClient] = None
         self.db = None
         
-    async def connect(self):
-        """Connect to MongoDB"""
+    async def connect(self, db_name: Optional[str] = None):
+        """Connect to MongoDB and create indexes
+
+        Args:
+            db_name: Database to use (default: MONGODB_DB_NAME)
+        """
         try:
             self.client = AsyncIOMotorClient(settings.MONGODB_URL)
-            self.db = self.client[settings.MONGODB_DB_NAME]
+            self.db = self.client[db_name or settings.MONGODB_DB_NAME]
             
             # Test connection
             await self.client.admin.command('ping')
@@ -37,6 +41,15 @@ class MongoDB:
             await self.db.candidates.create_index("email", unique=True)
             await self.db.candidates.create_index("uploaded_at")
             await self.db.candidates.create_index("score")
+            # Per-status dashboard counts (database/system_stats.py)
+            await self.db.candidates.create_index("status")
+            # Top candidates per job: equality on matched_jobs, sorted by score
+            await self.db.candidates.create_index([("matched_jobs", 1), ("score", -1)])
+            
+            # Keyset pagination: default sort field with _id as tie-breaker
+            await self.db.candidates.create_index([("uploaded_at", -1), ("_id", -1)])
+            await self.db.jobs.create_index([("created_at", -1), ("_id", -1)])
+            await self.db.interviews.create_index([("created_at", -1), ("_id", -1)])
             
             # Jobs collection indexes
             await self.db.jobs.create_index("job_id", unique=True)
@@ -47,6 +60,30 @@ class MongoDB:
             await self.db.interviews.create_index("candidate_id")
             await self.db.interviews.create_index("job_id")
             await self.db.interviews.create_index("scheduled_time")
+            await self.db.interviews.create_index("status")
+            
+            # Resume blob store indexes
+            await self.db.resume_blobs.create_index("sha256", unique=True)
+            await self.db.resume_blobs.create_index("candidate_email")
+            
+            # Background ingestion indexes
+            await self.db.ingestions.create_index("status")
+            await self.db.ingestions.create_index("created_at")
+            await self.db.ingestions.create_index("batch_id", sparse=True)
+            
+            # Resumable upload indexes
+            await self.db.upload_sessions.create_index("expires_at")
+            
+            # Compliance reports: time range scans grouped by scan type and
+            # risk level, answered from the index alone (also serves plain
+            # timestamp queries)
+            await self.db.compliance_logs.create_index([("timestamp", 1), ("scan_type", 1), ("risk_level", 1)])
+            
+            # Pipeline analytics: events by time range, and each candidate's
+            # uploads for stage latencies; rollups by day and job
+            await self.db.pipeline_events.create_index("timestamp")
+            await self.db.pipeline_events.create_index([("stage", 1), ("candidate_email", 1), ("timestamp", 1)])
+            await self.db.pipeline_daily.create_index([("day", 1), ("job_id", 1)])
             
             log.info("Database indexes created successfully")
             
@@ -0,0 +1,302 @@
+# Pipeline funnel analytics
+"""
+Stage events of the candidate pipeline, rolled up per day and job
+
+The pipeline records one event per stage a candidate reaches:
+
+    uploaded -> scanned -> matched -> shortlisted -> interviewed -> decided
+
+Events are appended to ``pipeline_events`` through the buffered log sink
+(utils/log_sink.py). ``uploaded`` and ``scanned`` belong to no job; the
+later stages carry the job they concern.
+
+Reports never read the raw events of rolled-up days: ``pipeline_daily``
+holds one document per UTC day and job, built behind a watermark by
+database/daily_rollups.py like the compliance rollups. Each document holds, per stage, the event
+count and a histogram of the time since the candidate's latest upload in
+``LATENCY_BUCKETS``. Histograms add up across days and jobs, so latency
+percentiles over any range come from the rollups, plus the events since
+the watermark.
+"""
+import bisect
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pymongo import ReplaceOne
+from config.settings import settings
+from database.daily_rollups import DailyRollup, split_range, start_of_day
+from database.mongodb_client import mongodb_sync
+from utils.logger import log
+
+
+FUNNEL_STAGES = ('uploaded', 'scanned', 'matched', 'shortlisted', 'interviewed', 'decided')
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket
+# holds everything slower
+LATENCY_BUCKETS = (
+    1, 2, 5, 10, 30, 60, 120, 300, 600, 1800,
+    3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 2 * 86400, 4 * 86400, 7 * 86400, 14 * 86400, 30 * 86400
+)
+
+UPLOAD_LOOKUP_CHUNK = 1000
+
+# {(day, job_id): {stage: {"count", "latency_count", "latency_sum", "latency": {bucket: n}}}}
+Rollups = Dict[Tuple[datetime, Optional[str]], Dict[str, Dict[str, Any]]]
+
+
+def latency_bucket(seconds: float) -> int:
+    """Index of the histogram bucket a latency falls in"""
+    return bisect.bisect_left(LATENCY_BUCKETS, seconds)
+
+
+def percentile(histogram: Dict[str, int], fraction: float) -> Optional[float]:
+    """Estimate a latency percentile from a histogram
+
+    Interpolates linearly within the bucket holding the requested rank; in
+    the open-ended last bucket the lower bound is returned.
+
+    Args:
+        histogram: Bucket index (as a string) to count
+        fraction: Percentile as a fraction, e.g. 0.9
+
+    Returns:
+        Latency in seconds, or None for an empty histogram
+    """
+    total = sum(histogram.values())
+    if not total:
+        return None
+    rank = fraction * total
+    seen = 0
+    for index in sorted(int(bucket) for bucket in histogram):
+        count = histogram[str(index)]
+        if seen + count >= rank:
+            lower = LATENCY_BUCKETS[index - 1] if index > 0 else 0
+            if index >= len(LATENCY_BUCKETS):
+                return float(lower)
+            return lower + (LATENCY_BUCKETS[index] - lower) * ((rank - seen) / count)
+        seen += count
+    return float(LATENCY_BUCKETS[-1])
+
+
+def _empty_stage() -> Dict[str, Any]:
+    return {"count": 0, "latency_count": 0, "latency_sum": 0.0, "latency": defaultdict(int)}
+
+
+def _merge_stage(into: Dict[str, Any], stage: Dict[str, Any]):
+    into["count"] += stage.get("count", 0)
+    into["latency_count"] += stage.get("latency_count", 0)
+    into["latency_sum"] += stage.get("latency_sum", 0.0)
+    for bucket, count in stage.get("latency", {}).items():
+        into["latency"][str(bucket)] += count
+
+
+class PipelineAnalytics:
+    """Records pipeline stage events and reports funnel and latency"""
+
+    def __init__(self):
+        self.rollup = DailyRollup("pipeline events", "pipeline_events", "pipeline_daily", self._build_day)
+
+    @property
+    def events(self):
+        return mongodb_sync.get_collection("pipeline_events")
+
+    @property
+    def daily(self):
+        return mongodb_sync.get_collection("pipeline_daily")
+
+    def record(self, stage: str, candidate_email: str, job_id: Optional[str] = None, **detail):
+        """Append a stage event; never raises into the pipeline
+
+        Args:
+            stage: One of FUNNEL_STAGES
+            candidate_email: Candidate that reached the stage
+            job_id: Job the stage concerns (None for uploaded and scanned)
+            **detail: Extra fields stored with the event (e.g. decision)
+        """
+        from utils.log_sink import log_sink
+
+        if stage not in FUNNEL_STAGES:
+            log.warning(f"Ignoring unknown pipeline stage: {stage}")
+            return
+        event = {
+            "stage": stage,
+            "candidate_email": candidate_email,
+            "job_id": job_id,
+            "timestamp": datetime.utcnow()
+        }
+        if detail:
+            event["detail"] = detail
+        try:
+            log_sink.write("pipeline_events", event)
+        except Exception as e:
+            log.warning(f"Failed to record pipeline event {stage} for {candidate_email}: {e}")
+
+    def funnel(self, start: Optional[datetime] = None, end: Optional[datetime] = None, job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Candidates reaching each stage, with conversion between stages
+
+        Args:
+            start: Inclusive lower bound (default: the first event)
+            end: Exclusive upper bound (default: now)
+            job_id: Only stages recorded for this job (matched onwards)
+
+        Returns:
+            Dictionary with stages: [{stage, count, conversion_from_previous,
+            conversion_from_first}], counting stage events in the range
+        """
+        stages = self._stages(start, end, job_id)
+        names = FUNNEL_STAGES[2:] if job_id else FUNNEL_STAGES
+
+        rows = []
+        first = previous = None
+        for name in names:
+            count = stages[name]["count"]
+            rows.append({
+                "stage": name,
+                "count": count,
+                "conversion_from_previous": round(count / previous, 4) if previous else None,
+                "conversion_from_first": round(count / first, 4) if first else None
+            })
+            first = count if first is None else first
+            previous = count
+        return {"job_id": job_id, "stages": rows}
+
+    def latency(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        job_id: Optional[str] = None,
+        percentiles: Iterable[float] = (50, 90, 99)
+    ) -> Dict[str, Any]:
+        """Time from upload to each stage
+
+        Args:
+            start: Inclusive lower bound (default: the first event)
+            end: Exclusive upper bound (default: now)
+            job_id: Only stages recorded for this job (matched onwards)
+            percentiles: Percentiles to estimate, 0-100
+
+        Returns:
+            Dictionary with stages: [{stage, count, mean_seconds, p50, ...}]
+            in seconds, estimated from the latency histograms
+        """
+        stages = self._stages(start, end, job_id)
+        names = FUNNEL_STAGES[2:] if job_id else FUNNEL_STAGES[1:]
+
+        rows = []
+        for name in names:
+            stage = stages[name]
+            row: Dict[str, Any] = {
+                "stage": name,
+                "count": stage["latency_count"],
+                "mean_seconds": round(stage["latency_sum"] / stage["latency_count"], 3) if stage["latency_count"] else None
+            }
+            for p in percentiles:
+                value = percentile(stage["latency"], p / 100)
+                row[f"p{p:g}"] = round(value, 3) if value is not None else None
+            rows.append(row)
+        return {"job_id": job_id, "stages": rows}
+
+    def _build_day(self, day: datetime, next_day: datetime) -> List[Any]:
+        """The rollup documents of one day, one per job"""
+        return [
+            ReplaceOne(
+                {"_id": f"{day:%Y-%m-%d}:{job_id or '*'}"},
+                {
+                    "_id": f"{day:%Y-%m-%d}:{job_id or '*'}",
+                    "day": day,
+                    "job_id": job_id,
+                    "stages": {
+                        name: {**stage, "latency": dict(stage["latency"])}
+                        for name, stage in stages.items()
+                    }
+                },
+                upsert=True
+            )
+            for (_, job_id), stages in self._collect(day, next_day).items()
+        ]
+
+    def _stages(self, start: Optional[datetime], end: Optional[datetime], job_id: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        """Merged per-stage statistics over a range, from rollups and the live tail"""
+        now = datetime.utcnow()
+        end = min(end or now, now)
+        watermark = self.rollup.roll_up(now, max_days=settings.ROLLUP_MAX_DAYS_PER_REQUEST, blocking=False)
+
+        stages: Dict[str, Dict[str, Any]] = defaultdict(_empty_stage)
+        if start is not None and start >= end:
+            return stages
+
+        # Whole days from the rollups, the rest from the events
+        rollup_range, live_ranges = split_range(start, end, watermark)
+        if rollup_range:
+            first_day, last_day = rollup_range
+            day_range: Dict[str, datetime] = {"$lt": last_day}
+            if first_day is not None:
+                day_range["$gte"] = first_day
+            query: Dict[str, Any] = {"day": day_range}
+            if job_id:
+                query["job_id"] = job_id
+            for rollup in self.daily.find(query):
+                for name, stage in rollup.get("stages", {}).items():
+                    _merge_stage(stages[name], stage)
+
+        for live_start, live_end in live_ranges:
+            for live_stages in self._collect(live_start, live_end, job_id).values():
+                for name, stage in live_stages.items():
+                    _merge_stage(stages[name], stage)
+        return stages
+
+    def _collect(self, start: Optional[datetime], end: datetime, job_id: Optional[str] = None) -> Rollups:
+        """Per day/job stage statistics computed from the events in a range"""
+        time_range: Dict[str, datetime] = {"$lt": end}
+        if start is not None:
+            time_range["$gte"] = start
+        query: Dict[str, Any] = {"timestamp": time_range}
+        if job_id:
+            query["job_id"] = job_id
+
+        events = list(self.events.find(query, {"stage": 1, "candidate_email": 1, "job_id": 1, "timestamp": 1, "_id": 0}))
+        uploads = self._upload_times(
+            {event["candidate_email"] for event in events if event.get("stage") != "uploaded"},
+            end
+        )
+
+        rollups: Rollups = defaultdict(lambda: defaultdict(_empty_stage))
+        for event in events:
+            if event.get("stage") not in FUNNEL_STAGES:
+                continue
+            stage = rollups[(start_of_day(event["timestamp"]), event.get("job_id"))][event["stage"]]
+            stage["count"] += 1
+            if event["stage"] == "uploaded":
+                continue
+
+            # Latest upload at or before the event
+            times = uploads.get(event["candidate_email"], [])
+            position = bisect.bisect_right(times, event["timestamp"])
+            if position:
+                seconds = (event["timestamp"] - times[position - 1]).total_seconds()
+                stage["latency_count"] += 1
+                stage["latency_sum"] += seconds
+                stage["latency"][str(latency_bucket(seconds))] += 1
+        return rollups
+
+    def _upload_times(self, candidate_emails: Iterable[str], end: datetime) -> Dict[str, List[datetime]]:
+        """Sorted upload event times per candidate, up to ``end``"""
+        emails = sorted(candidate_emails)
+        uploads: Dict[str, List[datetime]] = defaultdict(list)
+        for offset in range(0, len(emails), UPLOAD_LOOKUP_CHUNK):
+            for event in self.events.find(
+                {
+                    "stage": "uploaded",
+                    "candidate_email": {"$in": emails[offset:offset + UPLOAD_LOOKUP_CHUNK]},
+                    "timestamp": {"$lt": end}
+                },
+                {"candidate_email": 1, "timestamp": 1, "_id": 0}
+            ):
+                uploads[event["candidate_email"]].append(event["timestamp"])
+        for times in uploads.values():
+            times.sort()
+        return uploads
+
+
+# Global instance
+pipeline_analytics = PipelineAnalytics()
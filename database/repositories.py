@@ -0,0 +1,277 @@
+# Async data access (motor)
+"""
+Async repositories over the motor client for use from request handlers
+
+Routes are ``async def``, so they must not call the synchronous
+``database_tool`` / ``mongodb_sync`` pair: every pymongo call would block
+the event loop and with it every other request. These repositories await
+the motor client opened in the app lifespan instead. Agents and workers
+that run in threads keep using ``database_tool``.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from config.settings import settings
+from database.mongodb_client import mongodb
+from database.leaderboards import LEADERBOARD_PROJECTION, board_covers, board_entry, top_candidates_query
+from utils.pagination import decode_cursor, encode_cursor, keyset_filter
+
+
+def _stringify_id(document: Optional[Dict]) -> Optional[Dict]:
+    """Convert ``_id`` to a string, as database_tool does"""
+    if document and '_id' in document:
+        document['_id'] = str(document['_id'])
+    return document
+
+
+class MotorRepository:
+    """Common operations on one collection"""
+
+    collection_name: str = ""
+
+    @property
+    def collection(self):
+        return mongodb.get_collection(self.collection_name)
+
+    async def find_one(self, query: Dict, projection: Optional[Dict] = None) -> Optional[Dict]:
+        """Find a single document"""
+        return _stringify_id(await self.collection.find_one(query, projection))
+
+    async def find(
+        self,
+        query: Optional[Dict] = None,
+        limit: int = 100,
+        sort: Optional[List[Tuple[str, int]]] = None,
+        projection: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Find documents
+
+        Args:
+            query: Query filter
+            limit: Maximum number of documents
+            sort: (field, direction) pairs
+            projection: Fields to include or exclude
+
+        Returns:
+            Matching documents with string ``_id``
+        """
+        cursor = self.collection.find(query or {}, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        cursor = cursor.limit(limit)
+        return [_stringify_id(document) async for document in cursor]
+
+    async def find_page(
+        self,
+        query: Dict,
+        sort_field: str,
+        descending: bool = True,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        projection: Optional[Dict] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Find one keyset page of documents
+
+        Args:
+            query: Query filter
+            sort_field: Field to sort on; ``_id`` breaks ties
+            descending: Sort direction
+            limit: Page size
+            cursor: ``next_cursor`` of the previous page, for the same query
+                and sort
+            projection: Inclusion projection
+
+        Returns:
+            Tuple of (documents with string ``_id``, cursor of the next page
+            or None on the last page)
+        """
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort_field, descending)
+            query = {"$and": [query, keyset_filter(sort_field, descending, value, last_id)]}
+
+        if projection:
+            # The cursor is built from the sort field
+            projection = {**projection, sort_field: 1}
+
+        direction = DESCENDING if descending else ASCENDING
+        results = (
+            self.collection.find(query, projection)
+            .sort([(sort_field, direction), ("_id", direction)])
+            .limit(limit + 1)
+        )
+        documents = [document async for document in results]
+
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = encode_cursor(sort_field, descending, documents[-1])
+
+        return [_stringify_id(document) for document in documents], next_cursor
+
+    async def insert(self, document: Dict) -> str:
+        """Insert a document and return its id"""
+        result = await self.collection.insert_one(document)
+        return str(result.inserted_id)
+
+    async def update(self, query: Dict, data: Dict) -> Dict[str, int]:
+        """``$set`` fields on the first matching document
+
+        Returns:
+            Dictionary with matched_count and modified_count
+        """
+        result = await self.collection.update_one(query, {"$set": data})
+        return {"matched_count": result.matched_count, "modified_count": result.modified_count}
+
+    async def delete(self, query: Dict) -> int:
+        """Delete the first matching document and return the deleted count"""
+        result = await self.collection.delete_one(query)
+        return result.deleted_count
+
+    async def count(self, query: Optional[Dict] = None) -> int:
+        """Count matching documents"""
+        return await self.collection.count_documents(query or {})
+
+
+class CandidateRepository(MotorRepository):
+    """Candidates, keyed by email"""
+
+    collection_name = "candidates"
+
+    async def get_by_email(self, email: str, projection: Optional[Dict] = None) -> Optional[Dict]:
+        return await self.find_one({"email": email}, projection)
+
+    async def list(
+        self,
+        status: Optional[str] = None,
+        min_score: Optional[float] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort_field: str = "uploaded_at",
+        descending: bool = True,
+        projection: Optional[Dict] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Page through candidates with optional status and minimum score filters"""
+        query: Dict[str, Any] = {}
+        if status:
+            query["status"] = status
+        if min_score is not None:
+            query["score"] = {"$gte": min_score}
+        return await self.find_page(query, sort_field, descending, limit, cursor, projection)
+
+    async def update_by_email(self, email: str, data: Dict) -> Dict[str, int]:
+        return await self.update({"email": email}, data)
+
+    async def update_returning_previous(self, email: str, data: Dict, projection: Optional[Dict] = None) -> Optional[Dict]:
+        """``$set`` fields on a candidate and return it as it was before, or None if missing"""
+        return _stringify_id(await self.collection.find_one_and_update(
+            {"email": email},
+            {"$set": data},
+            projection=projection,
+            return_document=ReturnDocument.BEFORE
+        ))
+
+    async def delete_by_email(self, email: str) -> Optional[Dict]:
+        """Delete a candidate and return the deleted document"""
+        return _stringify_id(await self.collection.find_one_and_delete({"email": email}))
+
+    async def top_for_job(self, job_id: str, limit: int = 10) -> List[Dict]:
+        """Highest scoring candidates matched to a job
+
+        Served from the job's leaderboard when it covers ``limit``, else from
+        the ``matched_jobs`` + ``score`` index.
+
+        Returns:
+            Candidates with _id, email, name and score, best first
+        """
+        leaderboards = mongodb.get_collection("job_leaderboards")
+        board = await leaderboards.find_one({"_id": job_id})
+        if board_covers(board, limit):
+            return board["entries"][:limit]
+
+        size = settings.JOB_LEADERBOARD_SIZE
+        cursor = (
+            self.collection.find(top_candidates_query(job_id), LEADERBOARD_PROJECTION)
+            .sort([("score", DESCENDING), ("_id", DESCENDING)])
+            .limit(max(limit, size))
+        )
+        ranked = [board_entry(candidate) async for candidate in cursor]
+
+        if board is None:
+            try:
+                await leaderboards.insert_one({
+                    "_id": job_id,
+                    "entries": ranked[:size],
+                    "truncated": len(ranked) >= size,
+                    "version": 0,
+                    "updated_at": datetime.utcnow()
+                })
+            except DuplicateKeyError:
+                pass
+
+        return ranked[:limit]
+
+
+class JobRepository(MotorRepository):
+    """Job postings, keyed by job_id"""
+
+    collection_name = "jobs"
+
+    async def get_by_job_id(self, job_id: str) -> Optional[Dict]:
+        return await self.find_one({"job_id": job_id})
+
+    async def list(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort_field: str = "created_at",
+        descending: bool = True,
+        projection: Optional[Dict] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Page through job postings"""
+        return await self.find_page({}, sort_field, descending, limit, cursor, projection)
+
+    async def update_by_job_id(self, job_id: str, data: Dict) -> Dict[str, int]:
+        return await self.update({"job_id": job_id}, data)
+
+    async def delete_by_job_id(self, job_id: str) -> int:
+        return await self.delete({"job_id": job_id})
+
+
+class InterviewRepository(MotorRepository):
+    """Interviews, keyed by their id"""
+
+    collection_name = "interviews"
+
+    async def get(self, interview_id: str) -> Optional[Dict]:
+        return await self.find_one({"_id": interview_id})
+
+    async def list(
+        self,
+        status: Optional[str] = None,
+        candidate_id: Optional[str] = None,
+        job_id: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort_field: str = "created_at",
+        descending: bool = True,
+        projection: Optional[Dict] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Page through interviews with optional filters"""
+        query: Dict[str, Any] = {}
+        if status:
+            query["status"] = status
+        if candidate_id:
+            query["candidate_id"] = candidate_id
+        if job_id:
+            query["job_id"] = job_id
+        return await self.find_page(query, sort_field, descending, limit, cursor, projection)
+
+    async def update_by_id(self, interview_id: str, data: Dict) -> Dict[str, int]:
+        return await self.update({"_id": interview_id}, data)
+
+
+# Global instances
+candidate_repository = CandidateRepository()
+job_repository = JobRepository()
+interview_repository = InterviewRepository()
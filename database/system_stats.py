@@ -0,0 +1,108 @@
+# Dashboard statistics
+"""
+System-wide counts for the dashboard, cached in memory
+
+The dashboard polls ``GET /stats``. Totals come from
+``estimated_document_count`` (collection metadata, no scan) and the
+per-status breakdowns from one ``$group`` per collection over its status
+index; the result is
+kept for ``STATS_CACHE_TTL_SECONDS`` and shared by every request, with
+concurrent refreshes collapsed into one. Each snapshot carries an ETag so
+a poller that already has it gets a 304 without a body.
+
+Writes through the API call ``invalidate()`` so the next poll sees them;
+pipeline writes show up once the TTL lapses.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from config.settings import settings
+from database.mongodb_client import mongodb
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names the given ETag"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    # Weak comparison, as for GET
+    return "*" in candidates or any((value[2:] if value.startswith("W/") else value) == etag for value in candidates)
+
+
+class SystemStats:
+    """TTL-cached counts of candidates, jobs and interviews"""
+
+    def __init__(self):
+        self.ttl = settings.STATS_CACHE_TTL_SECONDS
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._expires_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def get(self) -> Dict[str, Any]:
+        """Current statistics
+
+        Returns:
+            Dictionary with ``stats`` (the payload) and ``etag``
+        """
+        if self._snapshot is not None and time.monotonic() < self._expires_at:
+            return self._snapshot
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another request may have refreshed while this one waited
+            if self._snapshot is None or time.monotonic() >= self._expires_at:
+                self._snapshot = await self._compute()
+                self._expires_at = time.monotonic() + self.ttl
+        return self._snapshot
+
+    def invalidate(self):
+        """Recompute on the next request"""
+        self._expires_at = 0.0
+
+    async def _status_counts(self, collection: str) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        # Sorting on the indexed field lets the group read the status index alone
+        async for row in mongodb.get_collection(collection).aggregate([
+            {"$sort": {"status": 1}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]):
+            status = row["_id"] or "unknown"
+            counts[status] = counts.get(status, 0) + row["count"]
+        return counts
+
+    async def _compute(self) -> Dict[str, Any]:
+        from database.vector_store import vector_store
+
+        candidates_count, jobs_count, interviews_count, candidates_by_status, interviews_by_status = await asyncio.gather(
+            mongodb.get_collection("candidates").estimated_document_count(),
+            mongodb.get_collection("jobs").estimated_document_count(),
+            mongodb.get_collection("interviews").estimated_document_count(),
+            self._status_counts("candidates"),
+            self._status_counts("interviews")
+        )
+
+        # ntotal of the FAISS index is exact, unlike the store's own stats
+        vector_count = vector_store.index.ntotal if vector_store.index else 0
+
+        stats = {
+            "total_candidates": candidates_count,
+            "active_jobs": jobs_count,
+            "interviews_scheduled": interviews_count,
+            "vector_count": vector_count,
+            "candidates_by_status": dict(sorted(candidates_by_status.items())),
+            "interviews_by_status": dict(sorted(interviews_by_status.items()))
+        }
+        # The ETag covers the counts only, so an unchanged system keeps its tag
+        digest = hashlib.sha1(json.dumps(stats, sort_keys=True).encode()).hexdigest()
+        return {
+            "stats": {**stats, "generated_at": datetime.utcnow().isoformat()},
+            "etag": f'"{digest[:16]}"'
+        }
+
+
+# Global instance
+system_stats = SystemStats()
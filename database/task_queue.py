@@ -0,0 +1,342 @@
+# Durable task queue (MongoDB)
+"""
+Mongo-backed task queue with leases, retries and dead-lettering
+
+A task is leased by atomically flipping it to ``leased`` with an expiry. A
+worker that dies simply lets the lease run out, after which any worker can
+pick the task up again. Failed tasks are retried with exponential backoff
+until ``max_attempts`` is reached, then moved to ``dead``.
+"""
+import socket
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from config.settings import settings
+from database.mongodb_client import mongodb_sync
+from utils.logger import log
+
+
+TASK_STATUSES = ('queued', 'leased', 'completed', 'dead')
+DUPLICATE_KEY_ERROR = 11000
+
+
+class PermanentTaskError(Exception):
+    """Raised by a task handler when retrying cannot help"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class TaskQueue:
+    """Durable queue of pipeline tasks stored in the ``tasks`` collection"""
+
+    def __init__(self):
+        self.visibility_timeout = settings.TASK_VISIBILITY_TIMEOUT_SECONDS
+        self.max_attempts = settings.TASK_MAX_ATTEMPTS
+        self.backoff_seconds = settings.TASK_RETRY_BACKOFF_SECONDS
+
+    @property
+    def collection(self):
+        return mongodb_sync.get_collection("tasks")
+
+    def ensure_indexes(self):
+        """Create the indexes leasing and deduplication rely on"""
+        self.collection.create_index([("status", ASCENDING), ("run_after", ASCENDING)])
+        self.collection.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+        self.collection.create_index("dedupe_key", unique=True, sparse=True)
+        self.collection.create_index("payload.application_id")
+
+    def enqueue(
+        self,
+        task_type: str,
+        payload: Dict[str, Any],
+        dedupe_key: Optional[str] = None,
+        delay_seconds: float = 0,
+        max_attempts: Optional[int] = None,
+        requeue_settled: bool = False
+    ) -> str:
+        """Add a task to the queue
+
+        Args:
+            task_type: Handler name (e.g. parse, match)
+            payload: Handler arguments
+            dedupe_key: Enqueueing the same key twice returns the existing
+                task, so a retried parent does not fan out twice
+            delay_seconds: Earliest start, relative to now
+            max_attempts: Attempts before dead-lettering (defaults to settings)
+            requeue_settled: If the task under ``dedupe_key`` is completed or
+                dead, run it again with fresh attempts instead of returning it
+
+        Returns:
+            Task ID
+        """
+        task = self._new_task(task_type, payload, dedupe_key, delay_seconds, max_attempts)
+
+        try:
+            self.collection.insert_one(task)
+        except DuplicateKeyError:
+            if requeue_settled:
+                requeued = self.collection.find_one_and_update(
+                    {"dedupe_key": dedupe_key, "status": {"$in": ["completed", "dead"]}},
+                    {"$set": {
+                        "payload": payload,
+                        "status": "queued",
+                        "attempts": 0,
+                        "run_after": task["run_after"],
+                        "lease_owner": None,
+                        "lease_expires_at": None,
+                        "last_error": None,
+                        "updated_at": task["updated_at"]
+                    }},
+                    projection={"_id": 1}
+                )
+                if requeued:
+                    log.info(f"Requeued settled task {dedupe_key} as {requeued['_id']}")
+                    return requeued["_id"]
+            existing = self.collection.find_one({"dedupe_key": dedupe_key}, {"_id": 1})
+            log.info(f"Task {dedupe_key} already enqueued as {existing['_id']}")
+            return existing["_id"]
+
+        log.info(f"Enqueued {task_type} task {task['_id']}")
+        return task["_id"]
+
+    def enqueue_many(self, tasks: List[Dict[str, Any]]) -> List[str]:
+        """Add several tasks in one round trip
+
+        Args:
+            tasks: One dict per task with ``type`` and ``payload`` and
+                optionally ``dedupe_key``, ``delay_seconds`` and
+                ``max_attempts``, as for enqueue()
+
+        Returns:
+            Task IDs in the order given; a duplicate dedupe_key yields the
+            existing task's ID
+        """
+        documents = [
+            self._new_task(
+                task["type"],
+                task["payload"],
+                task.get("dedupe_key"),
+                task.get("delay_seconds", 0),
+                task.get("max_attempts")
+            )
+            for task in tasks
+        ]
+        if not documents:
+            return []
+
+        task_ids = [document["_id"] for document in documents]
+        try:
+            # Unordered, so one duplicate does not stop the rest
+            self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+            for error in errors:
+                dedupe_key = documents[error["index"]]["dedupe_key"]
+                existing = self.collection.find_one({"dedupe_key": dedupe_key}, {"_id": 1})
+                task_ids[error["index"]] = existing["_id"]
+            log.info(f"{len(errors)} of {len(documents)} task(s) were already enqueued")
+
+        log.info(f"Enqueued {len(documents)} task(s) in one batch")
+        return task_ids
+
+    def _new_task(
+        self,
+        task_type: str,
+        payload: Dict[str, Any],
+        dedupe_key: Optional[str],
+        delay_seconds: float,
+        max_attempts: Optional[int]
+    ) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        task = {
+            "_id": str(ObjectId()),
+            "type": task_type,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts or self.max_attempts,
+            "run_after": now + timedelta(seconds=delay_seconds),
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        if dedupe_key:
+            task["dedupe_key"] = dedupe_key
+        return task
+
+    def lease(self, worker_id: str, task_types: Optional[List[str]] = None) -> Optional[Dict]:
+        """Lease the next runnable task
+
+        Picks a queued task whose ``run_after`` has passed, or a leased task
+        whose lease has expired because its worker died.
+
+        Args:
+            worker_id: Identifier of the leasing worker
+            task_types: Only lease these task types (optional)
+
+        Returns:
+            Leased task document, or None if nothing is runnable
+        """
+        while True:
+            now = datetime.utcnow()
+            query = {
+                "$or": [
+                    {"status": "queued", "run_after": {"$lte": now}},
+                    {"status": "leased", "lease_expires_at": {"$lte": now}}
+                ]
+            }
+            if task_types:
+                query["type"] = {"$in": task_types}
+
+            task = self.collection.find_one_and_update(
+                query,
+                {
+                    "$set": {
+                        "status": "leased",
+                        "lease_owner": worker_id,
+                        "lease_expires_at": now + timedelta(seconds=self.visibility_timeout),
+                        "updated_at": now
+                    },
+                    "$inc": {"attempts": 1}
+                },
+                sort=[("run_after", ASCENDING)],
+                return_document=ReturnDocument.AFTER
+            )
+
+            if task is None:
+                return None
+
+            # An expired lease counts as a failed attempt; stop once the budget is spent
+            if task["attempts"] > task["max_attempts"]:
+                self._dead_letter(task, worker_id, task.get("last_error") or "Lease expired too many times")
+                continue
+
+            return task
+
+    def lease_batch(self, worker_id: str, task_types: Optional[List[str]], limit: int) -> List[Dict]:
+        """Lease up to ``limit`` runnable tasks for a consumer that handles them together
+
+        Returns:
+            Leased task documents, possibly none
+        """
+        tasks = []
+        while len(tasks) < limit:
+            task = self.lease(worker_id, task_types)
+            if task is None:
+                break
+            tasks.append(task)
+        return tasks
+
+    def extend_lease(self, task_id: str, worker_id: str) -> bool:
+        """Push out the lease of a task that is still running
+
+        Returns:
+            False if the lease was lost to another worker
+        """
+        result = self.collection.update_one(
+            {"_id": task_id, "status": "leased", "lease_owner": worker_id},
+            {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=self.visibility_timeout)}}
+        )
+        return result.modified_count == 1
+
+    def complete(self, task_id: str, worker_id: str, result: Optional[Dict] = None) -> bool:
+        """Mark a leased task as completed
+
+        Returns:
+            False if the lease was lost and another worker owns the task
+        """
+        now = datetime.utcnow()
+        updated = self.collection.update_one(
+            {"_id": task_id, "status": "leased", "lease_owner": worker_id},
+            {"$set": {
+                "status": "completed",
+                "result": result,
+                "lease_expires_at": None,
+                "completed_at": now,
+                "updated_at": now
+            }}
+        )
+        if updated.modified_count != 1:
+            log.warning(f"Task {task_id} completed after its lease was lost")
+            return False
+        return True
+
+    def fail(self, task: Dict, worker_id: str, error: str, permanent: bool = False) -> str:
+        """Record a failed attempt, scheduling a retry or dead-lettering
+
+        Args:
+            task: Leased task document
+            worker_id: Identifier of the leasing worker
+            error: Error message
+            permanent: Dead-letter immediately instead of retrying
+
+        Returns:
+            New task status (queued or dead)
+        """
+        if permanent or task["attempts"] >= task["max_attempts"]:
+            self._dead_letter(task, worker_id, error)
+            return "dead"
+
+        delay = self.backoff_seconds * (2 ** (task["attempts"] - 1))
+        now = datetime.utcnow()
+        self.collection.update_one(
+            {"_id": task["_id"], "status": "leased", "lease_owner": worker_id},
+            {"$set": {
+                "status": "queued",
+                "run_after": now + timedelta(seconds=delay),
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "last_error": error,
+                "updated_at": now
+            }}
+        )
+        log.warning(f"Task {task['_id']} ({task['type']}) failed attempt {task['attempts']}, retrying in {delay}s: {error}")
+        return "queued"
+
+    def _dead_letter(self, task: Dict, worker_id: str, error: str):
+        now = datetime.utcnow()
+        self.collection.update_one(
+            {"_id": task["_id"], "lease_owner": worker_id},
+            {"$set": {
+                "status": "dead",
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "last_error": error,
+                "dead_at": now,
+                "updated_at": now
+            }}
+        )
+        log.error(f"Task {task['_id']} ({task['type']}) dead-lettered after {task['attempts']} attempt(s): {error}")
+
+    def requeue_dead(self, task_id: str) -> bool:
+        """Give a dead-lettered task a fresh set of attempts
+
+        Returns:
+            True if the task was requeued
+        """
+        now = datetime.utcnow()
+        result = self.collection.update_one(
+            {"_id": task_id, "status": "dead"},
+            {"$set": {"status": "queued", "attempts": 0, "run_after": now, "updated_at": now}}
+        )
+        return result.modified_count == 1
+
+    def get_stats(self) -> Dict:
+        """Count tasks per status"""
+        counts = {status: 0 for status in TASK_STATUSES}
+        for row in self.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        return counts
+
+
+# Global instance
+task_queue = TaskQueue()
@@ -0,0 +1,123 @@
+# Request-scoped identity map
+"""
+Unit of work holding the candidate, job and interview documents read
+during one workflow run
+
+While a unit of work is active, ``database_tool`` serves ``find_one``
+lookups by identity (candidate email, job_id, interview _id) from it, so
+the agents taking part in one application read each document once.
+Writes through ``database_tool`` drop the cached copies they may have
+changed. The unit of work lives in a context variable, so it follows the
+run into DAG steps (which copy the caller's context) but is never shared
+between runs.
+"""
+import contextvars
+import copy
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from utils.logger import log
+
+
+# Field that identifies a document in each cached collection
+IDENTITY_FIELDS = {
+    "candidates": "email",
+    "jobs": "job_id",
+    "interviews": "_id"
+}
+
+_current: contextvars.ContextVar[Optional["UnitOfWork"]] = contextvars.ContextVar("unit_of_work", default=None)
+
+
+def identity_key(collection: str, query: Optional[Dict]) -> Optional[Any]:
+    """Identity value of a query that selects one document by its key, else None"""
+    field = IDENTITY_FIELDS.get(collection)
+    if not field or not query or list(query) != [field]:
+        return None
+    value = query[field]
+    # Operator queries ({"$in": ...}) do not name a single document
+    return None if isinstance(value, dict) else value
+
+
+class UnitOfWork:
+    """Identity map of documents read during one workflow run"""
+
+    def __init__(self):
+        self._documents: Dict[Tuple[str, Any], Dict] = {}
+        # Bumped on every invalidation, so a read racing a write is not cached
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, collection: str, key: Any, load: Callable[[], Optional[Dict]]) -> Optional[Dict]:
+        """Return the cached document, loading it on first use
+
+        Args:
+            collection: Collection name
+            key: Identity value of the document
+            load: Reads the document from the database
+
+        Returns:
+            A copy of the document, or None if it does not exist (misses are
+            not cached)
+        """
+        with self._lock:
+            cached = self._documents.get((collection, key))
+            if cached is not None:
+                self.hits += 1
+                return copy.deepcopy(cached)
+            self.misses += 1
+            version = self._versions.get(collection, 0)
+
+        document = load()
+
+        if document is not None:
+            with self._lock:
+                if self._versions.get(collection, 0) == version:
+                    self._documents[(collection, key)] = copy.deepcopy(document)
+        return document
+
+    def invalidate(self, collection: str, key: Optional[Any] = None):
+        """Drop a cached document, or every document of the collection if no key"""
+        if collection not in IDENTITY_FIELDS:
+            return
+        with self._lock:
+            self._versions[collection] = self._versions.get(collection, 0) + 1
+            if key is not None:
+                self._documents.pop((collection, key), None)
+            else:
+                for cached_key in [k for k in self._documents if k[0] == collection]:
+                    del self._documents[cached_key]
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    """The active unit of work, if any"""
+    return _current.get()
+
+
+@contextmanager
+def unit_of_work() -> Iterator[UnitOfWork]:
+    """Run a block inside a unit of work, joining the active one if there is one"""
+    active = _current.get()
+    if active is not None:
+        yield active
+        return
+
+    uow = UnitOfWork()
+    token = _current.set(uow)
+    try:
+        yield uow
+    finally:
+        _current.reset(token)
+        log.debug(f"Unit of work closed: {uow.hits} cached reads, {uow.misses} database reads")
+
+
+def in_unit_of_work(func: Callable) -> Callable:
+    """Decorator running a function inside a unit of work"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with unit_of_work():
+            return func(*args, **kwargs)
+    return wrapper
@@ -3,13 +3,34 @@ import faiss
 import numpy as np
 import pickle
 import os
-from typing import List, Dict, Tuple
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
 from config.settings import settings
 from utils.logger import log
 
 
+def write_atomically(path: str, write):
+    """Write a file through a temporary sibling, so readers never see it half-written
+
+    Args:
+        path: Destination path
+        write: Callable taking the temporary path to write to
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 class VectorStore:
-    """FAISS-based vector store for semantic search"""
+    """FAISS-based vector store for semantic search
+    
+    The API and the worker threads share one instance; every read and
+    mutation of the index and its metadata holds ``_lock``.
+    """
     
     def __init__(self, dimension: int = 384):
         self.dimension = dimension
@@ -17,6 +38,8 @@ class VectorStore:
         self.metadata = []
         self.index_path = settings.FAISS_INDEX_PATH
         self.metadata_path = f"{self.index_path}_metadata.pkl"
+        self._loaded_mtime = None
+        self._lock = threading.RLock()
         
         self._initialize_index()
     
@@ -43,77 +66,178 @@ class VectorStore:
         faiss.normalize_L2(vectors)
         
         # Add to index
-        self.index.add(vectors)
-        self.metadata.extend(metadata)
+        with self._lock:
+            self.index.add(vectors)
+            self.metadata.extend(metadata)
+            total = self.index.ntotal
+        
+        log.info(f"Added {len(vectors)} vectors to index. Total: {total}")
+    
+    def replace_vectors(self, doc_type: str, doc_id: str, vectors: np.ndarray, metadata: List[Dict]):
+        """Replace the vectors of a document in one step
         
-        log.info(f"Added {len(vectors)} vectors to index. Total: {self.index.ntotal}")
+        Concurrent re-indexing of the same document cannot leave both
+        copies in the index.
+        
+        Args:
+            doc_type: Metadata type (candidate or job)
+            doc_id: Metadata id
+            vectors: numpy array of shape (n, dimension)
+            metadata: list of metadata dicts for each vector
+        """
+        with self._lock:
+            self.remove_vectors(doc_type, doc_id)
+            self.add_vectors(vectors, metadata)
     
-    def search(self, query_vector: np.ndarray, k: int = 5) -> List[Tuple[Dict, float]]:
+    def search(
+        self,
+        query_vector: np.ndarray,
+        k: int = 5,
+        keep: Optional[Callable[[Dict], bool]] = None
+    ) -> List[Tuple[Dict, float]]:
         """Search for similar vectors
         
         Args:
             query_vector: query vector of shape (1, dimension)
             k: number of results to return
+            keep: Only return vectors whose metadata passes this check;
+                the search widens until k pass or the index is exhausted
             
         Returns:
             List of (metadata, score) tuples
         """
-        if self.index.ntotal == 0:
-            log.warning("Vector store is empty")
-            return []
-        
         # Normalize query vector
         query_vector = query_vector.reshape(1, -1)
         faiss.normalize_L2(query_vector)
         
-        # Search
-        scores, indices = self.index.search(query_vector, min(k, self.index.ntotal))
-        
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx != -1 and idx < len(self.metadata):
-                results.append((self.metadata[idx], float(score)))
+        with self._lock:
+            if self.index.ntotal == 0:
+                log.warning("Vector store is empty")
+                return []
+            
+            fetch = min(k, self.index.ntotal)
+            while True:
+                scores, indices = self.index.search(query_vector, fetch)
+                
+                results = []
+                for score, idx in zip(scores[0], indices[0]):
+                    if idx != -1 and idx < len(self.metadata) and (keep is None or keep(self.metadata[idx])):
+                        results.append((self.metadata[idx], float(score)))
+                
+                if len(results) >= k or fetch >= self.index.ntotal:
+                    break
+                fetch = min(fetch * 4, self.index.ntotal)
         
-        return results
-    
+        return results[:k]
+
+    def remove_vectors(self, doc_type: str, doc_id: str) -> int:
+        """Remove all vectors stored for a document
+
+        Args:
+            doc_type: Metadata type (candidate or job)
+            doc_id: Metadata id
+
+        Returns:
+            Number of vectors removed
+        """
+        with self._lock:
+            positions = [
+                i for i, meta in enumerate(self.metadata)
+                if meta.get("type") == doc_type and meta.get("id") == doc_id
+            ]
+
+            if not positions:
+                return 0
+
+            # IndexFlat compacts the remaining vectors in order, so the metadata
+            # list stays aligned once the same positions are dropped from it
+            self.index.remove_ids(np.array(positions, dtype='int64'))
+            removed = set(positions)
+            self.metadata = [meta for i, meta in enumerate(self.metadata) if i not in removed]
+            total = self.index.ntotal
+
+        log.info(f"Removed {len(positions)} vectors for {doc_type} {doc_id}. Total: {total}")
+        return len(positions)
+
     def save_index(self):
-        """Save index and metadata to disk"""
+        """Save index and metadata to disk
+        
+        Both files are replaced whole, index first; other processes reload
+        once the metadata file changes.
+        """
+        def write_metadata(path: str):
+            with open(path, 'wb') as f:
+                pickle.dump(self.metadata, f)
+        
         try:
             os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
             
-            # Save FAISS index
-            faiss.write_index(self.index, self.index_path)
-            
-            # Save metadata
-            with open(self.metadata_path, 'wb') as f:
-                pickle.dump(self.metadata, f)
-            
+            with self._lock:
+                # Save FAISS index
+                write_atomically(self.index_path, lambda path: faiss.write_index(self.index, path))
+                
+                # Save metadata
+                write_atomically(self.metadata_path, write_metadata)
+                
+                self._loaded_mtime = os.path.getmtime(self.metadata_path)
             log.info(f"Saved index to {self.index_path}")
             
         except Exception as e:
             log.error(f"Failed to save index: {e}")
     
     def load_index(self):
-        """Load index and metadata from disk"""
+        """Load index and metadata from disk
+        
+        The index is always saved before its metadata, so an index newer than
+        the metadata, or either file changing during the read, means another
+        process is mid-save; the files are then left for the next reload.
+        """
         try:
+            mtimes = self._file_mtimes()
+            if mtimes[0] > mtimes[1]:
+                raise ValueError("index is newer than its metadata, save in progress")
+            
             # Load FAISS index
-            self.index = faiss.read_index(self.index_path)
+            index = faiss.read_index(self.index_path)
             
             # Load metadata
             with open(self.metadata_path, 'rb') as f:
-                self.metadata = pickle.load(f)
+                metadata = pickle.load(f)
+            
+            if self._file_mtimes() != mtimes:
+                raise ValueError("index changed while loading")
+            if index.ntotal != len(metadata):
+                raise ValueError(f"index holds {index.ntotal} vectors but metadata {len(metadata)}")
             
-            log.info(f"Loaded index from {self.index_path} with {self.index.ntotal} vectors")
+            with self._lock:
+                self.index = index
+                self.metadata = metadata
+                self._loaded_mtime = mtimes[1]
+            log.info(f"Loaded index from {self.index_path} with {index.ntotal} vectors")
             
         except Exception as e:
             log.error(f"Failed to load index: {e}")
-            self.index = faiss.IndexFlatIP(self.dimension)
-            self.metadata = []
+            if self.index is None:
+                self.index = faiss.IndexFlatIP(self.dimension)
+                self.metadata = []
+    
+    def _file_mtimes(self) -> Tuple[float, float]:
+        return os.path.getmtime(self.index_path), os.path.getmtime(self.metadata_path)
+    
+    def reload_if_changed(self):
+        """Reload the index if another process saved a newer copy to disk"""
+        try:
+            mtime = os.path.getmtime(self.metadata_path)
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            self.load_index()
     
     def clear(self):
         """Clear the index"""
-        self.index.reset()
-        self.metadata = []
+        with self._lock:
+            self.index.reset()
+            self.metadata = []
         log.info("Cleared vector store")
     
     def get_stats(self) -> Dict:
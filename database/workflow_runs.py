@@ -0,0 +1,149 @@
+# Per-candidate workflow state
+"""
+Records which pipeline steps have run for a candidate, on what inputs
+
+One ``workflow_runs`` document per candidate holds, for every step, its
+status, a hash of the inputs it ran on and its output. A step whose inputs
+hash matches its last successful run is skipped and its stored output
+reused, so retries and re-uploads do not repeat LLM calls or e-mails.
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from database.mongodb_client import mongodb_sync
+from database.job_catalogue import job_catalogue
+from utils.logger import log
+
+
+# Job fields the matching step reads or depends on
+MATCHING_JOB_FIELDS = ("job_id", "title", "description", "required_skills", "requirements", "experience_required", "status")
+
+
+def hash_inputs(inputs: Any) -> str:
+    """Stable SHA-256 of JSON-serialisable step inputs"""
+    encoded = json.dumps(inputs, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def resume_fingerprint(resume_text: str, skills: List[str]) -> Dict[str, Any]:
+    """Inputs that describe a candidate's resume content"""
+    return {
+        "resume_sha256": hashlib.sha256((resume_text or "").encode()).hexdigest(),
+        "skills": sorted(skills or [])
+    }
+
+
+class WorkflowRuns:
+    """Step-level workflow state stored in the ``workflow_runs`` collection"""
+
+    @property
+    def collection(self):
+        return mongodb_sync.get_collection("workflow_runs")
+
+    def get_run(self, candidate_email: str) -> Optional[Dict]:
+        """Get the workflow state of a candidate"""
+        return self.collection.find_one({"_id": candidate_email})
+
+    def jobs_fingerprint(self) -> str:
+        """Hash of the job fields matching reads, so matching reruns when jobs change"""
+        return hash_inputs([
+            {key: job.get(key) for key in MATCHING_JOB_FIELDS}
+            for job in job_catalogue.jobs()
+        ])
+
+    def run_step(
+        self,
+        candidate_email: str,
+        step: str,
+        inputs: Any,
+        func: Callable[[], Any]
+    ) -> Any:
+        """Run a step unless it already completed on the same inputs
+
+        A result that is a dict with ``success: False`` is recorded as a
+        failure and not reused.
+
+        Args:
+            candidate_email: Candidate the step runs for
+            step: Step name
+            inputs: JSON-serialisable inputs the step depends on
+            func: Runs the step and returns its output
+
+        Returns:
+            The step output, either fresh or from the last matching run
+        """
+        inputs_hash = hash_inputs(inputs)
+        previous = self._completed_step(candidate_email, step, inputs_hash)
+
+        if previous:
+            log.info(f"Workflow: skipping {step} for {candidate_email}, inputs unchanged")
+            return previous.get("output")
+
+        self._update_step(candidate_email, step, {
+            "status": "running",
+            "inputs_hash": inputs_hash,
+            "started_at": datetime.utcnow()
+        }, inc_attempts=True)
+
+        try:
+            output = func()
+        except Exception as e:
+            self._update_step(candidate_email, step, {"status": "failed", "error": str(e)})
+            raise
+
+        if isinstance(output, dict) and output.get("success") is False:
+            self._update_step(candidate_email, step, {"status": "failed", "error": output.get("error")})
+        else:
+            self._update_step(candidate_email, step, {
+                "status": "completed",
+                "output": output,
+                "error": None,
+                "completed_at": datetime.utcnow()
+            })
+
+        return output
+
+    def completed_output(self, candidate_email: str, step: str, inputs: Any) -> Optional[Any]:
+        """Output of a step's last successful run on the same inputs, or None"""
+        previous = self._completed_step(candidate_email, step, hash_inputs(inputs))
+        return previous.get("output") if previous else None
+
+    def record_step(self, candidate_email: str, step: str, inputs: Any, output: Any):
+        """Record the outcome of a step that was run outside run_step()
+
+        Used where one call serves several candidates, such as batched bias
+        scans. The output is recorded as run_step() would record it.
+        """
+        fields: Dict[str, Any] = {"inputs_hash": hash_inputs(inputs), "started_at": datetime.utcnow()}
+        if isinstance(output, dict) and output.get("success") is False:
+            fields.update({"status": "failed", "error": output.get("error")})
+        else:
+            fields.update({"status": "completed", "output": output, "error": None, "completed_at": datetime.utcnow()})
+        self._update_step(candidate_email, step, fields, inc_attempts=True)
+
+    def _completed_step(self, candidate_email: str, step: str, inputs_hash: str) -> Optional[Dict]:
+        run = self.get_run(candidate_email) or {}
+        previous = run.get("steps", {}).get(step)
+        if previous and previous.get("status") == "completed" and previous.get("inputs_hash") == inputs_hash:
+            return previous
+        return None
+
+    def _update_step(self, candidate_email: str, step: str, fields: Dict, inc_attempts: bool = False):
+        now = datetime.utcnow()
+        update = {
+            "$set": {**{f"steps.{step}.{key}": value for key, value in fields.items()}, "updated_at": now},
+            "$setOnInsert": {"created_at": now}
+        }
+        if inc_attempts:
+            update["$inc"] = {f"steps.{step}.attempts": 1}
+
+        try:
+            self.collection.update_one({"_id": candidate_email}, update, upsert=True)
+        except Exception as e:
+            # Losing the record only costs a repeated step later
+            log.error(f"Failed to record workflow step {step} for {candidate_email}: {e}")
+
+
+# Global instance
+workflow_runs = WorkflowRuns()
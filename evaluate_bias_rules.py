@@ -0,0 +1,172 @@
+# evaluate_bias_rules.py
+"""
+Precision and recall of the local bias pre-screen against LLM labels
+
+Each fixture in data/bias_fixtures.jsonl holds a resume and the label the
+LLM bias scan gives it. A resume counts as positive when the LLM reports
+bias markers, and as predicted positive when utils/bias_rules.py escalates
+it. Recall is what matters: a positive the rules miss is never sent to the
+LLM. The escalation rate is the share of LLM calls still made; it is also
+reported for the negatives alone and per fixture tag, e.g. "dated_degree"
+for resumes that list the years of their degrees, as most real ones do.
+
+The shipped fixtures are hand-labelled ("label_source": "manual") by the
+criteria in the LLM prompt; --relabel replaces the labels with the LLM's
+own, and --from-db adds real candidates labelled the same way.
+
+Usage:
+    python evaluate_bias_rules.py               # score the fixtures
+    python evaluate_bias_rules.py --verbose     # list disagreements
+    python evaluate_bias_rules.py --relabel     # refresh labels from the LLM
+    python evaluate_bias_rules.py --from-db 50  # add 50 labelled candidates
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from utils.bias_rules import prescreen
+
+
+DEFAULT_FIXTURES = Path(__file__).parent / "data" / "bias_fixtures.jsonl"
+
+
+def load_fixtures(path: Path) -> List[Dict]:
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def save_fixtures(path: Path, fixtures: List[Dict]):
+    with open(path, "w") as file:
+        for fixture in fixtures:
+            file.write(json.dumps(fixture) + "\n")
+
+
+def llm_label(resume_text: str) -> Dict:
+    """Label a resume with the LLM bias scan, bypassing the pre-screen"""
+    from agents.compliance_agent import BIAS_SCAN_PROMPT, bias_excerpt
+    from llm.groq_client import groq_client
+
+    scan_result = groq_client.extract_json(BIAS_SCAN_PROMPT.format(excerpt=bias_excerpt(resume_text)))
+    return {
+        "has_bias_markers": bool(scan_result.get("has_bias_markers", False)),
+        "risk_level": scan_result.get("risk_level", "low"),
+        "detected_markers": scan_result.get("detected_markers", [])
+    }
+
+
+def relabel(fixtures: List[Dict]):
+    for index, fixture in enumerate(fixtures, start=1):
+        fixture["label"] = llm_label(fixture["resume_text"])
+        fixture["label_source"] = "llm"
+        print(f"Labelled {index}/{len(fixtures)}: {fixture['id']}")
+
+
+def from_db(fixtures: List[Dict], count: int):
+    """Append candidates not yet in the fixtures, labelled by the LLM"""
+    from database.mongodb_client import mongodb_sync
+
+    known = {fixture["id"] for fixture in fixtures}
+    candidates = mongodb_sync.get_collection("candidates").aggregate([
+        {"$match": {"resume_text": {"$nin": [None, ""]}}},
+        {"$sample": {"size": count * 2}},
+        {"$project": {"email": 1, "resume_text": 1, "resume_file_path": 1}}
+    ])
+    added = 0
+    for candidate in candidates:
+        if added >= count or candidate["email"] in known:
+            continue
+        fixture = {
+            "id": candidate["email"],
+            "resume_text": candidate["resume_text"],
+            "label": llm_label(candidate["resume_text"]),
+            "label_source": "llm"
+        }
+        if candidate.get("resume_file_path"):
+            fixture["resume_file_path"] = candidate["resume_file_path"]
+        fixtures.append(fixture)
+        added += 1
+        print(f"Added {fixture['id']}")
+
+
+def evaluate(fixtures: List[Dict], verbose: bool = False) -> Dict:
+    counts = {"tp": 0, "fp": 0, "fn": 0, "tn": 0}
+    missed_by_risk: Dict[str, int] = {}
+    # tag -> [escalated, total]
+    by_tag: Dict[str, List[int]] = {}
+    elapsed = 0.0
+
+    for fixture in fixtures:
+        started = time.perf_counter()
+        screen = prescreen(fixture["resume_text"], fixture.get("resume_file_path"))
+        elapsed += time.perf_counter() - started
+
+        actual = fixture["label"]["has_bias_markers"]
+        predicted = screen["escalate"]
+        outcome = ("tp" if actual else "fp") if predicted else ("fn" if actual else "tn")
+        counts[outcome] += 1
+        for tag in fixture.get("tags", []):
+            tally = by_tag.setdefault(tag, [0, 0])
+            tally[0] += int(predicted)
+            tally[1] += 1
+
+        if outcome == "fn":
+            risk_level = fixture["label"].get("risk_level", "low")
+            missed_by_risk[risk_level] = missed_by_risk.get(risk_level, 0) + 1
+        if verbose and outcome in ("fp", "fn"):
+            print(f"{outcome.upper()} {fixture['id']}: rules={screen['markers'] or '-'} llm={fixture['label'].get('detected_markers')}")
+
+    escalated = counts["tp"] + counts["fp"]
+    positives = counts["tp"] + counts["fn"]
+    negatives = counts["fp"] + counts["tn"]
+    precision = counts["tp"] / escalated if escalated else 1.0
+    recall = counts["tp"] / positives if positives else 1.0
+    return {
+        **counts,
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        "escalation_rate": escalated / len(fixtures) if fixtures else 0.0,
+        "negative_escalation_rate": counts["fp"] / negatives if negatives else 0.0,
+        "escalation_by_tag": {tag: (hits, total) for tag, (hits, total) in sorted(by_tag.items())},
+        "missed_by_risk": missed_by_risk,
+        "ms_per_resume": elapsed * 1000 / len(fixtures) if fixtures else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the bias pre-screen against LLM labels")
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES, help="JSONL fixture file")
+    parser.add_argument("--relabel", action="store_true", help="Replace every label with the LLM's")
+    parser.add_argument("--from-db", type=int, default=0, metavar="N", help="Add N labelled candidates from the database")
+    parser.add_argument("--verbose", action="store_true", help="Print false positives and misses")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if args.relabel:
+        relabel(fixtures)
+    if args.from_db:
+        from_db(fixtures, args.from_db)
+    if args.relabel or args.from_db:
+        save_fixtures(args.fixtures, fixtures)
+
+    sources = sorted({fixture.get("label_source", "unknown") for fixture in fixtures})
+    result = evaluate(fixtures, args.verbose)
+
+    print(f"\nFixtures:        {len(fixtures)} (labels: {', '.join(sources)})")
+    print(f"Confusion:       tp={result['tp']} fp={result['fp']} fn={result['fn']} tn={result['tn']}")
+    print(f"Precision:       {result['precision']:.3f}")
+    print(f"Recall:          {result['recall']:.3f}")
+    print(f"F1:              {result['f1']:.3f}")
+    print(f"Escalation rate: {result['escalation_rate']:.1%} of resumes still sent to the LLM")
+    print(f"  on negatives:  {result['negative_escalation_rate']:.1%}")
+    for tag, (hits, total) in result["escalation_by_tag"].items():
+        print(f"  on {tag}: {hits}/{total} ({hits / total:.1%})")
+    if result["missed_by_risk"]:
+        print(f"Missed by risk:  {result['missed_by_risk']}")
+    print(f"Pre-screen time: {result['ms_per_resume']:.3f} ms per resume")
+
+
+if __name__ == "__main__":
+    main()
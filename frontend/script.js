@@ -467,7 +467,12 @@ async function handleFileUpload(event) {
             throw new Error(result.detail || 'Upload failed.');
         }
         
-        showNotification(result.message || 'Resume processed!', 'success');
+        const ingestion = await waitForIngestion(result.ingestion_id);
+        if (ingestion.status === 'failed') {
+            throw new Error(ingestion.error || 'Processing failed.');
+        }
+        
+        showNotification(ingestion.result?.message || 'Resume processed!', 'success');
         switchTab('candidates');
     } catch (error) {
         showNotification(`Upload failed: ${error.message}`, 'error');
@@ -477,6 +482,18 @@ async function handleFileUpload(event) {
     }
 }
 
+// Poll a background ingestion until it completes or fails
+async function waitForIngestion(ingestionId, intervalMs = 2000) {
+    while (true) {
+        const data = await fetchData(`/upload/status/${ingestionId}`);
+        const ingestion = data.ingestion;
+        if (ingestion.status === 'completed' || ingestion.status === 'failed') {
+            return ingestion;
+        }
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
 // Job Deletion Handler
 async function handleDeleteJob(jobId) {
     if (!confirm(`Are you sure you want to delete job posting ${jobId}? This action cannot be undone.`)) {
@@ -1,10 +1,16 @@
 # Groq API client
+import threading
 from groq import Groq
 from typing import Optional, List, Dict
 from config.settings import settings
 from utils.logger import log
 
 
+# Caps in-flight LLM requests across every pipeline thread in this process.
+# CPU-bound extraction has its own limit (the text extraction process pool).
+llm_semaphore = threading.BoundedSemaphore(max(1, settings.LLM_MAX_CONCURRENCY))
+
+
 class GroqClient:
     """Groq API client for LLM interactions"""
     
@@ -44,12 +50,13 @@ class GroqClient:
                 "content": prompt
             })
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            with llm_semaphore:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
             
             return response.choices[0].message.content
             
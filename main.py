@@ -1,7 +1,9 @@
 # main.py
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
 import shutil
 import os
@@ -12,14 +14,25 @@ from datetime import datetime
 # Your existing imports
 from config.settings import settings
 from utils.logger import log
+from utils.text_extractor import text_extractor
+from utils.ingestion import ingestion_manager
+from utils.upload_stream import receive_resume_upload, UploadRejected
+from utils.dag import dag_executor
+from utils.log_sink import log_sink
 from database.mongodb_client import mongodb
+from database.task_queue import task_queue
+from database.keyword_index import keyword_index
+from database.system_stats import system_stats, etag_matches
+from database.pipeline_analytics import pipeline_analytics
+from database.compliance_reports import compliance_reports
+from database.repositories import interview_repository
 from mcp.mcp_server import initialize_mcp_server
-from api.routes import upload, jobs, candidates, interviews
+from api.routes import upload, jobs, candidates, interviews, analytics
 from agents.orchestrator_agent import orchestrator
+from agents.bias_scan_consumer import bias_scan_consumer
 
 # Import the new AI Interviewer Agent
 from agents.interview_agent import interview_agent
-from tools.database_tool import database_tool
 
 from fastapi import WebSocket, WebSocketDisconnect
 from agents.interview_agent import interview_agent
@@ -30,10 +43,25 @@ async def lifespan(app: FastAPI):
     """Lifespan event handler for startup and shutdown"""
     log.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     await mongodb.connect()
+    # Bias scans are queued even when the pipeline runs in-process
+    task_queue.ensure_indexes()
+    # Candidates stored before keyword search existed are not in the BM25 index yet
+    await run_in_threadpool(keyword_index.ensure_built)
+    # Reports roll up only a few days themselves; a long backlog is caught up here
+    compliance_reports.rollup.catch_up_in_background()
+    pipeline_analytics.rollup.catch_up_in_background()
+    if not settings.USE_TASK_QUEUE:
+        bias_scan_consumer.start()
     initialize_mcp_server()
     log.info("Application startup complete")
     yield
     log.info("Shutting down application")
+    ingestion_manager.shutdown()
+    dag_executor.shutdown()
+    text_extractor.shutdown()
+    await run_in_threadpool(bias_scan_consumer.shutdown)
+    # After the pipelines stop, so their last log entries are written too
+    await run_in_threadpool(log_sink.shutdown)
     await mongodb.close()
     log.info("Application shutdown complete")
 
@@ -63,36 +91,38 @@ app.include_router(upload.router)
 app.include_router(jobs.router)
 app.include_router(candidates.router)
 app.include_router(interviews.router)
+app.include_router(analytics.router)
 
 # --- File Upload Endpoint (No changes needed) ---
 UPLOADS_DIR = "uploads"
 os.makedirs(UPLOADS_DIR, exist_ok=True)
-@app.post("/upload-resume/", tags=["Resume"])
-async def handle_resume_upload(file: UploadFile = File(...)):
-    # ... (code for this endpoint remains the same)
+@app.post("/upload-resume/", tags=["Resume"], openapi_extra=upload.RESUME_UPLOAD_OPENAPI)
+async def handle_resume_upload(request: Request):
     try:
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        safe_filename = f"{timestamp}_{file.filename.replace(' ', '_')}"
-        file_path = os.path.join(UPLOADS_DIR, safe_filename)
-
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        log.info(f"Resume uploaded and saved to: {file_path}")
-
-        result = orchestrator.process_candidate_application(file_path)
-        
-        if not result.get("success"):
-            raise HTTPException(status_code=400, detail=result.get("error", "Failed to process resume."))
-
-        return {
+        try:
+            received = await receive_resume_upload(request)
+        except UploadRejected as rejected:
+            raise HTTPException(status_code=rejected.status_code, detail=rejected.detail)
+        log.info(f"Resume uploaded and saved to: {received['file_path']}")
+
+        ingestion_id = await run_in_threadpool(
+            ingestion_manager.submit,
+            received["file_path"],
+            filename=received["filename"],
+            content_hash=received["content_hash"]
+        )
+
+        return JSONResponse(status_code=202, content={
             "success": True,
-            "message": result.get("message", "Resume processed successfully."),
-        }
+            "message": "Resume accepted for processing.",
+            "ingestion_id": ingestion_id,
+            "status_url": f"/upload/status/{ingestion_id}"
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         log.error(f"Error during resume upload: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        file.file.close()
 
 
 ### NEW: AI Interview WebSocket Endpoint to prevent the RuntimeError ###
@@ -104,7 +134,7 @@ async def interview_websocket(websocket: WebSocket, interview_id: str):
     connection_closed = False
     try:
         # 1. Fetch the interview from the database
-        interview = database_tool.get_interview_by_id(interview_id)
+        interview = await interview_repository.get(interview_id)
         
         # 2. Check the status of the interview
         if not interview or interview.get("status") != "pending_ai_interview":
@@ -115,7 +145,7 @@ async def interview_websocket(websocket: WebSocket, interview_id: str):
             return
 
         # 1. Start session, get the opening question
-        start_data = interview_agent.get_opening_question(interview['job_id'])
+        start_data = await run_in_threadpool(interview_agent.get_opening_question, interview['job_id'])
         if not start_data.get("success"):
             await websocket.send_json({"type": "error", "text": start_data.get("error")})
             await websocket.close()
@@ -135,27 +165,28 @@ async def interview_websocket(websocket: WebSocket, interview_id: str):
                 tmp_audio.write(audio_bytes)
                 audio_file_path = tmp_audio.name
             
-            candidate_text = interview_agent.transcribe_audio(audio_file_path)
+            candidate_text = await run_in_threadpool(interview_agent.transcribe_audio, audio_file_path)
             os.remove(audio_file_path)
             
             log.info(f"Candidate said: {candidate_text}")
             conversation_history.append({"speaker": "Candidate", "text": candidate_text})
             
-            next_question = interview_agent.get_next_question(conversation_history, job_details)
+            next_question = await run_in_threadpool(interview_agent.get_next_question, conversation_history, job_details)
             conversation_history.append({"speaker": "AI", "text": next_question})
             
             await websocket.send_json({"type": "question", "text": next_question})
 
         # 3. Conclude and evaluate
         await websocket.send_json({"type": "status", "text": "Thank you. The interview is now complete. Please wait while I evaluate your answers..."})
-        evaluation = interview_agent.evaluate_interview(conversation_history, job_details)
+        evaluation = await run_in_threadpool(interview_agent.evaluate_interview, conversation_history, job_details)
         
         # 4. Update the database
-        database_tool._run(action="update", collection="interviews", query={"_id": interview_id}, data={"status": "completed_ai_interview", "evaluation": evaluation, "interview_score": evaluation.get("score", 0), "updated_at": datetime.utcnow()})
+        await interview_repository.update_by_id(interview_id, {"status": "completed_ai_interview", "evaluation": evaluation, "interview_score": evaluation.get("score", 0), "updated_at": datetime.utcnow()})
         log.info(f"Interview {interview_id} evaluation complete. Score: {evaluation.get('score')}")
+        pipeline_analytics.record("interviewed", interview.get("candidate_id"), interview.get("job_id"), interview_score=evaluation.get("score", 0))
         
         # 5. Trigger post-interview decision
-        orchestrator.process_post_interview_decision(interview_id)
+        await run_in_threadpool(orchestrator.process_post_interview_decision, interview_id)
 
         # 6. Send final "thank you" message and wait
         await websocket.send_json({"type": "thank_you", "text": "Evaluation complete. Thank you for your time. The hiring team will be in touch via email."})
@@ -202,41 +233,28 @@ async def health_check():
     return {
         "status": "healthy",
         "database": db_status,
-        "version": settings.APP_VERSION
+        "version": settings.APP_VERSION,
+        # Buffer depth and overflow_writes > 0 mean audit logging is falling behind
+        "log_sink": log_sink.get_stats(),
+        "bias_scan": bias_scan_consumer.get_stats()
     }
 
 
-### FIX: Updated the /stats endpoint to correctly report the vector count ###
 @app.get("/stats")
-async def get_stats():
-    """Get high-level system statistics for the dashboard."""
+async def get_stats(request: Request):
+    """Get high-level system statistics for the dashboard.
+    
+    Served from a short-lived in-memory snapshot; clients that send the
+    snapshot's ETag in If-None-Match get an empty 304 while it is unchanged.
+    """
     try:
-        # Get counts from MongoDB collections
-        candidates_count = await mongodb.db.candidates.count_documents({})
-        jobs_count = await mongodb.db.jobs.count_documents({})
-        interviews_count = await mongodb.db.interviews.count_documents({})
-        
-        # Import the vector_store instance directly
-        from database.vector_store import vector_store
+        snapshot = await system_stats.get()
+        headers = {"ETag": snapshot["etag"], "Cache-Control": "no-cache"}
         
-        # --- The Fix ---
-        # Instead of calling get_stats(), we directly access the `ntotal` property
-        # of the FAISS index object, which is guaranteed to be correct.
-        vector_count = 0
-        if vector_store.index:
-            vector_count = vector_store.index.ntotal
+        if etag_matches(request.headers.get("if-none-match"), snapshot["etag"]):
+            return Response(status_code=304, headers=headers)
         
-        log.info(f"Fetching stats: Candidates={candidates_count}, Jobs={jobs_count}, Interviews={interviews_count}, Vectors={vector_count}")
-
-        return {
-            "success": True,
-            "stats": {
-                "total_candidates": candidates_count,
-                "active_jobs": jobs_count,
-                "interviews_scheduled": interviews_count,
-                "vector_count": vector_count # Pass the correct number to the frontend
-            }
-        }
+        return JSONResponse({"success": True, "stats": snapshot["stats"]}, headers=headers)
     except Exception as e:
         log.error(f"Error fetching stats: {e}")
         raise HTTPException(status_code=500, detail="Could not fetch system statistics.")
@@ -60,7 +60,10 @@ DATABASE_TOOL = MCPToolDefinition(
     parameters={
         "action": {
             "type": "string",
-            "enum": ["insert", "find", "find_one", "update", "delete", "count"],
+            "enum": [
+                "insert", "find", "find_one", "update", "upsert", "update_many", "delete", "count",
+                "bulk_insert", "bulk_upsert", "bulk_update"
+            ],
             "required": True
         },
         "collection": {
@@ -77,6 +80,17 @@ DATABASE_TOOL = MCPToolDefinition(
             "type": "object",
             "description": "Query filter",
             "required": False
+        },
+        "documents": {
+            "type": "array",
+            "description": "Bulk actions: documents to insert, or {query, data, on_insert} per document to upsert/update",
+            "required": False
+        },
+        "ordered": {
+            "type": "boolean",
+            "default": True,
+            "description": "Bulk actions: stop at the first failed operation",
+            "required": False
         }
     },
     returns={
@@ -85,7 +99,9 @@ DATABASE_TOOL = MCPToolDefinition(
             "success": {"type": "boolean"},
             "documents": {"type": "array"},
             "inserted_id": {"type": "string"},
-            "modified_count": {"type": "integer"}
+            "inserted_ids": {"type": "array"},
+            "modified_count": {"type": "integer"},
+            "upserted_count": {"type": "integer"}
         }
     },
     examples=[
@@ -111,7 +127,14 @@ VECTOR_SEARCH_TOOL = MCPToolDefinition(
     parameters={
         "action": {
             "type": "string",
-            "enum": ["add_candidate", "add_job", "search_candidates", "match_jobs"],
+            "enum": [
+                "add_candidate",
+                "add_job",
+                "remove_candidate",
+                "search_candidates",
+                "hybrid_search_candidates",
+                "match_jobs"
+            ],
             "required": True
         },
         "candidate_id": {"type": "string", "required": False},
@@ -0,0 +1,22 @@
+# rebuild_keyword_index.py
+"""
+Rebuild the BM25 keyword index from the candidates collection
+
+The API builds the index on startup only when it has never been saved.
+Run this on a deployment whose index predates some of its candidates, or
+after restoring the database; running processes pick the new index up on
+their next search.
+
+Usage:
+    python rebuild_keyword_index.py
+"""
+from database.keyword_index import keyword_index
+
+
+def main():
+    count = keyword_index.rebuild_from_candidates()
+    print(f"Indexed {count} candidate(s) into {keyword_index.index_path}")
+
+
+if __name__ == "__main__":
+    main()
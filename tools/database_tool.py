@@ -175,6 +175,12 @@
 from crewai.tools import BaseTool
 from typing import Dict, Any, List, Optional
 from database.mongodb_client import mongodb_sync
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from database.job_catalogue import job_catalogue
+from database.job_stats import STATS_FIELDS, job_stats
+from database.leaderboards import job_leaderboards
+from database.unit_of_work import current_unit_of_work, identity_key
 from datetime import datetime
 from utils.logger import log
 import json
@@ -188,20 +194,40 @@ class DatabaseTool(BaseTool):
     - Update candidate scores
     - Query candidates by criteria
     - Save interview records
+    - Bulk insert, upsert or update many documents in one round trip
     """
     
-    def _run(self, action: str, collection: str, data: Optional[Dict] = None, query: Optional[Dict] = None) -> Dict[str, Any]:
+    def _run(
+        self,
+        action: str,
+        collection: str,
+        data: Optional[Dict] = None,
+        query: Optional[Dict] = None,
+        on_insert: Optional[Dict] = None,
+        documents: Optional[List[Dict]] = None,
+        ordered: bool = True
+    ) -> Dict[str, Any]:
         """Execute database operation
         
         Args:
-            action: Operation type (insert, find, update, delete)
+            action: Operation type (insert, find, update, delete, or
+                bulk_insert, bulk_upsert, bulk_update)
             collection: Collection name
             data: Data to insert/update
             query: Query filter
+            on_insert: Fields only written when an upsert creates the document
+            documents: For bulk_insert, the documents to insert. For
+                bulk_upsert / bulk_update, one {"query", "data", "on_insert"}
+                dict per document to write (on_insert is upsert-only)
+            ordered: Bulk writes stop at the first error when True; when
+                False every operation is attempted
         """
         try:
             coll = mongodb_sync.get_collection(collection)
             
+            if action in ("bulk_insert", "bulk_upsert", "bulk_update"):
+                return self._bulk_write(coll, action, documents or [], ordered)
+            
             if action == "insert":
                 result = coll.insert_one(data)
                 return {
@@ -223,9 +249,16 @@ class DatabaseTool(BaseTool):
                 }
             
             elif action == "find_one":
-                document = coll.find_one(query or {})
-                if document and '_id' in document:
-                    document['_id'] = str(document['_id'])
+                def load():
+                    document = coll.find_one(query or {})
+                    if document and '_id' in document:
+                        document['_id'] = str(document['_id'])
+                    return document
+                
+                # Inside a workflow run, each candidate/job/interview is read once
+                uow = current_unit_of_work()
+                key = identity_key(collection, query)
+                document = uow.get(collection, key, load) if uow and key is not None else load()
                 return {
                     "success": True,
                     "document": document
@@ -233,6 +266,7 @@ class DatabaseTool(BaseTool):
             
             elif action == "update":
                 result = coll.update_one(query, {"$set": data})
+                self._invalidate(collection, query)
                 return {
                     "success": True,
                     "matched_count": result.matched_count,
@@ -240,8 +274,22 @@ class DatabaseTool(BaseTool):
                     "message": f"Updated {result.modified_count} document(s)"
                 }
             
+            elif action == "upsert":
+                update = {"$set": data}
+                if on_insert:
+                    update["$setOnInsert"] = on_insert
+                result = coll.update_one(query, update, upsert=True)
+                self._invalidate(collection, query)
+                return {
+                    "success": True,
+                    "matched_count": result.matched_count,
+                    "modified_count": result.modified_count,
+                    "upserted_id": str(result.upserted_id) if result.upserted_id else None
+                }
+            
             elif action == "update_many":
                 result = coll.update_many(query, {"$set": data})
+                self._invalidate(collection, query)
                 return {
                     "success": True,
                     "matched_count": result.matched_count,
@@ -250,6 +298,7 @@ class DatabaseTool(BaseTool):
             
             elif action == "delete":
                 result = coll.delete_one(query)
+                self._invalidate(collection, query)
                 return {
                     "success": True,
                     "deleted_count": result.deleted_count
@@ -269,44 +318,156 @@ class DatabaseTool(BaseTool):
             log.error(f"Database operation error: {e}")
             return {"success": False, "error": str(e)}
     
+    def _bulk_write(self, coll, action: str, documents: List[Dict], ordered: bool) -> Dict[str, Any]:
+        """Run a bulk action as a single bulk_write
+        
+        Returns:
+            Counts of the write. On a partial failure success is False and
+            failed_indexes lists the positions in ``documents`` that failed;
+            with ordered=True everything after the first failure was skipped.
+        """
+        if not documents:
+            return {"success": True, "inserted_count": 0, "matched_count": 0, "modified_count": 0, "upserted_count": 0, "upserted_ids": {}}
+        
+        if action == "bulk_insert":
+            operations = [InsertOne(document) for document in documents]
+        else:
+            operations = []
+            for item in documents:
+                update = {"$set": item["data"]}
+                if action == "bulk_upsert" and item.get("on_insert"):
+                    update["$setOnInsert"] = item["on_insert"]
+                operations.append(UpdateOne(item["query"], update, upsert=action == "bulk_upsert"))
+        
+        try:
+            result = coll.bulk_write(operations, ordered=ordered)
+            details = result.bulk_api_result
+            failed_indexes = []
+        except BulkWriteError as e:
+            details = e.details
+            failed_indexes = [error["index"] for error in details.get("writeErrors", [])]
+            log.error(f"Bulk write to {coll.name}: {len(failed_indexes)} of {len(operations)} operation(s) failed")
+        finally:
+            if action != "bulk_insert":
+                for item in documents:
+                    self._invalidate(coll.name, item["query"])
+        
+        response = {
+            "success": not failed_indexes,
+            "inserted_count": details.get("nInserted", 0),
+            "matched_count": details.get("nMatched", 0),
+            "modified_count": details.get("nModified", 0),
+            "upserted_count": details.get("nUpserted", 0),
+            # Position in `documents` -> _id of the document the upsert created
+            "upserted_ids": {entry["index"]: str(entry["_id"]) for entry in details.get("upserted", [])}
+        }
+        if action == "bulk_insert":
+            # InsertOne sets _id on each document; an ordered write stops at
+            # its first failure
+            skipped = set(failed_indexes)
+            if ordered and failed_indexes:
+                skipped = set(range(failed_indexes[0], len(documents)))
+            response["inserted_ids"] = [
+                str(document["_id"]) for index, document in enumerate(documents) if index not in skipped
+            ]
+        if failed_indexes:
+            response["failed_indexes"] = failed_indexes
+            response["error"] = details["writeErrors"][0].get("errmsg")
+        return response
+    
+    def _invalidate(self, collection: str, query: Optional[Dict]):
+        """Drop cached copies a write may have changed"""
+        uow = current_unit_of_work()
+        if uow:
+            uow.invalidate(collection, identity_key(collection, query))
+    
     def save_candidate(self, candidate_data: Dict) -> Dict[str, Any]:
-        """Save candidate to database"""
-        candidate_data['uploaded_at'] = datetime.utcnow()
-        candidate_data['updated_at'] = datetime.utcnow()
-        candidate_data['status'] = 'pending'
+        """Save candidate to database
         
-        return self._run(
-            action="insert",
+        Upserts on email, so a re-upload updates the profile instead of
+        failing on the unique index. Status, score and matches are only set
+        for new candidates; later workflow steps update them as needed.
+        Candidates without an email are rejected rather than merged into
+        one document.
+        """
+        if not candidate_data.get("email"):
+            return {"success": False, "error": "Candidate has no email address"}
+        
+        now = datetime.utcnow()
+        on_insert = {
+            'uploaded_at': now,
+            'status': 'pending',
+            'score': candidate_data.pop('score', None),
+            'matched_jobs': candidate_data.pop('matched_jobs', [])
+        }
+        candidate_data['updated_at'] = now
+        
+        result = self._run(
+            action="upsert",
             collection="candidates",
-            data=candidate_data
+            query={"email": candidate_data["email"]},
+            data=candidate_data,
+            on_insert=on_insert
         )
+        if not result.get("success"):
+            return result
+        
+        created = result.get("upserted_id") is not None
+        if created:
+            candidate_id = result["upserted_id"]
+        else:
+            existing = self._run(action="find_one", collection="candidates", query={"email": candidate_data["email"]})
+            candidate_id = (existing.get("document") or {}).get("_id")
+        
+        return {
+            "success": True,
+            "inserted_id": candidate_id,
+            "created": created,
+            "message": "Candidate created" if created else "Candidate updated"
+        }
     
     def update_candidate_score(self, email: str, score: float, matched_jobs: List[str]) -> Dict[str, Any]:
-        """Update candidate score and matched jobs"""
-        return self._run(
-            action="update",
-            collection="candidates",
-            query={"email": email},
-            data={
-                "score": score,
-                "matched_jobs": matched_jobs,
-                "updated_at": datetime.utcnow()
-            }
-        )
+        """Update candidate score and matched jobs, and the job leaderboards and statistics with them"""
+        result = self._update_candidate(email, {
+            "score": score,
+            "matched_jobs": matched_jobs,
+            "updated_at": datetime.utcnow()
+        })
+        if result.get("success"):
+            job_leaderboards.refresh_candidate(email)
+        return result
+    
+    def update_candidate_status(self, email: str, status: str) -> Dict[str, Any]:
+        """Update candidate status, and the job statistics with it"""
+        return self._update_candidate(email, {"status": status, "updated_at": datetime.utcnow()})
+    
+    def _update_candidate(self, email: str, data: Dict) -> Dict[str, Any]:
+        """Update a candidate and apply the change to its jobs' statistics"""
+        try:
+            previous = mongodb_sync.get_collection("candidates").find_one_and_update(
+                {"email": email},
+                {"$set": data},
+                projection=STATS_FIELDS,
+                return_document=ReturnDocument.BEFORE
+            )
+            self._invalidate("candidates", {"email": email})
+        except Exception as e:
+            log.error(f"Database operation error: {e}")
+            return {"success": False, "error": str(e)}
+        
+        if previous is None:
+            return {"success": True, "matched_count": 0, "modified_count": 0, "message": "Updated 0 document(s)"}
+        
+        job_stats.record_change(previous, {**previous, **data})
+        return {"success": True, "matched_count": 1, "modified_count": 1, "message": "Updated 1 document(s)"}
     
     ### FIX: This method now fetches ALL jobs, solving the "score 0" issue. ###
     def get_active_jobs(self) -> List[Dict]:
         """
         Get all job postings. The incorrect 'status: active' filter was removed.
+        Served from the in-process job catalogue, which reloads when jobs change.
         """
-        log.info("Fetching all job postings from the database.")
-        # An empty query `{}` fetches all documents.
-        result = self._run(
-            action="find",
-            collection="jobs",
-            query={}
-        )
-        return result.get("documents", [])
+        return job_catalogue.jobs()
     
     def get_job_by_id(self, job_id: str) -> Optional[Dict]:
         """Get job by ID"""
@@ -328,17 +489,8 @@ class DatabaseTool(BaseTool):
         return result.get("document")
 
     def get_top_candidates(self, job_id: str, limit: int = 10) -> List[Dict]:
-        """Get top scoring candidates for a job"""
-        result = self._run(
-            action="find",
-            collection="candidates",
-            query={"matched_jobs": job_id}
-        )
-        
-        candidates = result.get("documents", [])
-        # Sort by score
-        candidates.sort(key=lambda x: x.get('score', 0), reverse=True)
-        return candidates[:limit]
+        """Get top scoring candidates for a job (_id, email, name and score)"""
+        return job_leaderboards.top(job_id, limit)
     
     def save_interview(self, interview_data: Dict) -> Dict[str, Any]:
         """Save interview record"""
@@ -1,14 +1,39 @@
 # Tool: Parse resume files
 from crewai.tools import BaseTool
-from typing import Dict, Any
-import PyPDF2
-import docx
+from typing import Dict, Any, List, Optional
 import re
 from pathlib import Path
 from utils.logger import log
+from utils.text_extractor import text_extractor
+from utils.resume_rules import split_sections, match_skills, calculate_experience_years, guess_name
 from llm.groq_client import groq_client
 
 
+# Fields the LLM may be asked for, with the resume sections that answer them
+LLM_FIELDS = ["name", "skills", "experience_years", "education", "previous_roles"]
+
+FIELD_DESCRIPTIONS = {
+    "name": "Full name of the candidate",
+    "skills": "List of technical skills",
+    "experience_years": "Total years of professional experience (as a number)",
+    "education": "List of education entries with degree, institution, and year",
+    "previous_roles": "List of previous job roles with title, company, and duration"
+}
+
+FIELD_SECTIONS = {
+    "name": ["header"],
+    "skills": ["skills", "experience", "projects"],
+    "experience_years": ["experience"],
+    "education": ["education"],
+    "previous_roles": ["experience"]
+}
+
+# A gazetteer hit-list shorter than this is not trusted on its own
+MIN_GAZETTEER_SKILLS = 3
+
+MAX_LLM_RESUME_CHARS = 6000
+
+
 class ResumeParserTool(BaseTool):
     name: str = "Resume Parser"
     description: str = """Parses resume files (PDF, DOCX) and extracts structured information including:
@@ -19,17 +44,31 @@ class ResumeParserTool(BaseTool):
     - Years of experience
     """
     
-    def _run(self, file_path: str) -> Dict[str, Any]:
-        """Parse resume file and extract information"""
+    def _run(self, file_path: str, resume_text: Optional[str] = None) -> Dict[str, Any]:
+        """Parse resume file and extract information
+        
+        Args:
+            file_path: Path to resume file
+            resume_text: Text already extracted by the caller (e.g. a batch
+                that ran extraction across the process pool up front)
+        """
         try:
             # Extract text from file
-            text = self._extract_text(file_path)
+            text = resume_text or self._extract_text(file_path)
             
             if not text:
                 return {"error": "Could not extract text from resume"}
             
-            # Use LLM to parse resume
-            parsed_data = self._parse_with_llm(text)
+            # Extract what we can locally, then ask the LLM only for the rest
+            sections = split_sections(text)
+            parsed_data = self._parse_locally(sections)
+            missing_fields = [field for field in LLM_FIELDS if not parsed_data.get(field)]
+            
+            if missing_fields:
+                llm_data = self._parse_with_llm(sections, missing_fields, text)
+                for field in missing_fields:
+                    if llm_data.get(field):
+                        parsed_data[field] = llm_data[field]
             
             # Extract basic contact info with regex
             email = self._extract_email(text)
@@ -38,8 +77,8 @@ class ResumeParserTool(BaseTool):
             # Combine results
             result = {
                 "resume_text": text,
-                "email": email or parsed_data.get("email", ""),
-                "phone": phone or parsed_data.get("phone", ""),
+                "email": email,
+                "phone": phone,
                 "name": parsed_data.get("name", ""),
                 "skills": parsed_data.get("skills", []),
                 "experience_years": parsed_data.get("experience_years", 0),
@@ -55,33 +94,14 @@ class ResumeParserTool(BaseTool):
             return {"error": str(e)}
     
     def _extract_text(self, file_path: str) -> str:
-        """Extract text from PDF or DOCX file"""
+        """Extract text from PDF or DOCX file in the extraction process pool"""
         file_ext = Path(file_path).suffix.lower()
         
-        try:
-            if file_ext == '.pdf':
-                return self._extract_from_pdf(file_path)
-            elif file_ext in ['.docx', '.doc']:
-                return self._extract_from_docx(file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {file_ext}")
-        except Exception as e:
-            log.error(f"Error extracting text: {e}")
+        if file_ext not in ['.pdf', '.docx', '.doc']:
+            log.error(f"Error extracting text: Unsupported file format: {file_ext}")
             return ""
-    
-    def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF"""
-        text = ""
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-        return text
-    
-    def _extract_from_docx(self, file_path: str) -> str:
-        """Extract text from DOCX"""
-        doc = docx.Document(file_path)
-        return "\n".join([para.text for para in doc.paragraphs])
+        
+        return text_extractor.extract(file_path)
     
     def _extract_email(self, text: str) -> str:
         """Extract email using regex"""
@@ -95,17 +115,47 @@ class ResumeParserTool(BaseTool):
         matches = re.findall(phone_pattern, text)
         return matches[0] if matches else ""
     
-    def _parse_with_llm(self, text: str) -> Dict[str, Any]:
-        """Use LLM to parse resume text"""
-        prompt = f"""Parse the following resume and extract structured information. Return a JSON object with these fields:
-- name: Full name of the candidate
-- skills: List of technical skills
-- experience_years: Total years of professional experience (as a number)
-- education: List of education entries with degree, institution, and year
-- previous_roles: List of previous job roles with title, company, and duration
+    def _parse_locally(self, sections: Dict[str, str]) -> Dict[str, Any]:
+        """Rule-based extraction of the fields that do not need an LLM"""
+        parsed = {}
+        
+        name = guess_name(sections.get("header", ""))
+        if name:
+            parsed["name"] = name
+        
+        # Prefer the skills section; fall back to the whole resume when it is thin
+        skills = match_skills(sections.get("skills", ""))
+        if len(skills) < MIN_GAZETTEER_SKILLS:
+            skills = match_skills("\n".join(sections.values()))
+        if len(skills) >= MIN_GAZETTEER_SKILLS:
+            parsed["skills"] = skills
+        
+        experience_years = calculate_experience_years(sections.get("experience", ""))
+        if experience_years is not None:
+            parsed["experience_years"] = experience_years
+        
+        log.debug(f"Local resume pass found: {', '.join(parsed.keys()) or 'nothing'}")
+        return parsed
+    
+    def _parse_with_llm(self, sections: Dict[str, str], fields: List[str], text: str) -> Dict[str, Any]:
+        """Use LLM to fill the fields the local pass could not
+        
+        Only the sections relevant to the requested fields are sent. If none
+        of them were found the resume text is sent, capped in length.
+        """
+        excerpt_parts = []
+        for section in dict.fromkeys(s for field in fields for s in FIELD_SECTIONS[field]):
+            if sections.get(section):
+                excerpt_parts.append(f"[{section.upper()}]\n{sections[section]}")
+        
+        excerpt = "\n\n".join(excerpt_parts) if excerpt_parts else text[:MAX_LLM_RESUME_CHARS]
+        field_lines = "\n".join(f"- {field}: {FIELD_DESCRIPTIONS[field]}" for field in fields)
+        
+        prompt = f"""Extract the following fields from this resume. Return a JSON object with only these fields:
+{field_lines}
 
 Resume:
-{text}
+{excerpt[:MAX_LLM_RESUME_CHARS]}
 
 Return ONLY valid JSON, no other text."""
 
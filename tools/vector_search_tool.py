@@ -2,7 +2,10 @@
 from crewai.tools import BaseTool
 from typing import Dict, Any, List
 from database.vector_store import vector_store
+from database.keyword_index import keyword_index, candidate_search_text
+from database.job_catalogue import job_catalogue, job_search_text, normalise_skills
 from llm.embeddings import embedding_model
+from config.settings import settings
 from utils.logger import log
 import numpy as np
 
@@ -19,12 +22,20 @@ class VectorSearchTool(BaseTool):
     def _run(self, action: str, **kwargs) -> Dict[str, Any]:
         """Execute vector search operation"""
         try:
+            # Task-queue workers save the indexes from other processes
+            vector_store.reload_if_changed()
+            keyword_index.reload_if_changed()
+            
             if action == "add_candidate":
                 return self._add_candidate(kwargs)
             elif action == "add_job":
                 return self._add_job(kwargs)
+            elif action == "remove_candidate":
+                return self._remove_candidate(kwargs)
             elif action == "search_candidates":
                 return self._search_candidates(kwargs)
+            elif action == "hybrid_search_candidates":
+                return self._hybrid_search_candidates(kwargs)
             elif action == "match_jobs":
                 return self._match_jobs(kwargs)
             elif action == "get_stats":
@@ -43,13 +54,15 @@ class VectorSearchTool(BaseTool):
         skills = params.get("skills", [])
         
         # Create searchable text
-        searchable_text = f"{text} Skills: {', '.join(skills)}"
+        searchable_text = candidate_search_text(text, skills)
         
         # Generate embedding
         embedding = embedding_model.encode(searchable_text)
         
-        # Add to vector store
-        vector_store.add_vectors(
+        # Replace any earlier vectors so re-indexing (e.g. a retried task) is idempotent
+        vector_store.replace_vectors(
+            "candidate",
+            candidate_id,
             vectors=embedding.reshape(1, -1),
             metadata=[{
                 "type": "candidate",
@@ -59,14 +72,35 @@ class VectorSearchTool(BaseTool):
             }]
         )
         
-        # Save index
+        # Keep the keyword index in step with the vector index
+        keyword_index.add_document(candidate_id, searchable_text)
+        
+        # Save indexes
         vector_store.save_index()
+        keyword_index.save_index()
         
         return {
             "success": True,
             "message": f"Added candidate {candidate_id} to vector store"
         }
     
+    def _remove_candidate(self, params: Dict) -> Dict[str, Any]:
+        """Remove candidate from vector and keyword indexes"""
+        candidate_id = params.get("candidate_id")
+        
+        removed_vectors = vector_store.remove_vectors("candidate", candidate_id)
+        removed_keywords = keyword_index.remove_document(candidate_id)
+        
+        vector_store.save_index()
+        keyword_index.save_index()
+        
+        return {
+            "success": True,
+            "removed_vectors": removed_vectors,
+            "removed_keywords": removed_keywords,
+            "message": f"Removed candidate {candidate_id} from search indexes"
+        }
+    
     def _add_job(self, params: Dict) -> Dict[str, Any]:
         """Add job to vector store"""
         job_id = params.get("job_id")
@@ -75,7 +109,7 @@ class VectorSearchTool(BaseTool):
         required_skills = params.get("required_skills", [])
         
         # Create searchable text
-        searchable_text = f"{title}. {description} Required Skills: {', '.join(required_skills)}"
+        searchable_text = job_search_text(title, description, required_skills)
         
         # Generate embedding
         embedding = embedding_model.encode(searchable_text)
@@ -104,14 +138,18 @@ class VectorSearchTool(BaseTool):
         """Search for candidates similar to query"""
         query = params.get("query", "")
         k = params.get("k", 5)
+        candidate_ids = params.get("candidate_ids")
         
         # Generate query embedding
         query_embedding = embedding_model.encode(query)
         
-        # Search
-        results = vector_store.search(query_embedding, k=k * 2)  # Get more to filter
+        # Search candidates only (jobs share the index), optionally within a set of ids
+        results = vector_store.search(
+            query_embedding,
+            k=k,
+            keep=lambda meta: meta.get("type") == "candidate" and (candidate_ids is None or meta.get("id") in candidate_ids)
+        )
         
-        # Filter for candidates only
         candidate_results = [
             {
                 "candidate_id": result[0]["id"],
@@ -120,8 +158,7 @@ class VectorSearchTool(BaseTool):
                 "text": result[0].get("text", "")
             }
             for result in results
-            if result[0].get("type") == "candidate"
-        ][:k]
+        ]
         
         return {
             "success": True,
@@ -129,6 +166,52 @@ class VectorSearchTool(BaseTool):
             "count": len(candidate_results)
         }
     
+    def _hybrid_search_candidates(self, params: Dict) -> Dict[str, Any]:
+        """Search candidates with BM25 and vectors, fused by reciprocal rank
+        
+        ``candidate_ids`` (optional) restricts both searches to those
+        candidates, so filtered queries rank only matching candidates.
+        """
+        query = params.get("query", "")
+        k = params.get("k", settings.HYBRID_SEARCH_POOL_SIZE)
+        rrf_k = params.get("rrf_k", settings.HYBRID_SEARCH_RRF_K)
+        candidate_ids = params.get("candidate_ids")
+        
+        dense_results = self._search_candidates({"query": query, "k": k, "candidate_ids": candidate_ids})["results"]
+        sparse_results = keyword_index.search(query, k=k, doc_ids=candidate_ids)
+        
+        fused: Dict[str, Dict[str, Any]] = {}
+        
+        def contribute(candidate_id: str, rank: int, source: str, score: float):
+            entry = fused.setdefault(candidate_id, {
+                "candidate_id": candidate_id,
+                "score": 0.0,
+                "vector_rank": None,
+                "vector_score": None,
+                "keyword_rank": None,
+                "keyword_score": None
+            })
+            # A candidate can have several vectors after re-uploads; only its best rank counts
+            if entry[f"{source}_rank"] is not None:
+                return
+            entry[f"{source}_rank"] = rank
+            entry[f"{source}_score"] = score
+            entry["score"] += 1.0 / (rrf_k + rank)
+        
+        for rank, result in enumerate(dense_results, start=1):
+            contribute(result["candidate_id"], rank, "vector", result["score"])
+        
+        for rank, (candidate_id, score) in enumerate(sparse_results, start=1):
+            contribute(candidate_id, rank, "keyword", score)
+        
+        results = sorted(fused.values(), key=lambda x: x["score"], reverse=True)[:k]
+        
+        return {
+            "success": True,
+            "results": results,
+            "count": len(results)
+        }
+    
     def _match_jobs(self, params: Dict) -> Dict[str, Any]:
         """Match jobs to a candidate profile"""
         candidate_text = params.get("candidate_text", "")
@@ -139,22 +222,27 @@ class VectorSearchTool(BaseTool):
         query = f"{candidate_text} Skills: {', '.join(skills)}"
         
         # Generate embedding
-        query_embedding = embedding_model.encode(query)
-        
-        # Search
-        results = vector_store.search(query_embedding, k=k * 2)
-        
-        # Filter for jobs only
-        job_results = [
-            {
-                "job_id": result[0]["id"],
-                "title": result[0].get("title", ""),
-                "match_score": result[1],
-                "required_skills": result[0].get("required_skills", [])
-            }
-            for result in results
-            if result[0].get("type") == "job"
-        ][:k]
+        query_embedding = embedding_model.encode(query)[0]
+        query_embedding = query_embedding / (np.linalg.norm(query_embedding) or 1)
+        
+        # Score every job against the cached job embeddings; searching the
+        # shared index for jobs could return only candidates
+        job_ids, job_embeddings = job_catalogue.embeddings()
+        scores = job_embeddings @ query_embedding
+        candidate_skills = normalise_skills(skills)
+        
+        job_results = []
+        for position in np.argsort(-scores)[:k]:
+            job = job_catalogue.get(job_ids[position])
+            if not job:
+                continue
+            job_results.append({
+                "job_id": job["job_id"],
+                "title": job.get("title", ""),
+                "match_score": float(scores[position]),
+                "required_skills": job.get("required_skills", []),
+                "matched_skills": sorted(candidate_skills & job_catalogue.skills(job["job_id"]))
+            })
         
         return {
             "success": True,
@@ -0,0 +1,209 @@
+# Rule-based bias marker pre-screen
+"""
+Local detector for protected-attribute markers in resumes, run before the
+LLM bias scan
+
+- Keyword gazetteers (gender, religion, marital status, nationality,
+  physical characteristics), each compiled into one regex alternation as
+  the skills gazetteer in utils/resume_rules.py is
+- Gendered groups ("women's cricket team") and body measurements
+  ("Weight: 70 kg"), which need context: "women's apparel" or "weight
+  decay" alone are not markers
+- Birth date / age patterns
+- Graduation years called out outside the education section ("graduated
+  in 1989"). The dates of listed degrees are not markers: nearly every
+  resume has them, and the LLM scan is told the same
+- Photos embedded in the first pages of a PDF or in a DOCX
+
+A resume without hits is low risk and needs no LLM call; one with hits is
+escalated to the LLM, which judges whether the hits matter. The detector
+is tuned for recall: evaluate_bias_rules.py measures it against LLM labels
+on data/bias_fixtures.jsonl.
+"""
+import re
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional
+from utils.resume_rules import split_sections
+
+
+MARKER_GAZETTEER = {
+    "gender": [
+        "he/him", "she/her", "they/them", "he/his", "she/hers", "pronouns",
+        "gender", "male", "female", "mr.", "mrs.", "ms.",
+        "transgender", "non-binary", "nonbinary",
+    ],
+    "religion": [
+        "religion", "religious", "christian", "catholic", "protestant", "muslim",
+        "islam", "islamic", "hindu", "hinduism", "jewish", "judaism", "buddhist",
+        "sikh", "church", "mosque", "synagogue", "gurudwara", "parish",
+        "bible study", "quran",
+    ],
+    "marital_status": [
+        "marital status", "married", "unmarried", "divorced", "widowed",
+        "spouse", "husband", "wife", "maiden name", "father of", "mother of",
+        "no. of children", "number of children", "dependents",
+    ],
+    "nationality": [
+        "nationality", "citizenship", "ethnicity", "ethnic origin", "caste",
+        "place of birth", "native of", "passport no",
+    ],
+    "physical": [
+        "blood group", "disability", "disabled",
+        "wheelchair", "physically challenged", "health status",
+    ],
+}
+
+_ALIAS_TO_CATEGORY = {
+    alias: category
+    for category, aliases in MARKER_GAZETTEER.items()
+    for alias in aliases
+}
+
+# Longest aliases first so "she/hers" wins over "she/her"
+_MARKER_PATTERN = re.compile(
+    r"(?<![\w-])("
+    + "|".join(re.escape(alias) for alias in sorted(_ALIAS_TO_CATEGORY, key=len, reverse=True))
+    + r")(?![\w-])",
+    re.IGNORECASE
+)
+
+_GENDERED_GROUP_PATTERN = re.compile(
+    r"\b(?:wo)?men'?s?\s+(?:[\w-]+\s+){0,2}?(?:team|club|society|association|network|chapter|hostel|college|league|squad)\b"
+    r"|\b(?:society|association|network|forum)\s+(?:for|of)\s+women\b|\bwomen\s+in\s+\w+",
+    re.IGNORECASE
+)
+
+_MEASUREMENT_PATTERN = re.compile(r"\b(height|weight)\s*[:\-]?\s*\d", re.IGNORECASE)
+
+_AGE_PATTERN = re.compile(
+    r"\b(?:date\s+of\s+birth|d\.?o\.?b\.?|birth\s*date|birthday|born\s+(?:on|in)"
+    r"|age\s*[:\-]\s*\d{2}|\d{2}\s*(?:years?|yrs?)\s+old)\b",
+    re.IGNORECASE
+)
+
+_YEAR = r"(?:19[5-9]\d|20[0-4]\d)"
+_GRADUATION_PATTERN = re.compile(
+    rf"\b(?:graduat\w*|class\s+of|batch\s+of|passed\s+out|passing\s+year|year\s+of\s+passing)\D{{0,20}}({_YEAR})\b",
+    re.IGNORECASE
+)
+
+# Embedded images at least this large on both sides may be a photo; icons
+# and divider lines are smaller
+PHOTO_MIN_SIDE = 96
+PHOTO_MAX_ASPECT = 2.0
+PHOTO_PAGES = 2
+
+
+def find_markers(resume_text: str) -> Dict[str, List[str]]:
+    """Find bias marker mentions in resume text
+
+    Args:
+        resume_text: Raw resume text
+
+    Returns:
+        Dictionary of category to the distinct terms found, in order of
+        first mention; empty if none
+    """
+    text = resume_text or ""
+    found: Dict[str, List[str]] = {}
+
+    def add(category: str, term: str):
+        terms = found.setdefault(category, [])
+        if term not in terms:
+            terms.append(term)
+
+    for match in _MARKER_PATTERN.finditer(text):
+        term = match.group(1).lower()
+        add(_ALIAS_TO_CATEGORY[term], term)
+
+    for match in _GENDERED_GROUP_PATTERN.finditer(text):
+        add("gender", re.sub(r"\s+", " ", match.group(0).lower()))
+
+    for match in _MEASUREMENT_PATTERN.finditer(text):
+        add("physical", match.group(1).lower())
+
+    for match in _AGE_PATTERN.finditer(text):
+        add("age", re.sub(r"\s+", " ", match.group(0).lower()))
+
+    # Degree dates in the education section are not markers, only years called out elsewhere
+    outside_education = "\n".join(
+        section_text for name, section_text in split_sections(text).items() if name != "education"
+    )
+    for match in _GRADUATION_PATTERN.finditer(outside_education):
+        add("graduation_year", match.group(1))
+
+    return found
+
+
+def _pdf_has_photo(file_path: str) -> bool:
+    import PyPDF2
+
+    def images_in(resources, depth: int) -> bool:
+        resources = resources.get_object() if resources else {}
+        xobjects = resources.get("/XObject")
+        xobjects = xobjects.get_object() if xobjects else {}
+        for reference in xobjects.values():
+            xobject = reference.get_object()
+            subtype = xobject.get("/Subtype")
+            if subtype == "/Image":
+                width, height = int(xobject.get("/Width", 0)), int(xobject.get("/Height", 0))
+                if min(width, height) >= PHOTO_MIN_SIDE and max(width, height) <= PHOTO_MAX_ASPECT * min(width, height):
+                    return True
+            elif subtype == "/Form" and depth < 3 and images_in(xobject.get("/Resources"), depth + 1):
+                return True
+        return False
+
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        return any(images_in(page.get("/Resources"), 0) for page in reader.pages[:PHOTO_PAGES])
+
+
+def _docx_has_photo(file_path: str) -> bool:
+    with zipfile.ZipFile(file_path) as archive:
+        return any(name.startswith("word/media/") for name in archive.namelist())
+
+
+def has_photo(file_path: Optional[str]) -> bool:
+    """Whether a resume file embeds an image that may be a personal photo
+
+    Only image objects are inspected, nothing is decoded. Unreadable or
+    missing files count as having no photo.
+    """
+    if not file_path or not Path(file_path).is_file():
+        return False
+    suffix = Path(file_path).suffix.lower()
+    try:
+        if suffix == '.pdf':
+            return _pdf_has_photo(file_path)
+        if suffix == '.docx':
+            return _docx_has_photo(file_path)
+    except Exception:
+        pass
+    return False
+
+
+def prescreen(resume_text: str, file_path: Optional[str] = None) -> Dict:
+    """Decide locally whether a resume needs an LLM bias scan
+
+    Args:
+        resume_text: Raw resume text
+        file_path: Stored resume file, checked for photos (optional)
+
+    Returns:
+        Dictionary with escalate, markers (category -> terms) and a scan
+        result in the LLM scan's format for resumes that are not escalated
+    """
+    markers = find_markers(resume_text)
+    if has_photo(file_path):
+        markers["photo"] = ["embedded image"]
+
+    result = {"escalate": bool(markers), "markers": markers}
+    if not markers:
+        result["scan_result"] = {
+            "has_bias_markers": False,
+            "detected_markers": [],
+            "recommendations": [],
+            "risk_level": "low"
+        }
+    return result
@@ -0,0 +1,206 @@
+# Workflow DAG execution
+"""
+Small DAG executor for running independent workflow steps concurrently
+
+Each step declares the steps it depends on and starts as soon as those have
+completed. Steps run on a shared thread pool with their own timeout,
+counted from when a thread picks the step up; a step that fails or times
+out only takes down the steps that depend on it. Every run reports
+per-step timings and the critical path that bounded its latency.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from config.settings import settings
+from utils.logger import log
+
+
+STEP_STATUSES = ('completed', 'failed', 'timed_out', 'skipped')
+
+# (step, status, detail) hook, matching the orchestrator's progress callback
+EventCallback = Callable[[str, str, Optional[Dict]], None]
+
+
+class DagStep:
+    """A unit of work in a workflow DAG"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        depends_on: Iterable[str] = (),
+        timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            name: Unique step name
+            func: Called with the results of the steps it depends on, keyed
+                by step name
+            depends_on: Names of steps that must complete first
+            timeout: Seconds the step may run before it is abandoned
+        """
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+
+
+class DagExecutor:
+    """Runs DagSteps on a shared thread pool"""
+
+    def __init__(self):
+        self.max_workers = settings.DAG_MAX_WORKERS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dag")
+            return self._executor
+
+    def run(self, steps: List[DagStep], on_event: Optional[EventCallback] = None) -> Dict[str, Any]:
+        """Run a DAG of steps to completion
+
+        Args:
+            steps: Steps to run; dependencies must name steps in this list
+            on_event: Called when a step starts, completes, fails, times
+                out or is skipped (optional)
+
+        Returns:
+            Dictionary with results, errors, statuses, per-step timings,
+            the critical path and the total latency
+        """
+        by_name = {step.name: step for step in steps}
+        for step in steps:
+            missing = [dep for dep in step.depends_on if dep not in by_name]
+            if missing:
+                raise ValueError(f"Step {step.name} depends on unknown step(s): {', '.join(missing)}")
+
+        def emit(name: str, status: str, detail: Optional[Dict] = None):
+            if on_event:
+                try:
+                    on_event(name, status, detail)
+                except Exception as e:
+                    log.warning(f"DAG event callback failed for step {name}: {e}")
+
+        executor = self._get_executor()
+        run_start = time.monotonic()
+        results: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        statuses: Dict[str, str] = {}
+        timings: Dict[str, Dict[str, float]] = {}
+        running: Dict[Future, str] = {}
+        # When each step's thread picked it up; a timeout only counts from there
+        started: Dict[str, float] = {}
+        pending = list(steps)
+
+        def execute(step: DagStep, inputs: Dict[str, Any]) -> Any:
+            started[step.name] = time.monotonic()
+            return step.func(inputs)
+
+        def deadline(name: str, now: float) -> float:
+            # A step still queued behind a saturated pool cannot time out before now + timeout
+            return started.get(name, now) + by_name[name].timeout
+
+        def settle(name: str, status: str, error: Optional[str] = None):
+            statuses[name] = status
+            timings.setdefault(name, {"start": time.monotonic() - run_start})
+            timings[name]["end"] = time.monotonic() - run_start
+            timings[name]["duration"] = timings[name]["end"] - timings[name]["start"]
+            if error:
+                errors[name] = error
+            emit(name, status, {"error": error} if error else None)
+
+        while pending or running:
+            # Start every step whose dependencies are settled
+            for step in list(pending):
+                dep_statuses = [statuses.get(dep) for dep in step.depends_on]
+                if any(status is None for status in dep_statuses):
+                    continue
+                pending.remove(step)
+
+                if any(status != "completed" for status in dep_statuses):
+                    settle(step.name, "skipped", "A step it depends on did not complete")
+                    continue
+
+                inputs = {dep: results[dep] for dep in step.depends_on}
+                # Steps see the caller's context variables (request ids, log context)
+                context = contextvars.copy_context()
+                timings[step.name] = {"start": time.monotonic() - run_start}
+                running[executor.submit(context.run, execute, step, inputs)] = step.name
+                emit(step.name, "started")
+
+            if not running:
+                continue
+
+            now = time.monotonic()
+            next_deadline = min(
+                (deadline(name, now) for name in running.values() if by_name[name].timeout),
+                default=None
+            )
+            wait_for = max(0.0, next_deadline - now) if next_deadline else None
+            done, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                    settle(name, "completed")
+                except Exception as e:
+                    log.error(f"DAG step {name} failed: {e}")
+                    settle(name, "failed", str(e))
+
+            # Abandon started steps past their deadline; the thread finishes on its own
+            now = time.monotonic()
+            for future, name in list(running.items()):
+                if by_name[name].timeout and name in started and now >= deadline(name, now):
+                    running.pop(future)
+                    log.error(f"DAG step {name} timed out after {by_name[name].timeout}s")
+                    settle(name, "timed_out", f"Timed out after {by_name[name].timeout}s")
+
+        total_seconds = time.monotonic() - run_start
+        critical_path = self._critical_path(by_name, statuses, timings)
+
+        return {
+            "results": results,
+            "errors": errors,
+            "statuses": statuses,
+            "timings": timings,
+            "critical_path": critical_path,
+            "critical_path_seconds": timings[critical_path[-1]]["end"] if critical_path else 0.0,
+            "total_seconds": total_seconds
+        }
+
+    def _critical_path(
+        self,
+        by_name: Dict[str, DagStep],
+        statuses: Dict[str, str],
+        timings: Dict[str, Dict[str, float]]
+    ) -> List[str]:
+        """Chain of steps that finished last, following the latest-finishing dependency"""
+        ran = [name for name, status in statuses.items() if status != "skipped"]
+        if not ran:
+            return []
+
+        path = [max(ran, key=lambda name: timings[name]["end"])]
+        while True:
+            deps = [dep for dep in by_name[path[-1]].depends_on if statuses.get(dep) != "skipped"]
+            if not deps:
+                break
+            path.append(max(deps, key=lambda name: timings[name]["end"]))
+
+        return list(reversed(path))
+
+    def shutdown(self):
+        """Stop the thread pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False)
+
+
+# Global instance
+dag_executor = DagExecutor()
@@ -0,0 +1,32 @@
+# Date parsing helpers
+"""
+Parsing of ISO date arguments for reports
+
+Timestamps are stored as naive UTC datetimes (``datetime.utcnow()``), so
+query bounds must be naive UTC too: comparing a naive and an aware datetime
+raises ``TypeError``. Values with an offset are converted to UTC and the
+offset dropped; values without one are taken to be UTC already.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def parse_utc(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO date or datetime into a naive UTC datetime
+
+    Args:
+        value: ISO format string, with or without an offset (None or empty
+            for no value)
+
+    Returns:
+        Naive UTC datetime, or None
+
+    Raises:
+        ValueError: If the value is not ISO format
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
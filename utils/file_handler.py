@@ -4,8 +4,9 @@ File handling utilities for resume uploads and processing
 """
 import os
 import shutil
-from pathlib import Path
-from typing import Optional, List, Tuple
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Optional, List, Tuple, BinaryIO
 from datetime import datetime
 import hashlib
 from config.settings import settings
@@ -22,6 +23,19 @@ class FileHandler:
         'application/msword'
     }
     
+    # Leading bytes of each supported format
+    MAGIC_SIGNATURES = {
+        b'%PDF-': 'application/pdf',
+        b'PK\x03\x04': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1': 'application/msword'
+    }
+    EXTENSION_MIME_TYPES = {
+        '.pdf': 'application/pdf',
+        '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        '.doc': 'application/msword'
+    }
+    MAGIC_HEADER_SIZE = max(len(signature) for signature in MAGIC_SIGNATURES)
+    
     def __init__(self):
         self.upload_dir = Path(settings.UPLOAD_DIR)
         self.max_size = settings.MAX_UPLOAD_SIZE
@@ -61,6 +75,40 @@ class FileHandler:
         
         return True, None
     
+    def detect_mime_type(self, header: bytes) -> Optional[str]:
+        """Identify a file type from its leading bytes
+        
+        Args:
+            header: First bytes of the file (MAGIC_HEADER_SIZE is enough)
+            
+        Returns:
+            MIME type, or None if the content is not a supported format
+        """
+        for signature, mime_type in self.MAGIC_SIGNATURES.items():
+            if header.startswith(signature):
+                return mime_type
+        return None
+    
+    def validate_content_type(self, header: bytes, filename: str) -> Tuple[bool, Optional[str]]:
+        """Check that a file's content matches an allowed type and its extension
+        
+        Args:
+            header: First bytes of the file
+            filename: Original filename
+            
+        Returns:
+            Tuple of (is_valid, error_message)
+        """
+        mime_type = self.detect_mime_type(header)
+        if mime_type not in self.ALLOWED_MIME_TYPES:
+            return False, "File content is not a PDF or Word document"
+        
+        file_ext = Path(filename).suffix.lower()
+        if self.EXTENSION_MIME_TYPES.get(file_ext) != mime_type:
+            return False, f"File content does not match its {file_ext} extension"
+        
+        return True, None
+    
     def generate_safe_filename(self, original_filename: str) -> str:
         """Generate a safe, unique filename
         
@@ -132,6 +180,210 @@ class FileHandler:
             log.error(f"Error saving file: {e}")
             return False, None, str(e)
     
+    def save_stream_hashed(
+        self,
+        file_obj: BinaryIO,
+        original_filename: str,
+        chunk_size: int = 1024 * 1024
+    ) -> Tuple[bool, Optional[str], Optional[str], Optional[str]]:
+        """Stream an upload to the content-addressed store, hashing it on the way
+
+        The file is written chunk by chunk while its SHA-256 is computed, then
+        moved to ``blobs/<aa>/<sha256><ext>``. Identical content always lands on
+        the same path, so a re-upload does not leave another copy on disk.
+
+        Args:
+            file_obj: Readable binary file object
+            original_filename: Original filename
+            chunk_size: Bytes read per chunk
+
+        Returns:
+            Tuple of (success, file_path, sha256, error_message)
+        """
+        file_ext = Path(original_filename).suffix.lower()
+        if file_ext not in self.ALLOWED_EXTENSIONS:
+            return False, None, None, f"Invalid file type. Allowed: {', '.join(self.ALLOWED_EXTENSIONS)}"
+
+        temp_path = self.get_incoming_path(original_filename)
+
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            header = b""
+
+            with open(temp_path, 'wb') as f:
+                while True:
+                    chunk = file_obj.read(chunk_size)
+                    if not chunk:
+                        break
+                    if len(header) < self.MAGIC_HEADER_SIZE:
+                        header += chunk[:self.MAGIC_HEADER_SIZE - len(header)]
+                    size += len(chunk)
+                    if size > self.max_size:
+                        max_mb = self.max_size / (1024 * 1024)
+                        raise ValueError(f"File too large. Maximum size: {max_mb}MB")
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            is_valid, error = self.validate_content_type(header, original_filename)
+            if not is_valid:
+                raise ValueError(error)
+
+            content_hash = digest.hexdigest()
+            blob_path = self.store_incoming(temp_path, content_hash, file_ext)
+            return True, str(blob_path), content_hash, None
+
+        except Exception as e:
+            if temp_path.exists():
+                temp_path.unlink()
+            log.error(f"Error saving file: {e}")
+            return False, None, None, str(e)
+
+    def get_incoming_path(self, original_filename: str) -> Path:
+        """Get a unique temporary path for an upload in progress
+        
+        Args:
+            original_filename: Original filename
+            
+        Returns:
+            Path inside the incoming directory
+        """
+        incoming_dir = self.upload_dir / ".incoming"
+        incoming_dir.mkdir(parents=True, exist_ok=True)
+        return incoming_dir / self.generate_safe_filename(original_filename)
+
+    def store_incoming(self, temp_path: Path, content_hash: str, file_ext: str) -> Path:
+        """Move a fully received upload into the content-addressed store
+        
+        Args:
+            temp_path: Path returned by get_incoming_path
+            content_hash: SHA-256 hex digest of the file
+            file_ext: File extension including the dot
+            
+        Returns:
+            Path inside the blob store
+        """
+        blob_path = self.get_blob_path(content_hash, file_ext)
+
+        if blob_path.exists():
+            Path(temp_path).unlink()
+            log.info(f"Upload matches existing blob: {blob_path}")
+        else:
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, blob_path)
+            log.info(f"File saved: {blob_path}")
+
+        return blob_path
+
+    def save_zip_members(
+        self,
+        file_obj: BinaryIO,
+        archive_name: str,
+        max_files: Optional[int] = None,
+        max_total_size: Optional[int] = None
+    ) -> List[dict]:
+        """Save every resume inside a zip archive to the blob store
+        
+        Members are streamed out of the archive one at a time, so nothing is
+        extracted to disk under its archive name. The archive is rejected up
+        front if it holds too many entries or declares too much uncompressed
+        data. Members that are encrypted, compressed suspiciously well or of
+        the wrong type are skipped individually.
+        
+        Args:
+            file_obj: Readable, seekable binary file object of the archive
+            archive_name: Original archive filename (for reporting)
+            max_files: Maximum number of resumes to accept
+            max_total_size: Maximum uncompressed bytes to extract
+            
+        Returns:
+            List of dicts with filename, success, file_path, content_hash
+            and error for each member
+        """
+        max_files = max_files or settings.BATCH_MAX_FILES
+        max_total_size = max_total_size or settings.ZIP_MAX_TOTAL_SIZE
+        
+        try:
+            archive = zipfile.ZipFile(file_obj)
+        except zipfile.BadZipFile:
+            return [{"filename": archive_name, "success": False, "error": "Invalid zip archive"}]
+        
+        with archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            
+            if len(members) > max_files:
+                return [{
+                    "filename": archive_name,
+                    "success": False,
+                    "error": f"Archive holds {len(members)} files. Maximum: {max_files}"
+                }]
+            
+            declared_size = sum(info.file_size for info in members)
+            if declared_size > max_total_size:
+                max_mb = max_total_size / (1024 * 1024)
+                return [{
+                    "filename": archive_name,
+                    "success": False,
+                    "error": f"Archive expands beyond {max_mb}MB"
+                }]
+            
+            results = []
+            extracted_size = 0
+            
+            for info in members:
+                # Only the base name is used; directory parts (including ../) are dropped
+                member_name = PurePosixPath(info.filename.replace('\\', '/')).name
+                display_name = f"{archive_name}/{info.filename}"
+                
+                if not member_name or member_name.startswith('.') or info.filename.startswith('__MACOSX/'):
+                    continue
+                
+                if Path(member_name).suffix.lower() not in self.ALLOWED_EXTENSIONS:
+                    results.append({"filename": display_name, "success": False, "error": "Invalid file type"})
+                    continue
+                
+                if info.flag_bits & 0x1:
+                    results.append({"filename": display_name, "success": False, "error": "Encrypted files are not supported"})
+                    continue
+                
+                if info.compress_size and info.file_size / info.compress_size > settings.ZIP_MAX_COMPRESSION_RATIO:
+                    results.append({"filename": display_name, "success": False, "error": "Suspicious compression ratio"})
+                    continue
+                
+                if extracted_size >= max_total_size:
+                    results.append({"filename": display_name, "success": False, "error": "Archive size limit reached"})
+                    continue
+                
+                # The size limit in save_stream_hashed also applies to the real
+                # decompressed bytes, whatever the header claims
+                with archive.open(info) as member:
+                    saved, file_path, content_hash, error = self.save_stream_hashed(member, member_name)
+                
+                if saved:
+                    extracted_size += Path(file_path).stat().st_size
+                
+                results.append({
+                    "filename": display_name,
+                    "success": saved,
+                    "file_path": file_path,
+                    "content_hash": content_hash,
+                    "error": error
+                })
+            
+            return results
+    
+    def get_blob_path(self, content_hash: str, file_ext: str) -> Path:
+        """Get the content-addressed path for a file hash
+
+        Args:
+            content_hash: SHA-256 hex digest
+            file_ext: File extension including the dot
+
+        Returns:
+            Path inside the blob store
+        """
+        return self.upload_dir / "blobs" / content_hash[:2] / f"{content_hash}{file_ext}"
+
     def delete_file(self, file_path: str) -> bool:
         """Delete a file
         
@@ -0,0 +1,279 @@
+# Background resume ingestion
+"""
+Runs uploaded resumes through the orchestrator pipeline in a worker pool
+
+Upload routes hand the stored file to the ingestion manager and return
+immediately with an ingestion id. Progress is recorded in the ``ingestions``
+collection as a status plus an ordered list of step events, which the status
+endpoints read back.
+
+Concurrency is limited per kind of work. Text extraction is CPU-bound and
+starts for every file on the extraction process pool as soon as it is
+queued, so a batch is extracted ``EXTRACTION_WORKERS`` files at a time. The
+rest of the pipeline is mostly LLM calls and runs on ``INGESTION_WORKERS``
+threads, its in-flight requests capped by ``LLM_MAX_CONCURRENCY``.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from config.settings import settings
+from database.mongodb_client import mongodb_sync
+from utils.logger import log
+from utils.text_extractor import text_extractor
+
+
+INGESTION_STATUSES = ('queued', 'processing', 'completed', 'failed')
+FINAL_STATUSES = ('completed', 'failed')
+
+
+class IngestionManager:
+    """Worker pool that runs the candidate pipeline off the request path"""
+
+    def __init__(self):
+        self.max_workers = settings.INGESTION_WORKERS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def collection(self):
+        return mongodb_sync.get_collection("ingestions")
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="ingestion"
+                )
+                log.info(f"Started ingestion pool with {self.max_workers} workers")
+            return self._executor
+
+    def submit(
+        self,
+        file_path: str,
+        filename: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        resume_text: Optional[str] = None,
+        batch_id: Optional[str] = None
+    ) -> str:
+        """Record a new ingestion and schedule it on the worker pool
+
+        Args:
+            file_path: Path to the stored resume
+            filename: Original upload filename
+            content_hash: SHA-256 of the resume content
+            resume_text: Pre-extracted resume text (optional)
+            batch_id: Batch upload this file arrived in (optional)
+
+        Returns:
+            Ingestion ID
+        """
+        return self.submit_many([{
+            "file_path": file_path,
+            "filename": filename,
+            "content_hash": content_hash,
+            "resume_text": resume_text,
+            "batch_id": batch_id
+        }])[0]
+
+    def submit_many(self, uploads: List[Dict[str, Any]]) -> List[str]:
+        """Record several ingestions in one round trip and schedule them
+
+        Args:
+            uploads: One dict per stored resume with the arguments of
+                submit() (file_path required, the rest optional)
+
+        Returns:
+            Ingestion IDs in the order given
+        """
+        if not uploads:
+            return []
+
+        now = datetime.utcnow()
+        records = [
+            {
+                "_id": str(ObjectId()),
+                "status": "queued",
+                "filename": upload.get("filename"),
+                "file_path": upload["file_path"],
+                "content_hash": upload.get("content_hash"),
+                "batch_id": upload.get("batch_id"),
+                "events": [{"step": "upload", "status": "completed", "timestamp": now}],
+                "result": None,
+                "error": None,
+                "created_at": now,
+                "updated_at": now
+            }
+            for upload in uploads
+        ]
+        self.collection.insert_many(records)
+
+        if settings.USE_TASK_QUEUE:
+            # Imported here so the API can import this module without loading every agent
+            from agents.pipeline_tasks import pipeline_tasks
+            pipeline_tasks.start_applications([
+                {
+                    "resume_file_path": upload["file_path"],
+                    "content_hash": upload.get("content_hash"),
+                    "resume_text": upload.get("resume_text"),
+                    "ingestion_id": record["_id"]
+                }
+                for upload, record in zip(uploads, records)
+            ])
+        else:
+            # Extraction fans out across the process pool now rather than
+            # waiting for an ingestion thread to pick each file up
+            extractions = {
+                record["_id"]: text_extractor.submit(upload["file_path"])
+                for upload, record in zip(uploads, records)
+                if upload.get("resume_text") is None
+            }
+            executor = self._get_executor()
+            for upload, record in zip(uploads, records):
+                executor.submit(
+                    self._process,
+                    record["_id"],
+                    upload["file_path"],
+                    upload.get("content_hash"),
+                    upload.get("resume_text"),
+                    extractions.get(record["_id"])
+                )
+
+        for upload, record in zip(uploads, records):
+            log.info(f"Queued ingestion {record['_id']} for {upload['file_path']}")
+        return [record["_id"] for record in records]
+
+    def _process(
+        self,
+        ingestion_id: str,
+        file_path: str,
+        content_hash: Optional[str],
+        resume_text: Optional[str],
+        extraction: Optional[Future] = None
+    ):
+        from agents.orchestrator_agent import orchestrator
+
+        self.mark_processing(ingestion_id)
+        if extraction is not None:
+            # Empty text (a failed extraction) leaves the parser to extract again
+            resume_text = text_extractor.result(extraction, file_path) or None
+
+        def report(step: str, status: str, detail: Optional[Dict[str, Any]] = None):
+            self.record_event(ingestion_id, step, status, detail)
+
+        try:
+            result = orchestrator.process_candidate_application(
+                file_path,
+                content_hash=content_hash,
+                resume_text=resume_text,
+                progress_callback=report
+            )
+        except Exception as e:
+            log.error(f"Ingestion {ingestion_id} crashed: {e}")
+            result = {"success": False, "error": str(e)}
+
+        self.finish(ingestion_id, result)
+
+    def mark_processing(self, ingestion_id: str):
+        """Mark an ingestion as picked up by a worker"""
+        self._set_status(ingestion_id, "processing")
+
+    def finish(self, ingestion_id: str, result: Dict[str, Any]):
+        """Store the final pipeline result of an ingestion
+
+        Args:
+            ingestion_id: Ingestion ID
+            result: Orchestrator workflow result
+        """
+        if result.get("success"):
+            summary = {
+                "message": result.get("message", ""),
+                "deduplicated": result.get("deduplicated", False),
+                "candidate_email": result.get("candidate_email", ""),
+                "candidate_name": result.get("candidate_name", ""),
+                "overall_score": result.get("overall_score", 0),
+                "decision": result.get("decision")
+            }
+            self._set_status(ingestion_id, "completed", result=summary)
+            log.info(f"Ingestion {ingestion_id} completed")
+        else:
+            self._set_status(ingestion_id, "failed", error=result.get("error", "Unknown error"))
+            log.error(f"Ingestion {ingestion_id} failed: {result.get('error')}")
+
+    def record_event(
+        self,
+        ingestion_id: str,
+        step: str,
+        status: str,
+        detail: Optional[Dict[str, Any]] = None
+    ):
+        """Append a step event to an ingestion
+
+        Args:
+            ingestion_id: Ingestion ID
+            step: Pipeline step name
+            status: Step status (started, completed, failed, skipped)
+            detail: Extra data for the event (optional)
+        """
+        event = {"step": step, "status": status, "timestamp": datetime.utcnow()}
+        if detail:
+            event["detail"] = detail
+
+        try:
+            self.collection.update_one(
+                {"_id": ingestion_id},
+                {"$push": {"events": event}, "$set": {"updated_at": event["timestamp"]}}
+            )
+        except Exception as e:
+            # Progress reporting must never break the pipeline itself
+            log.error(f"Failed to record event for ingestion {ingestion_id}: {e}")
+
+    def _set_status(self, ingestion_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        update = {"status": status, "updated_at": datetime.utcnow()}
+        if result is not None:
+            update["result"] = result
+        if error is not None:
+            update["error"] = error
+        if status in FINAL_STATUSES:
+            update["finished_at"] = update["updated_at"]
+
+        try:
+            self.collection.update_one({"_id": ingestion_id}, {"$set": update})
+        except Exception as e:
+            log.error(f"Failed to update ingestion {ingestion_id}: {e}")
+
+    def shutdown(self):
+        """Stop accepting work and let running ingestions finish"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+            log.info("Ingestion pool shut down")
+
+
+def serialize_ingestion(document: Dict) -> Dict:
+    """Convert an ingestion document into a JSON-friendly response"""
+    def iso(value):
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    return {
+        "ingestion_id": document["_id"],
+        "status": document.get("status"),
+        "filename": document.get("filename"),
+        "batch_id": document.get("batch_id"),
+        "result": document.get("result"),
+        "error": document.get("error"),
+        "events": [
+            {**event, "timestamp": iso(event.get("timestamp"))}
+            for event in document.get("events", [])
+        ],
+        "created_at": iso(document.get("created_at")),
+        "updated_at": iso(document.get("updated_at")),
+        "finished_at": iso(document.get("finished_at"))
+    }
+
+
+# Global instance
+ingestion_manager = IngestionManager()
@@ -0,0 +1,169 @@
+# Buffered compliance/audit log writer
+"""
+Writes compliance and audit log entries off the calling thread
+
+``log_sink.write()`` stamps the entry with its ``_id`` and appends it to an
+in-memory buffer; a background thread inserts the buffer in bulk, per
+collection, once ``LOG_SINK_BATCH_SIZE`` entries are waiting or every
+``LOG_SINK_FLUSH_INTERVAL_SECONDS``. A failed flush keeps its entries for
+the next attempt.
+
+The buffer is bounded by ``LOG_SINK_MAX_BUFFER``. When it is full the
+caller writes its entry directly instead, so entries are never dropped;
+``get_stats()`` reports how often that happened along with the buffer
+depth and flush timings, which is the signal to raise the limits.
+``shutdown()`` flushes whatever is left.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from config.settings import settings
+from utils.logger import log
+
+
+class BufferedLogSink:
+    """Batches log entries into bulk inserts on a background thread"""
+
+    def __init__(self):
+        self.batch_size = settings.LOG_SINK_BATCH_SIZE
+        self.flush_interval = settings.LOG_SINK_FLUSH_INTERVAL_SECONDS
+        self.max_buffer = settings.LOG_SINK_MAX_BUFFER
+        self._buffer: deque = deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "overflow_writes": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "high_water_mark": 0,
+            "last_flush_size": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0
+        }
+
+    def write(self, collection: str, entry: Dict[str, Any]) -> str:
+        """Queue a log entry for insertion
+
+        Args:
+            collection: Target collection (compliance_logs, audit_logs)
+            entry: Document to insert; ``_id`` is assigned here if missing
+
+        Returns:
+            The entry's ``_id`` as a string
+        """
+        entry.setdefault("_id", ObjectId())
+
+        with self._condition:
+            if len(self._buffer) < self.max_buffer and not self._stopping:
+                self._buffer.append((collection, entry))
+                self._stats["enqueued"] += 1
+                self._stats["high_water_mark"] = max(self._stats["high_water_mark"], len(self._buffer))
+                self._ensure_thread()
+                if len(self._buffer) >= self.batch_size:
+                    self._condition.notify()
+                return str(entry["_id"])
+            self._stats["overflow_writes"] += 1
+
+        # Buffer full (or shutting down): write through rather than lose the entry
+        if not self._insert(collection, [entry]):
+            log.error(f"Log sink: lost {collection} entry {entry['_id']}")
+        return str(entry["_id"])
+
+    def flush(self) -> bool:
+        """Write everything buffered so far
+
+        Returns:
+            False if some entries could not be written and were kept
+        """
+        with self._flush_lock:
+            with self._condition:
+                batch = list(self._buffer)
+                self._buffer.clear()
+            return self._write_batch(batch) if batch else True
+
+    def shutdown(self):
+        """Stop the background thread and flush the remaining entries"""
+        with self._condition:
+            self._stopping = True
+            thread, self._thread = self._thread, None
+            self._condition.notify()
+        if thread:
+            thread.join()
+        if self.flush():
+            log.info("Log sink flushed and stopped")
+        else:
+            log.error(f"Log sink stopped with {len(self._buffer)} unwritten entries")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Buffer depth, throughput and flush timing counters"""
+        with self._condition:
+            return {**self._stats, "buffered": len(self._buffer), "max_buffer": self.max_buffer}
+
+    def _ensure_thread(self):
+        # Called with the condition held
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        backoff = False
+        while True:
+            with self._condition:
+                # After a failed flush, wait out the interval before retrying
+                if not self._stopping and (backoff or len(self._buffer) < self.batch_size):
+                    self._condition.wait(self.flush_interval)
+                if self._stopping:
+                    return
+            backoff = not self.flush()
+
+    def _write_batch(self, batch: List[Tuple[str, Dict]]) -> bool:
+        by_collection: Dict[str, List[Dict]] = defaultdict(list)
+        for collection, entry in batch:
+            by_collection[collection].append(entry)
+
+        started = time.perf_counter()
+        failed: List[Tuple[str, Dict]] = []
+        for collection, entries in by_collection.items():
+            if not self._insert(collection, entries):
+                failed.extend((collection, entry) for entry in entries)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._condition:
+            self._stats["flushes"] += 1
+            self._stats["last_flush_size"] = len(batch)
+            self._stats["last_flush_ms"] = round(elapsed_ms, 2)
+            self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], round(elapsed_ms, 2))
+            if failed:
+                self._stats["failed_flushes"] += 1
+                # Retried on the next flush, ahead of newer entries
+                self._buffer.extendleft(reversed(failed))
+        return not failed
+
+    def _insert(self, collection: str, entries: List[Dict]) -> bool:
+        """Bulk insert entries; False if they should be retried"""
+        from tools.database_tool import database_tool
+
+        result = database_tool._run(action="bulk_insert", collection=collection, documents=entries, ordered=False)
+        failed_indexes = result.get("failed_indexes")
+        if result.get("success") or failed_indexes:
+            # Per-document failures (e.g. an _id already written by an
+            # earlier, partially failed flush) are not retried
+            written = result.get("inserted_count", 0)
+            with self._condition:
+                self._stats["written"] += written
+            if failed_indexes:
+                log.warning(f"Log sink: {len(failed_indexes)} {collection} entries were not inserted: {result.get('error')}")
+            return True
+
+        log.error(f"Log sink flush to {collection} failed: {result.get('error')}")
+        return False
+
+
+# Global instance
+log_sink = BufferedLogSink()
@@ -0,0 +1,110 @@
+# Keyset pagination helpers
+"""
+Cursor, sort and projection helpers for list endpoints
+
+Pages are keyset-based: a page is sorted on one field with ``_id`` as the
+tie-breaker, and the cursor carries the sort value and ``_id`` of the last
+document returned. The next page is the documents strictly after that
+pair, which an index on (field, _id) finds without skipping over earlier
+pages.
+"""
+import base64
+from typing import Any, Dict, Iterable, Optional, Tuple, Type
+from bson import json_util
+from pydantic import BaseModel
+
+
+MAX_PAGE_SIZE = 200
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed cursor, sort or field list"""
+
+
+def parse_sort(sort: str, allowed: Iterable[str]) -> Tuple[str, bool]:
+    """Parse a ``field`` / ``-field`` sort parameter
+
+    Returns:
+        Tuple of (field, descending)
+    """
+    descending = sort.startswith('-')
+    field = sort.lstrip('-+')
+    if field not in allowed:
+        raise PaginationError(f"Cannot sort by '{field}'. Allowed: {', '.join(allowed)}")
+    return field, descending
+
+
+def build_projection(model: Type[BaseModel], fields: Optional[str] = None) -> Dict[str, int]:
+    """Projection for the fields of a response model
+
+    Without ``fields`` every field of the model is returned, which leaves out
+    anything the response does not use (``resume_text`` in particular).
+    Required fields of the model are always included.
+
+    Args:
+        model: Response model of the list items
+        fields: Comma-separated field names requested by the client
+
+    Returns:
+        Inclusion projection
+    """
+    available = {name for name in model.model_fields if name != "id"}
+
+    if not fields:
+        selected = available
+    else:
+        requested = {field.strip() for field in fields.split(',') if field.strip()} - {"id"}
+        unknown = requested - available
+        if unknown:
+            raise PaginationError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+        required = {name for name, info in model.model_fields.items() if info.is_required() and name != "id"}
+        selected = requested | required
+
+    return {name: 1 for name in sorted(selected)}
+
+
+def encode_cursor(sort_field: str, descending: bool, document: Dict) -> str:
+    """Cursor pointing just after ``document``"""
+    payload = json_util.dumps({
+        "f": sort_field,
+        "d": descending,
+        "v": document.get(sort_field),
+        "id": document["_id"]
+    })
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str, sort_field: str, descending: bool) -> Tuple[Any, Any]:
+    """Decode a cursor issued for the same sort
+
+    Returns:
+        Tuple of (sort value, _id) of the last document of the previous page
+    """
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        value, last_id = payload["v"], payload["id"]
+        same_sort = payload["f"] == sort_field and payload["d"] == descending
+    except Exception:
+        raise PaginationError("Invalid cursor")
+
+    if not same_sort:
+        raise PaginationError("Cursor was issued for a different sort")
+    return value, last_id
+
+
+def keyset_filter(sort_field: str, descending: bool, value: Any, last_id: Any) -> Dict:
+    """Filter for the documents after (value, last_id) in sort order
+
+    Mongo sorts null and missing values before everything else, so they come
+    first ascending and last descending.
+    """
+    op = "$lt" if descending else "$gt"
+    tie = {sort_field: value, "_id": {op: last_id}}
+
+    if value is None:
+        return tie if descending else {"$or": [{sort_field: {"$ne": None}}, tie]}
+
+    after = {sort_field: {op: value}}
+    if descending:
+        return {"$or": [after, tie, {sort_field: None}]}
+    return {"$or": [after, tie]}
@@ -0,0 +1,348 @@
+# Resumable chunked uploads
+"""
+tus-style resumable uploads for large resume archives
+
+A client creates an upload with its filename and total size, then PUTs the
+bytes in ranges (``Content-Range: bytes start-end/total``). Each range is
+appended to a part file under ``UPLOAD_DIR/resumable`` and the committed
+offset is kept in the ``upload_sessions`` collection. After a dropped
+connection the client asks for the offset and carries on from there; bytes
+that arrived before the drop are kept. Once every byte is in, the upload is
+finalised and handed to the ingestion pipeline like a batch upload.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+import aiofiles
+import aiofiles.os
+from bson import ObjectId
+from pymongo import ReturnDocument
+from starlette.requests import ClientDisconnect
+from config.settings import settings
+from database.mongodb_client import mongodb
+from utils.file_handler import file_handler
+from utils.upload_stream import UploadRejected
+from utils.logger import log
+
+
+SESSION_STATUSES = ('uploading', 'completing', 'completed')
+
+# Archives plus the single-resume types
+RESUMABLE_EXTENSIONS = ('.zip',) + tuple(sorted(file_handler.ALLOWED_EXTENSIONS))
+
+# How often creating an upload also sweeps expired ones
+CLEANUP_INTERVAL_SECONDS = 600
+
+
+def serialize_session(session: Dict) -> Dict:
+    """Convert an upload session document into a JSON-friendly dict"""
+    return {
+        "upload_id": session["_id"],
+        "filename": session["filename"],
+        "size": session["size"],
+        "offset": session["offset"],
+        "status": session["status"],
+        "batch_id": session.get("batch_id"),
+        "expires_at": session["expires_at"].isoformat() if session.get("expires_at") else None
+    }
+
+
+class ResumableUploadManager:
+    """Upload sessions and their part files"""
+
+    def __init__(self):
+        self.part_dir = Path(settings.UPLOAD_DIR) / "resumable"
+        self._last_cleanup = 0.0
+
+    @property
+    def collection(self):
+        return mongodb.db.upload_sessions
+
+    def _expiry(self) -> datetime:
+        return datetime.utcnow() + timedelta(hours=settings.RESUMABLE_SESSION_TTL_HOURS)
+
+    async def create(self, filename: str, size: int) -> Dict:
+        """Start a new resumable upload
+
+        Args:
+            filename: Original filename, which decides how the file is ingested
+            size: Total size of the file in bytes
+
+        Returns:
+            The new upload session document
+
+        Raises:
+            UploadRejected: If the file type or size is not accepted
+        """
+        file_ext = Path(filename).suffix.lower()
+        if file_ext not in RESUMABLE_EXTENSIONS:
+            raise UploadRejected(400, f"Invalid file type. Allowed: {', '.join(RESUMABLE_EXTENSIONS)}")
+
+        max_size = settings.RESUMABLE_MAX_UPLOAD_SIZE if file_ext == '.zip' else file_handler.max_size
+        if size <= 0:
+            raise UploadRejected(400, "Upload size must be positive")
+        if size > max_size:
+            raise UploadRejected(413, f"File too large. Maximum size: {max_size / (1024 * 1024)}MB")
+
+        if time.monotonic() - self._last_cleanup > CLEANUP_INTERVAL_SECONDS:
+            self._last_cleanup = time.monotonic()
+            await self.cleanup_expired()
+
+        upload_id = str(ObjectId())
+        part_path = self.part_dir / f"{upload_id}{file_ext}.part"
+        await aiofiles.os.makedirs(self.part_dir, exist_ok=True)
+        async with aiofiles.open(part_path, 'wb'):
+            pass
+
+        now = datetime.utcnow()
+        session = {
+            "_id": upload_id,
+            "filename": filename,
+            "size": size,
+            "offset": 0,
+            "status": "uploading",
+            "part_path": str(part_path),
+            "write_lease_until": None,
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": self._expiry()
+        }
+        await self.collection.insert_one(session)
+
+        log.info(f"Resumable upload {upload_id} created for {filename} ({size} bytes)")
+        return session
+
+    async def get(self, upload_id: str) -> Optional[Dict]:
+        """Get an upload session"""
+        return await self.collection.find_one({"_id": upload_id})
+
+    def _offset_headers(self, session: Dict) -> Dict[str, str]:
+        return {"Upload-Offset": str(session["offset"]), "Upload-Length": str(session["size"])}
+
+    async def _get_open(self, upload_id: str) -> Dict:
+        session = await self.get(upload_id)
+        if not session:
+            raise UploadRejected(404, "Upload not found")
+        if session["status"] != "uploading":
+            raise UploadRejected(409, f"Upload is {session['status']}", self._offset_headers(session))
+        if session["expires_at"] < datetime.utcnow():
+            raise UploadRejected(410, "Upload expired")
+        return session
+
+    async def write_chunk(
+        self,
+        upload_id: str,
+        start: int,
+        end: int,
+        total: int,
+        chunks: AsyncIterator[bytes]
+    ) -> Dict:
+        """Write one byte range of an upload
+
+        Bytes received before a client disconnect are kept and the committed
+        offset advances past them, so the client resumes from there.
+
+        Args:
+            upload_id: Upload to write to
+            start: First byte of the range
+            end: Last byte of the range (inclusive)
+            total: Total size from the Content-Range header
+            chunks: Body of the request
+
+        Returns:
+            The updated upload session document
+
+        Raises:
+            UploadRejected: If the range does not continue the upload, is too
+                large or another PUT is writing to the upload
+        """
+        session = await self._get_open(upload_id)
+
+        if total != session["size"] or start > end or end >= total:
+            raise UploadRejected(400, "Content-Range does not fit the upload", self._offset_headers(session))
+        if end - start + 1 > settings.RESUMABLE_MAX_CHUNK_SIZE:
+            max_mb = settings.RESUMABLE_MAX_CHUNK_SIZE / (1024 * 1024)
+            raise UploadRejected(413, f"Chunk too large. Maximum size: {max_mb}MB", self._offset_headers(session))
+        if start != session["offset"]:
+            raise UploadRejected(409, "Range does not start at the upload offset", self._offset_headers(session))
+
+        # Only one PUT may write at a time; a lease left by a crashed request expires
+        now = datetime.utcnow()
+        claimed = await self.collection.find_one_and_update(
+            {
+                "_id": upload_id,
+                "status": "uploading",
+                "offset": start,
+                "$or": [{"write_lease_until": None}, {"write_lease_until": {"$lt": now}}]
+            },
+            {"$set": {"write_lease_until": now + timedelta(seconds=settings.RESUMABLE_WRITE_LEASE_SECONDS)}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not claimed:
+            raise UploadRejected(409, "Another request is writing to this upload", self._offset_headers(session))
+
+        expected = end - start + 1
+        written = 0
+        keep = True
+        try:
+            async with aiofiles.open(session["part_path"], 'r+b') as part:
+                await part.seek(start)
+                try:
+                    async for data in chunks:
+                        if written + len(data) > expected:
+                            keep = False
+                            raise UploadRejected(400, "Request body is longer than its Content-Range")
+                        await part.write(data)
+                        written += len(data)
+                except ClientDisconnect:
+                    log.warning(f"Client disconnected from upload {upload_id} after {written} bytes")
+                await part.flush()
+                # The committed offset must never run ahead of what is on disk
+                await asyncio.to_thread(os.fsync, part.fileno())
+        except Exception:
+            keep = False
+            raise
+        finally:
+            update = {
+                "write_lease_until": None,
+                "updated_at": datetime.utcnow(),
+                "expires_at": self._expiry()
+            }
+            if keep:
+                update["offset"] = start + written
+            session = await self.collection.find_one_and_update(
+                {"_id": upload_id},
+                {"$set": update},
+                return_document=ReturnDocument.AFTER
+            )
+
+        return session
+
+    def _completion_abandoned(self, now: datetime) -> Dict:
+        # A finalisation whose lease ran out was cut short, e.g. by a crash
+        return {"status": "completing", "$or": [
+            {"completion_lease_until": None},
+            {"completion_lease_until": {"$lt": now}}
+        ]}
+
+    async def begin_completion(self, upload_id: str) -> Dict:
+        """Move a fully received upload to ``completing``
+
+        A session that is already completed is returned as it is, so a client
+        that lost the response to its completion request can ask again. One
+        left in ``completing`` past its lease is finalised again; resumes
+        already queued by the cut-short attempt are recognised by content
+        hash when they are parsed.
+
+        Returns:
+            The upload session document
+
+        Raises:
+            UploadRejected: If bytes are still missing or it is already being
+                finalised
+        """
+        now = datetime.utcnow()
+        session = await self.collection.find_one_and_update(
+            {
+                "_id": upload_id,
+                "$expr": {"$eq": ["$offset", "$size"]},
+                "$or": [{"status": "uploading"}, self._completion_abandoned(now)]
+            },
+            {"$set": {
+                "status": "completing",
+                "completion_lease_until": now + timedelta(seconds=settings.RESUMABLE_COMPLETION_LEASE_SECONDS),
+                "updated_at": now,
+                "expires_at": self._expiry()
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+        if session:
+            return session
+
+        session = await self.get(upload_id)
+        if not session:
+            raise UploadRejected(404, "Upload not found")
+        if session["status"] == "completed":
+            return session
+        if session["status"] == "completing":
+            raise UploadRejected(409, "Upload is already being finalised")
+        raise UploadRejected(
+            409,
+            f"Upload incomplete: {session['offset']} of {session['size']} bytes received",
+            self._offset_headers(session)
+        )
+
+    async def mark_completed(self, upload_id: str, batch_id: str, results: List[Dict]):
+        """Record the ingestions of a finalised upload and drop its part file"""
+        session = await self.collection.find_one_and_update(
+            {"_id": upload_id},
+            {"$set": {
+                "status": "completed",
+                "completion_lease_until": None,
+                "batch_id": batch_id,
+                "results": results,
+                "completed_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow(),
+                "expires_at": self._expiry()
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+        await self._remove_part(session["part_path"])
+
+    async def abort_completion(self, upload_id: str):
+        """Reopen an upload whose finalisation failed so it can be retried"""
+        await self.collection.update_one(
+            {"_id": upload_id, "status": "completing"},
+            {"$set": {"status": "uploading", "completion_lease_until": None, "updated_at": datetime.utcnow()}}
+        )
+
+    async def discard(self, upload_id: str) -> bool:
+        """Delete an upload and its part file
+
+        Uploads being finalised are kept until their completion lease runs out.
+
+        Returns:
+            True if the upload existed
+        """
+        session = await self.collection.find_one_and_delete({
+            "_id": upload_id,
+            "$or": [{"status": {"$ne": "completing"}}, self._completion_abandoned(datetime.utcnow())]
+        })
+        if not session:
+            return False
+        await self._remove_part(session["part_path"])
+        log.info(f"Resumable upload {upload_id} discarded")
+        return True
+
+    async def cleanup_expired(self) -> int:
+        """Delete expired uploads and their part files
+
+        Returns:
+            Number of uploads deleted
+        """
+        removed = 0
+        try:
+            cursor = self.collection.find({"expires_at": {"$lt": datetime.utcnow()}}, {"part_path": 1})
+            async for session in cursor:
+                await self._remove_part(session["part_path"])
+                await self.collection.delete_one({"_id": session["_id"]})
+                removed += 1
+        except Exception as e:
+            log.error(f"Failed to clean up expired uploads: {e}")
+
+        if removed:
+            log.info(f"Removed {removed} expired resumable uploads")
+        return removed
+
+    async def _remove_part(self, part_path: str):
+        try:
+            await aiofiles.os.remove(part_path)
+        except FileNotFoundError:
+            pass
+
+
+# Global instance
+resumable_uploads = ResumableUploadManager()
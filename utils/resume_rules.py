@@ -0,0 +1,296 @@
+# Rule-based resume extraction
+"""
+Local, rule-based resume extraction used before falling back to the LLM
+
+- Sectioniser that splits resume text on common headers
+- Skills gazetteer matcher
+- Date-range experience calculator
+- Name heuristic for the resume header
+"""
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+SECTION_ALIASES = {
+    "summary": ["summary", "professional summary", "profile", "objective", "career objective", "about me"],
+    "experience": [
+        "experience", "work experience", "professional experience", "employment history",
+        "work history", "employment", "career history", "internships", "internship experience"
+    ],
+    "education": ["education", "academic background", "academics", "educational qualifications", "qualifications"],
+    "skills": [
+        "skills", "technical skills", "core competencies", "key skills", "technologies",
+        "tech stack", "tools and technologies", "skills and tools", "areas of expertise"
+    ],
+    "projects": ["projects", "academic projects", "personal projects", "key projects"],
+    "certifications": ["certifications", "certificates", "licenses and certifications", "courses"],
+    "achievements": ["achievements", "awards", "honors", "honours and awards", "accomplishments"],
+}
+
+_HEADER_LOOKUP = {
+    alias: section
+    for section, aliases in SECTION_ALIASES.items()
+    for alias in aliases
+}
+
+_HEADER_CLEANUP = re.compile(r"[^a-z& ]+")
+
+
+# Canonical skill name -> aliases (matched case-insensitively)
+SKILLS_GAZETTEER = {
+    "Python": ["python"],
+    "Java": ["java"],
+    "JavaScript": ["javascript", "js", "ecmascript"],
+    "TypeScript": ["typescript"],
+    "C++": ["c++", "cpp"],
+    "C#": ["c#", "csharp"],
+    "Go": ["golang"],
+    "Rust": ["rust"],
+    "Kotlin": ["kotlin"],
+    "Swift": ["swift"],
+    "Scala": ["scala"],
+    "PHP": ["php"],
+    "Ruby": ["ruby"],
+    "SQL": ["sql"],
+    "Bash": ["bash", "shell scripting"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3"],
+    "React": ["react", "react.js", "reactjs"],
+    "Angular": ["angular", "angularjs"],
+    "Vue.js": ["vue", "vue.js", "vuejs"],
+    "Node.js": ["node.js", "nodejs"],
+    "Express": ["express.js", "expressjs"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi"],
+    "Spring Boot": ["spring boot", "springboot"],
+    ".NET": [".net", "dotnet", "asp.net"],
+    "REST APIs": ["rest api", "rest apis", "restful", "restful apis"],
+    "GraphQL": ["graphql"],
+    "MongoDB": ["mongodb", "mongo"],
+    "PostgreSQL": ["postgresql", "postgres"],
+    "MySQL": ["mysql"],
+    "Redis": ["redis"],
+    "Elasticsearch": ["elasticsearch"],
+    "Kafka": ["kafka", "apache kafka"],
+    "Spark": ["spark", "apache spark", "pyspark"],
+    "Hadoop": ["hadoop"],
+    "Airflow": ["airflow", "apache airflow"],
+    "Docker": ["docker"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "Terraform": ["terraform"],
+    "AWS": ["aws", "amazon web services"],
+    "Azure": ["azure", "microsoft azure"],
+    "GCP": ["gcp", "google cloud", "google cloud platform"],
+    "Linux": ["linux"],
+    "Git": ["git", "github", "gitlab"],
+    "CI/CD": ["ci/cd", "cicd", "jenkins", "github actions"],
+    "Machine Learning": ["machine learning", "ml"],
+    "Deep Learning": ["deep learning"],
+    "NLP": ["nlp", "natural language processing"],
+    "Computer Vision": ["computer vision", "opencv"],
+    "Generative AI": ["generative ai", "genai", "llm", "llms", "large language models"],
+    "RAG": ["rag", "retrieval augmented generation", "retrieval-augmented generation"],
+    "LangChain": ["langchain"],
+    "TensorFlow": ["tensorflow"],
+    "PyTorch": ["pytorch"],
+    "Keras": ["keras"],
+    "scikit-learn": ["scikit-learn", "sklearn"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "Tableau": ["tableau"],
+    "Power BI": ["power bi", "powerbi"],
+    "Excel": ["ms excel", "microsoft excel"],
+    "Figma": ["figma"],
+    "Agile": ["agile", "scrum"],
+}
+
+_ALIAS_TO_SKILL = {
+    alias: skill
+    for skill, aliases in SKILLS_GAZETTEER.items()
+    for alias in aliases
+}
+
+# Longest aliases first so "apache spark" wins over "spark"
+_SKILL_PATTERN = re.compile(
+    r"(?<![\w+#.])("
+    + "|".join(re.escape(alias) for alias in sorted(_ALIAS_TO_SKILL, key=len, reverse=True))
+    + r")(?![\w+#])",
+    re.IGNORECASE
+)
+
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12
+}
+
+_MONTH_NAME = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH_NAME}\s*,?\s*\d{{4}}|\d{{1,2}}[/\-.]\d{{4}}|\d{{4}})"
+_PRESENT = r"(?:present|current|now|till date|to date|ongoing)"
+
+_DATE_RANGE_PATTERN = re.compile(
+    rf"({_DATE})\s*(?:-|–|—|to|until|till)\s*({_DATE}|{_PRESENT})",
+    re.IGNORECASE
+)
+
+
+def _normalise_header(line: str) -> Optional[str]:
+    stripped = line.strip()
+    if not stripped or len(stripped) > 40:
+        return None
+    cleaned = _HEADER_CLEANUP.sub(" ", stripped.lower()).strip()
+    cleaned = re.sub(r"\s+", " ", cleaned)
+    return _HEADER_LOOKUP.get(cleaned)
+
+
+def split_sections(text: str) -> Dict[str, str]:
+    """Split resume text into sections keyed by canonical header name
+
+    Text before the first recognised header is returned under "header".
+    Repeated sections are concatenated.
+
+    Args:
+        text: Raw resume text
+
+    Returns:
+        Dictionary of section name to section text
+    """
+    sections: Dict[str, List[str]] = {"header": []}
+    current = "header"
+
+    for line in (text or "").splitlines():
+        section = _normalise_header(line)
+        if section:
+            current = section
+            sections.setdefault(current, [])
+            continue
+        sections[current].append(line)
+
+    return {
+        name: "\n".join(lines).strip()
+        for name, lines in sections.items()
+        if any(line.strip() for line in lines)
+    }
+
+
+def match_skills(text: str) -> List[str]:
+    """Find gazetteer skills mentioned in text
+
+    Args:
+        text: Text to scan
+
+    Returns:
+        Canonical skill names in order of first mention
+    """
+    found = []
+    seen = set()
+    for match in _SKILL_PATTERN.finditer(text or ""):
+        skill = _ALIAS_TO_SKILL[match.group(1).lower()]
+        if skill not in seen:
+            seen.add(skill)
+            found.append(skill)
+    return found
+
+
+def _parse_date(value: str, is_end: bool) -> Optional[Tuple[int, int]]:
+    value = value.strip().lower()
+
+    if re.fullmatch(_PRESENT, value):
+        now = datetime.utcnow()
+        return now.year, now.month
+
+    month_match = re.match(r"([a-z]+)\.?\s*,?\s*(\d{4})", value)
+    if month_match:
+        month = _MONTHS.get(month_match.group(1)[:4]) or _MONTHS.get(month_match.group(1)[:3])
+        if month:
+            return int(month_match.group(2)), month
+
+    numeric_match = re.match(r"(\d{1,2})[/\-.](\d{4})", value)
+    if numeric_match and 1 <= int(numeric_match.group(1)) <= 12:
+        return int(numeric_match.group(2)), int(numeric_match.group(1))
+
+    year_match = re.fullmatch(r"\d{4}", value)
+    if year_match:
+        # A bare start year counts from January; a bare end year is taken
+        # as the middle of the year rather than its end
+        return int(value), 6 if is_end else 1
+
+    return None
+
+
+def calculate_experience_years(experience_text: str) -> Optional[float]:
+    """Total years covered by date ranges in an experience section
+
+    Overlapping ranges (e.g. concurrent roles) are merged so they are only
+    counted once.
+
+    Args:
+        experience_text: Text of the experience section
+
+    Returns:
+        Years of experience rounded to one decimal, or None if no date
+        ranges were found
+    """
+    intervals = []
+    for start_raw, end_raw in _DATE_RANGE_PATTERN.findall(experience_text or ""):
+        start = _parse_date(start_raw, is_end=False)
+        end = _parse_date(end_raw, is_end=True)
+        if not start or not end:
+            continue
+        start_index = start[0] * 12 + start[1] - 1
+        end_index = end[0] * 12 + end[1]
+        if 1950 * 12 <= start_index < end_index <= (datetime.utcnow().year + 1) * 12:
+            intervals.append((start_index, end_index))
+
+    if not intervals:
+        return None
+
+    intervals.sort()
+    total_months = 0
+    current_start, current_end = intervals[0]
+    for start, end in intervals[1:]:
+        if start <= current_end:
+            current_end = max(current_end, end)
+        else:
+            total_months += current_end - current_start
+            current_start, current_end = start, end
+    total_months += current_end - current_start
+
+    return round(total_months / 12, 1)
+
+
+# Words of document titles and headings that pass for a name ("Curriculum
+# Vitae", "Personal Details", "Senior Software Engineer")
+NAME_DENYLIST = {
+    "curriculum", "vitae", "resume", "cv", "biodata", "bio-data", "profile", "summary",
+    "objective", "personal", "details", "contact", "information", "info", "professional",
+    "career", "page", "confidential", "engineer", "developer", "manager", "analyst",
+    "scientist", "consultant", "designer", "architect", "intern", "senior", "junior", "lead",
+}
+
+
+def guess_name(header_text: str) -> Optional[str]:
+    """Guess the candidate name from the top of the resume
+
+    Lines made up of name-like words are skipped when any of them is a title
+    or heading word (see ``NAME_DENYLIST``).
+
+    Args:
+        header_text: Text before the first section header
+
+    Returns:
+        Name if the first lines contain a plausible one
+    """
+    for line in (header_text or "").splitlines()[:5]:
+        candidate = line.strip()
+        if not candidate:
+            continue
+        words = candidate.split()
+        if not 2 <= len(words) <= 4 or not all(re.fullmatch(r"[A-Za-z][A-Za-z.'\-]*", w) for w in words):
+            continue
+        if any(w.lower().strip(".") in NAME_DENYLIST for w in words):
+            continue
+        return candidate.title() if candidate.isupper() else candidate
+    return None
@@ -0,0 +1,262 @@
+# Resume text extraction
+"""
+Process-pool text extraction for resume files
+
+PDF and DOCX parsing is CPU-bound and a malformed PDF can spin for a long
+time, so extraction runs in a bounded pool of worker processes. Every task
+is limited by CPU time, wall-clock time and page count inside the worker,
+and the parent additionally abandons and recycles the pool if a worker stops
+responding altogether.
+"""
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional
+from config.settings import settings
+from utils.logger import log
+
+
+PDF_ENGINES = ('pypdf2', 'pdfplumber')
+
+
+class ExtractionLimitExceeded(Exception):
+    """Raised inside a worker when a file exceeds its CPU or time budget"""
+
+
+def _raise_limit_exceeded(signum, frame):
+    raise ExtractionLimitExceeded(f"Extraction aborted by signal {signum}")
+
+
+def _init_worker():
+    """Install the signal handlers that turn resource limits into exceptions"""
+    if hasattr(signal, 'SIGXCPU'):
+        signal.signal(signal.SIGXCPU, _raise_limit_exceeded)
+    if hasattr(signal, 'SIGALRM'):
+        signal.signal(signal.SIGALRM, _raise_limit_exceeded)
+
+
+def _set_limits(cpu_seconds: int, timeout_seconds: int):
+    """Arm per-file CPU and wall-clock limits for the current worker"""
+    try:
+        import resource
+
+        # RLIMIT_CPU counts the whole process lifetime, so the budget is
+        # expressed relative to the CPU time this worker has already used
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        spent = int(usage.ru_utime + usage.ru_stime)
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = spent + cpu_seconds + 1
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    except (ImportError, ValueError, OSError):
+        pass  # Not supported on this platform
+
+    if hasattr(signal, 'alarm'):
+        signal.alarm(timeout_seconds)
+
+
+def _clear_limits():
+    if hasattr(signal, 'alarm'):
+        signal.alarm(0)
+
+
+def _extract_pdf_pypdf2(file_path: str, max_pages: int) -> str:
+    import PyPDF2
+
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        parts = [page.extract_text() or "" for page in pdf_reader.pages[:max_pages]]
+    return "\n".join(parts)
+
+
+def _extract_pdf_pdfplumber(file_path: str, max_pages: int) -> str:
+    import pdfplumber
+
+    with pdfplumber.open(file_path) as pdf:
+        parts = [page.extract_text() or "" for page in pdf.pages[:max_pages]]
+    return "\n".join(parts)
+
+
+def _extract_docx(file_path: str) -> str:
+    import docx
+
+    doc = docx.Document(file_path)
+    return "\n".join(para.text for para in doc.paragraphs)
+
+
+def _extract_pdf(file_path: str, engine: str, max_pages: int) -> str:
+    if engine == 'pdfplumber':
+        return _extract_pdf_pdfplumber(file_path, max_pages)
+    return _extract_pdf_pypdf2(file_path, max_pages)
+
+
+def extract_text(
+    file_path: str,
+    engine: str = 'pypdf2',
+    fallback_engine: Optional[str] = None,
+    max_pages: int = 20,
+    cpu_seconds: int = 20,
+    timeout_seconds: int = 30
+) -> str:
+    """Extract text from a PDF or DOCX file (runs inside a worker process)
+
+    Args:
+        file_path: Path to resume file
+        engine: Primary PDF engine (pypdf2 or pdfplumber)
+        fallback_engine: PDF engine to try when the primary one fails or
+            returns no text
+        max_pages: Maximum number of PDF pages to read
+        cpu_seconds: CPU time budget for this file
+        timeout_seconds: Wall-clock budget for this file
+
+    Returns:
+        Extracted text
+    """
+    file_ext = Path(file_path).suffix.lower()
+
+    _set_limits(cpu_seconds, timeout_seconds)
+    try:
+        if file_ext in ('.docx', '.doc'):
+            return _extract_docx(file_path)
+
+        if file_ext != '.pdf':
+            raise ValueError(f"Unsupported file format: {file_ext}")
+
+        try:
+            text = _extract_pdf(file_path, engine, max_pages)
+        except ExtractionLimitExceeded:
+            raise
+        except Exception:
+            if not fallback_engine or fallback_engine == engine:
+                raise
+            text = ""
+
+        if not text.strip() and fallback_engine and fallback_engine != engine:
+            text = _extract_pdf(file_path, fallback_engine, max_pages)
+
+        return text
+    finally:
+        _clear_limits()
+
+
+class TextExtractionPool:
+    """Bounded process pool for resume text extraction"""
+
+    def __init__(self):
+        self.max_workers = settings.EXTRACTION_WORKERS or os.cpu_count() or 1
+        self.engine = settings.PDF_EXTRACTION_ENGINE.lower()
+        self.fallback_engine = (settings.PDF_FALLBACK_ENGINE or "").lower() or None
+        self.max_pages = settings.EXTRACTION_MAX_PAGES
+        self.cpu_seconds = settings.EXTRACTION_CPU_SECONDS
+        self.timeout_seconds = settings.EXTRACTION_TIMEOUT_SECONDS
+
+        if self.engine not in PDF_ENGINES:
+            raise ValueError(f"Unknown PDF extraction engine: {self.engine}")
+        if self.fallback_engine and self.fallback_engine not in PDF_ENGINES:
+            raise ValueError(f"Unknown PDF fallback engine: {self.fallback_engine}")
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn keeps workers free of the parent's model weights and threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker
+                )
+                log.info(f"Started text extraction pool with {self.max_workers} workers")
+            return self._executor
+
+    def _recycle(self, executor: ProcessPoolExecutor):
+        """Tear down a pool whose worker is stuck or dead"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+
+        # A worker stuck in native code ignores the in-process limits, so
+        # the processes are terminated rather than waited on
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        log.warning("Recycled text extraction pool")
+
+    def submit(self, file_path: str) -> Future:
+        """Schedule extraction of a file
+
+        Args:
+            file_path: Path to resume file
+
+        Returns:
+            Future resolving to the extracted text
+        """
+        executor = self._get_executor()
+        future = executor.submit(
+            extract_text,
+            file_path,
+            self.engine,
+            self.fallback_engine,
+            self.max_pages,
+            self.cpu_seconds,
+            self.timeout_seconds
+        )
+        future.executor = executor
+        return future
+
+    def result(self, future: Future, file_path: str, retry: bool = True) -> str:
+        """Wait for an extraction future, returning empty text on failure
+
+        Args:
+            future: Future returned by submit
+            file_path: Path the future was submitted for (for logging)
+            retry: Resubmit once if the pool was torn down under this file
+
+        Returns:
+            Extracted text, or an empty string if extraction failed
+        """
+        try:
+            # Leave the worker time to enforce its own limit before giving up on it
+            return future.result(timeout=self.timeout_seconds + 5)
+        except FutureTimeoutError:
+            log.error(f"Text extraction timed out for {file_path}")
+            self._recycle(future.executor)
+        except (BrokenProcessPool, CancelledError):
+            # Usually collateral from another file killing the pool
+            self._recycle(future.executor)
+            if retry:
+                return self.result(self.submit(file_path), file_path, retry=False)
+            log.error(f"Text extraction worker died while processing {file_path}")
+        except Exception as e:
+            log.error(f"Error extracting text from {file_path}: {e}")
+        return ""
+
+    def extract(self, file_path: str) -> str:
+        """Extract text from a single file
+
+        Args:
+            file_path: Path to resume file
+
+        Returns:
+            Extracted text, or an empty string if extraction failed
+        """
+        return self.result(self.submit(file_path), file_path)
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+            log.info("Text extraction pool shut down")
+
+
+# Global instance
+text_extractor = TextExtractionPool()
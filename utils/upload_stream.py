@@ -0,0 +1,356 @@
+# Streaming multipart uploads
+"""
+Receives multipart resume uploads straight from the ASGI request stream
+
+The body is fed chunk by chunk through python-multipart's push parser. Each
+file part is written to disk with aiofiles and hashed as it arrives, its
+leading bytes are checked against the allowed document types, and it is
+refused as soon as it passes MAX_UPLOAD_SIZE. Nothing is spooled in memory
+or to a temporary file first, and the event loop never blocks on disk
+writes. Batch uploads apply the same checks to every file while it arrives,
+and a limit to the whole body.
+"""
+import hashlib
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import aiofiles
+import aiofiles.os
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from multipart.multipart import MultipartParser, parse_options_header
+from config.settings import settings
+from utils.file_handler import file_handler
+from utils.logger import log
+
+
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadRejected(Exception):
+    """Raised when a streamed upload is refused"""
+
+    def __init__(self, status_code: int, detail: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.headers = headers
+
+
+class _FilePart:
+    """Destination of the file part currently being received"""
+
+    def __init__(self, filename: str, max_size: Optional[int] = None, check_type: bool = True):
+        self.filename = filename
+        self.max_size = max_size or file_handler.max_size
+        self.check_type = check_type
+        self.file_ext = Path(filename).suffix.lower()
+        self.temp_path = file_handler.get_incoming_path(filename)
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.header = b""
+        self.validated = not check_type
+        self.file = None
+
+    async def open(self):
+        self.file = await aiofiles.open(self.temp_path, 'wb')
+
+    async def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.max_size:
+            max_mb = self.max_size / (1024 * 1024)
+            raise UploadRejected(413, f"File too large. Maximum size: {max_mb}MB")
+
+        if not self.validated:
+            self.header += data[:file_handler.MAGIC_HEADER_SIZE - len(self.header)]
+            if len(self.header) >= file_handler.MAGIC_HEADER_SIZE:
+                self.validate()
+
+        self.digest.update(data)
+        await self.file.write(data)
+
+    def validate(self):
+        if not self.check_type:
+            return
+        is_valid, error = file_handler.validate_content_type(self.header, self.filename)
+        if not is_valid:
+            raise UploadRejected(415, error)
+        self.validated = True
+
+    async def close(self):
+        if self.file is not None:
+            await self.file.close()
+            self.file = None
+
+    async def discard(self):
+        await self.close()
+        await self.remove(self.temp_path)
+
+    @staticmethod
+    async def remove(path):
+        try:
+            await aiofiles.os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _content_disposition(headers: Dict[bytes, bytes]) -> Tuple[Optional[str], Optional[str]]:
+    _, params = parse_options_header(headers.get(b"content-disposition", b""))
+    name = params.get(b"name")
+    filename = params.get(b"filename")
+    return (
+        name.decode("latin-1") if name is not None else None,
+        filename.decode("utf-8", errors="replace") if filename is not None else None
+    )
+
+
+async def _parse_parts(request: Request, max_size: int, too_large: str) -> AsyncIterator[Tuple[str, Any]]:
+    """Parse a multipart body as it arrives
+
+    Yields ("part", (field name, filename)) when a part's headers are
+    complete, ("data", bytes) for its content and ("end", None) when it
+    ends.
+
+    Args:
+        request: Incoming request with a multipart/form-data body
+        max_size: Bytes the whole body may hold
+        too_large: Detail of the 413 raised past ``max_size``
+
+    Raises:
+        UploadRejected: If the request is not multipart or too large
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadRejected(400, "Expected a multipart/form-data upload")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_size:
+        raise UploadRejected(413, too_large)
+
+    # The parser is callback based and synchronous, so callbacks only queue
+    # events; they are yielded (and awaited on) after each chunk
+    events: List[Tuple[str, bytes]] = []
+    callbacks = {
+        "on_part_begin": lambda: events.append(("part_begin", b"")),
+        "on_header_field": lambda data, start, end: events.append(("header_field", data[start:end])),
+        "on_header_value": lambda data, start, end: events.append(("header_value", data[start:end])),
+        "on_header_end": lambda: events.append(("header_end", b"")),
+        "on_headers_finished": lambda: events.append(("headers_finished", b"")),
+        "on_part_data": lambda data, start, end: events.append(("part_data", data[start:end])),
+        "on_part_end": lambda: events.append(("part_end", b""))
+    }
+    parser = MultipartParser(boundary, callbacks)
+
+    headers: Dict[bytes, bytes] = {}
+    header_field = b""
+    header_value = b""
+    received = 0
+
+    async for chunk in request.stream():
+        # Chunked bodies carry no Content-Length, so the limit is also counted here
+        received += len(chunk)
+        if received > max_size:
+            raise UploadRejected(413, too_large)
+        parser.write(chunk)
+
+        for event, data in events:
+            if event == "part_begin":
+                headers, header_field, header_value = {}, b"", b""
+            elif event == "header_field":
+                header_field += data
+            elif event == "header_value":
+                header_value += data
+            elif event == "header_end":
+                headers[header_field.lower()] = header_value
+                header_field, header_value = b"", b""
+            elif event == "headers_finished":
+                yield "part", _content_disposition(headers)
+            elif event == "part_data":
+                yield "data", data
+            elif event == "part_end":
+                yield "end", None
+
+        events.clear()
+
+    parser.finalize()
+
+
+async def receive_resume_upload(request: Request, field_name: str = "file") -> Dict:
+    """Stream a single resume from a multipart request into the blob store
+
+    Args:
+        request: Incoming request with a multipart/form-data body
+        field_name: Form field that carries the file
+
+    Returns:
+        Dictionary with filename, file_path, content_hash and size
+
+    Raises:
+        UploadRejected: If the request is malformed, the file is not an
+            allowed type or it exceeds MAX_UPLOAD_SIZE
+    """
+    max_mb = file_handler.max_size / (1024 * 1024)
+    current: Optional[_FilePart] = None
+    received: Optional[_FilePart] = None
+
+    try:
+        async for event, data in _parse_parts(
+            request,
+            file_handler.max_size + MULTIPART_OVERHEAD,
+            f"File too large. Maximum size: {max_mb}MB"
+        ):
+            if event == "part":
+                name, filename = data
+                if name == field_name and filename and received is None:
+                    if Path(filename).suffix.lower() not in file_handler.ALLOWED_EXTENSIONS:
+                        allowed = ', '.join(file_handler.ALLOWED_EXTENSIONS)
+                        raise UploadRejected(400, f"Invalid file type. Allowed: {allowed}")
+                    current = _FilePart(filename)
+                    await current.open()
+            elif event == "data" and current is not None:
+                await current.write(data)
+            elif event == "end" and current is not None:
+                if not current.validated:
+                    current.validate()
+                await current.close()
+                received, current = current, None
+
+        if received is None:
+            raise UploadRejected(400, f"No file found in form field '{field_name}'")
+
+        content_hash = received.digest.hexdigest()
+        blob_path = await run_in_threadpool(
+            file_handler.store_incoming,
+            received.temp_path,
+            content_hash,
+            received.file_ext
+        )
+
+        return {
+            "filename": received.filename,
+            "file_path": str(blob_path),
+            "content_hash": content_hash,
+            "size": received.size
+        }
+
+    except Exception as e:
+        for part in (current, received):
+            if part is not None:
+                await part.discard()
+        if isinstance(e, UploadRejected):
+            log.warning(f"Upload rejected: {e.detail}")
+            raise
+        log.error(f"Error receiving upload: {e}")
+        raise UploadRejected(400, f"Malformed upload: {e}")
+
+
+async def receive_batch_upload(request: Request, field_name: str = "files", max_files: Optional[int] = None) -> List[Dict]:
+    """Stream every file of a multipart batch upload to disk
+
+    Resumes get the checks of a single upload while they arrive and are
+    stored in the blob store. Zip archives are kept as incoming files for
+    the caller to expand and delete. A file that fails its checks is
+    reported and skipped while the rest of the body is still read.
+
+    Args:
+        request: Incoming request with a multipart/form-data body
+        field_name: Form field that carries the files
+        max_files: Resumes to accept (default: BATCH_MAX_FILES)
+
+    Returns:
+        One dict per file with its filename and either an error, a stored
+        resume (file_path, content_hash) or a zip archive (archive_path)
+
+    Raises:
+        UploadRejected: If the request is malformed, holds no file or
+            exceeds BATCH_MAX_REQUEST_SIZE
+    """
+    max_files = max_files or settings.BATCH_MAX_FILES
+    max_mb = settings.BATCH_MAX_REQUEST_SIZE / (1024 * 1024)
+    files: List[Dict] = []
+    current: Optional[_FilePart] = None
+    resumes = 0
+
+    def reject(part: _FilePart, rejected: UploadRejected):
+        log.warning(f"Batch file {part.filename} rejected: {rejected.detail}")
+        files.append({"filename": part.filename, "error": rejected.detail})
+
+    try:
+        async for event, data in _parse_parts(
+            request,
+            settings.BATCH_MAX_REQUEST_SIZE,
+            f"Batch too large. Maximum size: {max_mb}MB"
+        ):
+            if event == "part":
+                name, filename = data
+                if name != field_name or not filename:
+                    continue
+                file_ext = Path(filename).suffix.lower()
+                if file_ext == '.zip':
+                    # Bounded by the request limit; expansion has its own limits
+                    current = _FilePart(filename, max_size=settings.BATCH_MAX_REQUEST_SIZE, check_type=False)
+                elif file_ext not in file_handler.ALLOWED_EXTENSIONS:
+                    files.append({"filename": filename, "error": "Invalid file type"})
+                    continue
+                elif resumes >= max_files:
+                    files.append({"filename": filename, "error": "Batch file limit reached"})
+                    continue
+                else:
+                    current = _FilePart(filename)
+                    resumes += 1
+                await current.open()
+            elif event == "data" and current is not None:
+                try:
+                    await current.write(data)
+                except UploadRejected as rejected:
+                    await current.discard()
+                    reject(current, rejected)
+                    current = None
+            elif event == "end" and current is not None:
+                try:
+                    if not current.validated:
+                        current.validate()
+                except UploadRejected as rejected:
+                    await current.discard()
+                    reject(current, rejected)
+                else:
+                    await current.close()
+                    files.append({"filename": current.filename, "part": current})
+                current = None
+
+        if not files:
+            raise UploadRejected(400, f"No files found in form field '{field_name}'")
+
+        for file in files:
+            part = file.get("part")
+            if part is None:
+                continue
+            if part.file_ext == '.zip':
+                file["archive_path"] = str(part.temp_path)
+            else:
+                content_hash = part.digest.hexdigest()
+                blob_path = await run_in_threadpool(
+                    file_handler.store_incoming,
+                    part.temp_path,
+                    content_hash,
+                    part.file_ext
+                )
+                file["file_path"] = str(blob_path)
+                file["content_hash"] = content_hash
+            del file["part"]
+        return files
+
+    except Exception as e:
+        if current is not None:
+            await current.discard()
+        for file in files:
+            if "part" in file:
+                await file["part"].discard()
+            elif "archive_path" in file:
+                await _FilePart.remove(file["archive_path"])
+        if isinstance(e, UploadRejected):
+            log.warning(f"Batch upload rejected: {e.detail}")
+            raise
+        log.error(f"Error receiving batch upload: {e}")
+        raise UploadRejected(400, f"Malformed upload: {e}")
@@ -0,0 +1,138 @@
+# worker.py
+"""
+Task-queue worker for the candidate pipeline
+
+Run one or more of these, on this host or others pointing at the same
+MongoDB, with USE_TASK_QUEUE=true on the API:
+
+    python worker.py                      # all task types
+    python worker.py --types embed        # a dedicated indexing worker
+    python worker.py --concurrency 8      # more tasks in flight per process
+
+bias_scan tasks are taken in batches by a separate consumer thread
+(agents/bias_scan_consumer.py) rather than by the task threads.
+
+The FAISS and BM25 indexes live on local disk, so embed tasks should be
+consumed by a single worker on the API host.
+"""
+import argparse
+import signal
+import threading
+from typing import Dict, List, Optional
+
+from config.settings import settings
+from utils.logger import log
+from utils.log_sink import log_sink
+from database.task_queue import task_queue, PermanentTaskError, default_worker_id
+from agents.pipeline_tasks import pipeline_tasks
+from agents.bias_scan_consumer import bias_scan_consumer, TASK_TYPE as BIAS_SCAN_TASK
+
+
+class Worker:
+    """Leases tasks from the queue and runs them on a fixed number of threads"""
+
+    def __init__(self, task_types: Optional[List[str]], concurrency: int, poll_interval: float):
+        self.task_types = task_types
+        self.scan_bias = task_types is None or BIAS_SCAN_TASK in task_types
+        # The task threads leave bias scans to the batched consumer
+        self.thread_task_types = [
+            task_type for task_type in (task_types or pipeline_tasks.handlers)
+            if task_type != BIAS_SCAN_TASK
+        ]
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = default_worker_id()
+        self._stop = threading.Event()
+        self._in_flight: Dict[str, str] = {}
+        self._in_flight_lock = threading.Lock()
+
+    def stop(self, *_):
+        log.info(f"Worker {self.worker_id} stopping after in-flight tasks finish")
+        self._stop.set()
+
+    def run(self):
+        task_queue.ensure_indexes()
+        log.info(f"Worker {self.worker_id} started with {self.concurrency} thread(s), types={self.task_types or 'all'}")
+
+        threads = [
+            threading.Thread(target=self._consume, name=f"task-worker-{i}", daemon=True)
+            for i in range(self.concurrency if self.thread_task_types else 0)
+        ]
+        heartbeat = threading.Thread(target=self._heartbeat, name="task-heartbeat", daemon=True)
+
+        for thread in threads:
+            thread.start()
+        heartbeat.start()
+        if self.scan_bias:
+            bias_scan_consumer.start()
+
+        for thread in threads:
+            thread.join()
+        self._stop.wait()
+        bias_scan_consumer.shutdown()
+        log_sink.shutdown()
+        log.info(f"Worker {self.worker_id} stopped")
+
+    def _consume(self):
+        # Each thread leases under its own id so a lost lease is detected per task
+        worker_id = f"{self.worker_id}:{threading.current_thread().name}"
+
+        while not self._stop.is_set():
+            try:
+                task = task_queue.lease(worker_id, self.thread_task_types)
+            except Exception as e:
+                log.error(f"Failed to lease task: {e}")
+                task = None
+
+            if task is None:
+                self._stop.wait(self.poll_interval)
+                continue
+
+            self._run_task(task, worker_id)
+
+    def _run_task(self, task: Dict, worker_id: str):
+        with self._in_flight_lock:
+            self._in_flight[task["_id"]] = worker_id
+
+        try:
+            log.info(f"Running {task['type']} task {task['_id']} (attempt {task['attempts']})")
+            result = pipeline_tasks.handle(task)
+            task_queue.complete(task["_id"], worker_id, result)
+        except Exception as e:
+            permanent = isinstance(e, PermanentTaskError)
+            status = task_queue.fail(task, worker_id, str(e), permanent=permanent)
+            if status == "dead":
+                pipeline_tasks.on_dead_letter(task, str(e))
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(task["_id"], None)
+
+    def _heartbeat(self):
+        """Keep leases of long-running tasks from expiring"""
+        interval = max(1, settings.TASK_VISIBILITY_TIMEOUT_SECONDS // 3)
+        while not self._stop.wait(interval):
+            with self._in_flight_lock:
+                in_flight = list(self._in_flight.items())
+            for task_id, worker_id in in_flight:
+                try:
+                    if not task_queue.extend_lease(task_id, worker_id):
+                        log.warning(f"Lost lease on task {task_id}")
+                except Exception as e:
+                    log.error(f"Failed to extend lease on task {task_id}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run candidate pipeline tasks from the task queue")
+    parser.add_argument("--types", nargs="*", help="Task types to consume (default: all)")
+    parser.add_argument("--concurrency", type=int, default=settings.TASK_WORKER_CONCURRENCY, help="Tasks run at once")
+    parser.add_argument("--poll-interval", type=float, default=settings.TASK_POLL_INTERVAL_SECONDS, help="Seconds between polls when idle")
+    args = parser.parse_args()
+
+    worker = Worker(args.types or None, max(1, args.concurrency), args.poll_interval)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()